@@ -1,219 +1,388 @@
+import time
+
+# 시작 시간 측정 기준 (이 모듈을 가져오기 시작한 시각)
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi import Request
-import uvicorn
 from pathlib import Path
 import json
 from typing import List, Dict, Optional
 import os
-import uuid
-from datetime import datetime
-import re
-import secrets
-
-from .utils.document_processor import DocumentProcessor
-from .utils.database import Database
-from .utils.llm import DeepSeekAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from .services import Services
+from .utils.ingestion import IngestionQueueFull
+from .utils.retrieval import format_context
+from .utils.context_packer import pack_context
+from .utils.block_parser import BlockParser, blocks_to_text
+from .utils.chat_connection import ChatConnection, SendError
+from .utils.session_store import SessionStore
+from .utils.storage_gc import CollectionInProgress
+from .utils.text_store import ProcessedText, open_processed_text
+from .utils.metrics import REGISTRY, CONTENT_TYPE
+from .utils.log import get_logger, set_request_id, valid_request_id, shutdown_logging, RequestIdMiddleware
 from .models.document import Document
 
-app = FastAPI(title="FESTA - 논문 Q&A 시스템")
+# 채팅 메시지 처리 단계별 소요 시간 (history, retrieval, pack, llm, parse, send)
+CHAT_STAGE_LATENCY = REGISTRY.histogram("festa_chat_stage_seconds", "채팅 메시지 처리 단계별 소요 시간 (초)", ["stage"])
+CHAT_MESSAGE_LATENCY = REGISTRY.histogram("festa_chat_message_seconds", "채팅 메시지 하나를 처리하는 전체 시간 (초)", ["outcome"])
+# 시작 단계별 소요 시간 (import: 이 모듈 import, services: 서비스 생성, warmup: 백그라운드 준비,
+# first_request: import 시작부터 첫 요청 응답까지)
+STARTUP_SECONDS = REGISTRY.gauge("festa_startup_seconds", "애플리케이션 시작 단계별 소요 시간 (초)", ["phase"])
+
+logger = get_logger(__name__)
+
+async def _warm_up():
+    start = time.perf_counter()
+    try:
+        timings = await services.warm_up()
+    except Exception as e:
+        logger.exception("app.warmup_failed", error=str(e))
+        return
+    STARTUP_SECONDS.set(time.perf_counter() - start, phase="warmup")
+    logger.info("app.warmed_up", elapsed=round(time.perf_counter() - start, 3),
+                **{stage: round(seconds, 3) for stage, seconds in timings.items()})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 서비스 객체는 import가 아니라 시작할 때 만듭니다
+    start = time.perf_counter()
+    services.start()
+    STARTUP_SECONDS.set(time.perf_counter() - start, phase="services")
+    logger.info("app.started", import_seconds=round(IMPORT_SECONDS, 3),
+                services_seconds=round(time.perf_counter() - start, 3))
+
+    # 지연 로딩되는 라이브러리, 검색 인덱스, 수집 작업 프로세스를 백그라운드에서 준비 (0이면 끔)
+    warmup_task = asyncio.create_task(_warm_up()) if os.getenv("FESTA_WARMUP", "1") != "0" else None
+    # 고아 파일 정리와 데이터베이스 공간 회수를 주기적으로 실행 (0이면 끔)
+    gc_interval = float(os.getenv("FESTA_GC_INTERVAL", "21600"))
+    gc_task = asyncio.create_task(services.storage_collector.run_periodically(gc_interval)) if gc_interval > 0 else None
+    # 다른 작업 프로세스에서 보낸 브로드캐스트를 이 프로세스의 연결에 전달
+    broadcast_task = asyncio.create_task(manager.relay_broadcasts())
+    yield
+    # 종료 시 백그라운드 작업과 연결 정리
+    for task in (warmup_task, gc_task, broadcast_task):
+        if task is not None:
+            task.cancel()
+    await services.aclose()
+    shutdown_logging()
+
+class FirstRequestTimer:
+    """import 시작부터 첫 HTTP/WebSocket 요청에 응답할 때까지 걸린 시간을 기록하는 ASGI 미들웨어입니다."""
+
+    def __init__(self, app):
+        self.app = app
+        self.recorded = False
 
-# 정적 파일과 템플릿 설정
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+    async def __call__(self, scope, receive, send):
+        if self.recorded or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_record(message):
+            await send(message)
+            if not self.recorded and message["type"] in ("http.response.start", "websocket.accept"):
+                self.recorded = True
+                elapsed = time.perf_counter() - IMPORT_STARTED
+                STARTUP_SECONDS.set(elapsed, phase="first_request")
+                logger.info("app.first_request", path=scope.get("path"), elapsed=round(elapsed, 3))
+
+        await self.app(scope, receive, send_and_record)
+
+app = FastAPI(title="FESTA - 논문 Q&A 시스템", lifespan=lifespan)
+# 요청마다 ID를 붙여 업로드, 채팅, LLM 로그를 묶습니다
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(FirstRequestTimer)
 
-# 초기화
 BASE_DIR = Path(__file__).resolve().parent.parent
-document_processor = DocumentProcessor(str(BASE_DIR))
-database = Database(str(BASE_DIR / "data" / "db" / "documents.db"))
-llm = DeepSeekAPI()
+# 서비스 객체 모음 (lifespan에서 생성)
+services = Services(BASE_DIR)
+
+# 정적 파일과 템플릿 설정 (작업 디렉토리와 관계없이 backend 디렉토리 기준)
+app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+
+# 검색 후보 청크 수 (모델별 토큰 예산에 맞춰 이 중 일부만 전달)
+RETRIEVAL_TOP_K = int(os.getenv("FESTA_RETRIEVAL_TOP_K", "20"))
+
+# LLM에 전달할 대화 기록의 토큰 예산
+HISTORY_TOKEN_BUDGET = int(os.getenv("FESTA_HISTORY_TOKEN_BUDGET", "2000"))
 
-# WebSocket 연결 관리
+# WebSocket 연결 하나에서 동시에 처리하는 요청 수, 읽지 않은 프레임 한도, 멈춘 클라이언트를 끊기까지의 시간
+WS_MAX_IN_FLIGHT = int(os.getenv("FESTA_WS_MAX_IN_FLIGHT", "4"))
+WS_SEND_QUEUE = int(os.getenv("FESTA_WS_SEND_QUEUE", "64"))
+WS_SEND_TIMEOUT = float(os.getenv("FESTA_WS_SEND_TIMEOUT", "30"))
+
+# 본문 구간 조회 한 번에 반환하는 최대 글자 수
+MAX_TEXT_SPAN = int(os.getenv("FESTA_MAX_TEXT_SPAN", "20000"))
+
+# 작업 프로세스 사이의 브로드캐스트 채널 이름
+BROADCAST_CHANNEL = "broadcast"
+
+# WebSocket 연결 관리 (소켓은 작업 프로세스마다 따로, 세션 기록과 브로드캐스트는 상태 백엔드로 공유)
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.chat_histories: Dict[str, List[Dict[str, str]]] = {}
-        self.reconnect_tokens: Dict[str, str] = {}
+        self.active_connections: Dict[str, ChatConnection] = {}
 
-    async def connect(self, websocket: WebSocket, client_id: str):
+    @property
+    def sessions(self) -> SessionStore:
+        """재연결 토큰별 대화 기록 (작업 프로세스끼리 상태 백엔드로 공유)"""
+        return services.sessions
+
+    async def connect(self, websocket: WebSocket, client_id: str) -> ChatConnection:
         await websocket.accept()
-        print(f"클라이언트 연결됨: {client_id}")
-        self.active_connections[client_id] = websocket
+        logger.info("ws.connected", client_id=client_id)
+        # 메시지마다 작업을 만들어 처리하므로 응답을 기다리는 동안에도 다음 메시지와 취소 요청을 읽습니다
+        connection = ChatConnection(websocket, max_in_flight=WS_MAX_IN_FLIGHT,
+                                    send_queue=WS_SEND_QUEUE, send_timeout=WS_SEND_TIMEOUT)
+        self.active_connections[client_id] = connection
+        return connection
 
     def disconnect(self, websocket: WebSocket, client_id: str):
-        if client_id in self.active_connections:
+        # 같은 client_id로 먼저 재연결한 새 연결은 남겨 둡니다
+        connection = self.active_connections.get(client_id)
+        if connection is not None and connection.websocket is websocket:
             del self.active_connections[client_id]
-            print(f"클라이언트 연결 종료: {client_id}")
+            logger.info("ws.disconnected", client_id=client_id)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
+        """모든 작업 프로세스에 연결된 클라이언트에게 메시지를 보냅니다."""
+        await services.state.publish(BROADCAST_CHANNEL, message)
+
+    async def relay_broadcasts(self):
+        """브로드캐스트 채널을 구독해 이 프로세스에 연결된 클라이언트에게 전달합니다."""
+        async for message in services.state.subscribe(BROADCAST_CHANNEL):
+            for client_id, connection in list(self.active_connections.items()):
+                # 송신 대기열이 가득 찬 느린 클라이언트 때문에 다른 클라이언트가 기다리지 않도록 건너뜁니다
+                if not connection.offer(message):
+                    logger.warning("ws.broadcast_dropped", client_id=client_id)
 
 manager = ConnectionManager()
 
+# 수집할 때마다 현재 값을 읽는 게이지 (서비스가 시작되기 전에는 건너뜀)
+REGISTRY.gauge("festa_active_connections", "연결된 WebSocket 클라이언트 수").set_function(
+    lambda: len(manager.active_connections))
+REGISTRY.gauge("festa_chat_sessions", "메모리에 있는 채팅 세션 수").set_function(lambda: len(manager.sessions))
+QUEUE_DEPTH = REGISTRY.gauge("festa_queue_depth", "대기 중인 작업 수", ["queue"])
+QUEUE_DEPTH.set_function(lambda: services.ingestion.pending, queue="ingestion")
+QUEUE_DEPTH.set_function(lambda: services.async_database.queue_depth(), queue="database")
+QUEUE_DEPTH.set_function(lambda: services.llm.stats["queued"], queue="llm")
+REGISTRY.gauge("festa_llm_in_flight", "진행 중인 업스트림 LLM 호출 수").set_function(lambda: services.llm.stats["in_flight"])
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """응답 캐시 적중/실패 통계를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, services.response_cache.stats)
+
+@app.get("/sessions/stats")
+async def get_session_stats():
+    """채팅 세션 수와 메모리 사용량, 내보내기 통계를 반환합니다."""
+    return manager.sessions.stats()
+
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """업스트림 LLM 호출 수와 같은 질문을 묶은 통계를 반환합니다."""
+    llm = services.llm
+    return dict(llm.stats, coalescing=llm.flights.stats() if llm.flights is not None else None)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 텍스트 형식으로 메트릭을 반환합니다."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/models")
 async def get_available_models():
     """사용 가능한 모델 목록을 반환합니다."""
-    return llm.get_available_models()
+    return services.llm.get_available_models()
+
+async def answer_chat_message(connection: ChatConnection, client_id: str, session_token: str, data: Dict, request_id: str):
+    """채팅 메시지 하나에 답합니다. 연결마다 여러 개가 동시에 실행되며 모든 프레임에 요청 ID를 붙입니다."""
+    content = data["content"]
+    model = data.get("model", "deepseek-chat")
+    stream = data.get("stream", True)
+
+    # 구조화된 메시지를 텍스트로 변환
+    if isinstance(content, list):
+        content = blocks_to_text(content)
+    logger.info("chat.received", client_id=client_id, model=model, stream=stream, content=content)
+
+    message_start = time.perf_counter()
+    # 토큰 예산 안의 이전 대화를 가져옵니다. 질문은 답변이 끝났을 때 답변과 함께 기록하므로
+    # 동시에 처리 중인 다른 질문이나 취소된 질문이 기록 사이에 끼지 않습니다
+    with CHAT_STAGE_LATENCY.time(stage="history"):
+        chat_history = await manager.sessions.history_for_llm(session_token, HISTORY_TOKEN_BUDGET)
+
+    try:
+        # 질문과 관련된 문서 구간 검색
+        loop = asyncio.get_running_loop()
+        with CHAT_STAGE_LATENCY.time(stage="retrieval"):
+            retrieved = await loop.run_in_executor(None, services.retrieval.search, content, RETRIEVAL_TOP_K)
+        # 점수 순으로 모델의 문맥 예산만큼만 채웁니다
+        with CHAT_STAGE_LATENCY.time(stage="pack"):
+            packed, context_report = pack_context(retrieved, services.llm.get_context_budget(model))
+        logger.info("chat.context", **context_report)
+        context_docs = [format_context(chunk) for chunk in packed]
+        sources = list(dict.fromkeys(
+            chunk.get("title") or chunk.get("original_filename") for chunk in packed
+        ))
+        source_ids = list(dict.fromkeys(chunk["doc_id"] for chunk in packed))
+
+        # AI 응답 생성 (스트리밍이면 생성되는 대로 delta 프레임 전송)
+        # 응답은 도착하는 대로 블록으로 증분 파싱합니다
+        # 스트리밍 중에는 생성, 파싱, 전송이 번갈아 일어나므로 각 구간 시간을 따로 누적합니다
+        # (전송 시간에는 느린 클라이언트 때문에 송신 대기열에서 기다린 시간도 들어갑니다)
+        block_parser = BlockParser()
+        blocks = []
+        generation_start = time.perf_counter()
+        parse_seconds = send_seconds = 0.0
+        if stream:
+            response_parts = []
+            async for delta in services.llm.stream_response(content, chat_history=chat_history, context_docs=context_docs, model_id=model, source_ids=source_ids):
+                response_parts.append(delta)
+                parse_start = time.perf_counter()
+                blocks.extend(block_parser.feed(delta))
+                send_start = time.perf_counter()
+                await connection.send({
+                    "type": "delta",
+                    "content": delta,
+                    "model": model,
+                    "request_id": request_id
+                })
+                parse_seconds += send_start - parse_start
+                send_seconds += time.perf_counter() - send_start
+            response = "".join(response_parts)
+        else:
+            response = await services.llm.generate_response(content, chat_history=chat_history, context_docs=context_docs, model_id=model, source_ids=source_ids)
+        llm_seconds = time.perf_counter() - generation_start - parse_seconds - send_seconds
+        parse_start = time.perf_counter()
+        if not stream:
+            blocks.extend(block_parser.feed(response))
+        blocks.extend(block_parser.close())
+        parse_seconds += time.perf_counter() - parse_start
+        logger.info("chat.answered", model=model, blocks=len(blocks), sources=len(source_ids),
+                    elapsed=round(time.perf_counter() - message_start, 3), answer=response)
+
+        # 마지막 프레임을 보내는 중에 연결이 끊겨도 답변이 남도록 보내기 전에 질문과 답변을 함께 기록합니다
+        await manager.sessions.append(session_token, {
+            "role": "user",
+            "content": content
+        }, {
+            "role": "assistant",
+            "content": blocks,
+            "model": model
+        })
+
+        # 응답 전송
+        send_start = time.perf_counter()
+        await connection.send({
+            "type": "message",
+            "content": blocks,
+            "model": model,
+            "sources": sources,
+            "context": context_report,
+            "request_id": request_id
+        })
+        send_seconds += time.perf_counter() - send_start
+        CHAT_STAGE_LATENCY.observe(llm_seconds, stage="llm")
+        CHAT_STAGE_LATENCY.observe(parse_seconds, stage="parse")
+        CHAT_STAGE_LATENCY.observe(send_seconds, stage="send")
+        CHAT_MESSAGE_LATENCY.observe(time.perf_counter() - message_start, outcome="ok")
+
+    except asyncio.CancelledError:
+        # 취소 메시지나 연결 종료로 취소되면 업스트림 LLM 호출도 함께 닫힙니다
+        logger.info("chat.cancelled", elapsed=round(time.perf_counter() - message_start, 3))
+        CHAT_MESSAGE_LATENCY.observe(time.perf_counter() - message_start, outcome="cancelled")
+        raise
+    except SendError:
+        CHAT_MESSAGE_LATENCY.observe(time.perf_counter() - message_start, outcome="error")
+        raise
+    except Exception as e:
+        logger.exception("chat.failed", error=str(e))
+        CHAT_MESSAGE_LATENCY.observe(time.perf_counter() - message_start, outcome="error")
+        await connection.send({
+            "type": "error",
+            "content": f"오류가 발생했습니다: {str(e)}",
+            "request_id": request_id
+        })
 
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket, client_id: str, reconnect_token: str = None):
-    await manager.connect(websocket, client_id)
+    connection = await manager.connect(websocket, client_id)
     try:
-        # 재연결 토큰이 있는 경우 채팅 기록 전송
-        if reconnect_token and reconnect_token in manager.chat_histories:
-            await websocket.send_json({
+        # 재연결 토큰이 유효하면 기존 세션을 이어서 쓰고 채팅 기록 전송
+        history = await manager.sessions.get_history(reconnect_token)
+        if history is not None:
+            session_token = reconnect_token
+            await connection.send({
                 "type": "chat_history",
-                "history": manager.chat_histories[reconnect_token]
+                "history": history
             })
+        else:
+            session_token = manager.sessions.create()
         
-        # 새로운 재연결 토큰 생성 및 전송
-        new_token = secrets.token_urlsafe(32)
-        manager.chat_histories[new_token] = []
-        await websocket.send_json({
+        # 재연결 토큰 전송
+        await connection.send({
             "type": "reconnect_token",
-            "token": new_token
+            "token": session_token
         })
         
         while True:
             try:
                 data = await websocket.receive_json()
-                print(f"받은 메시지: {data}")
                 
                 if data["type"] == "message":
-                    content = data["content"]
-                    model = data.get("model", "deepseek-chat")
-                    
-                    # 구조화된 메시지를 텍스트로 변환
-                    if isinstance(content, list):
-                        text_content = ""
-                        for block in content:
-                            if block["type"] == "code":
-                                text_content += f"\n```{block.get('language', '')}\n{block['content']}\n```\n"
-                            elif block["type"] == "math":
-                                if block["display"]:
-                                    text_content += f"\n$${block['content']}$$\n"
-                                else:
-                                    text_content += f"${block['content']}$"
-                            else:
-                                text_content += block["content"] + " "
-                        content = text_content.strip()
-                    
-                    # 채팅 기록에 사용자 메시지 추가
-                    if new_token in manager.chat_histories:
-                        manager.chat_histories[new_token].append({
-                            "role": "user",
-                            "content": content
+                    # 클라이언트가 보낸 요청 ID가 형식에 맞으면 그대로 쓰고, 아니면 새로 만들어 응답 프레임과 로그를 묶습니다
+                    request_id = set_request_id(valid_request_id(data.get("request_id")))
+                    if "content" not in data:
+                        # 요청 작업 안에서 실패하면 오류 프레임이 가지 않아 클라이언트가 답을 계속 기다립니다
+                        await connection.send({
+                            "type": "error",
+                            "content": "메시지 내용이 없습니다.",
+                            "request_id": request_id
                         })
-                    
+                        continue
                     try:
-                        print(f"DeepSeek API 호출: {content}")
-                        # AI 응답 생성
-                        response = await llm.generate_response(content)
-                        print(f"DeepSeek API 응답: {response}")
-                        
-                        # 응답을 블록으로 구조화
-                        blocks = []
-                        current_block = {"type": "text", "content": ""}
-                        
-                        lines = response.split("\n")
-                        in_code_block = False
-                        code_content = []
-                        code_lang = ""
-                        
-                        for line in lines:
-                            if line.startswith("```"):
-                                if in_code_block:
-                                    # 코드 블록 종료
-                                    if current_block["content"]:
-                                        blocks.append(current_block)
-                                        current_block = {"type": "text", "content": ""}
-                                    blocks.append({
-                                        "type": "code",
-                                        "language": code_lang,
-                                        "content": "\n".join(code_content)
-                                    })
-                                    in_code_block = False
-                                    code_content = []
-                                else:
-                                    # 코드 블록 시작
-                                    if current_block["content"]:
-                                        blocks.append(current_block)
-                                        current_block = {"type": "text", "content": ""}
-                                    in_code_block = True
-                                    code_lang = line[3:].strip()
-                            elif in_code_block:
-                                code_content.append(line)
-                            else:
-                                # 수식 처리
-                                math_parts = re.split(r'(\$\$[\s\S]*?\$\$|\$[^\$\n]+\$)', line)
-                                for part in math_parts:
-                                    if part.startswith("$$"):
-                                        if current_block["content"]:
-                                            blocks.append(current_block)
-                                            current_block = {"type": "text", "content": ""}
-                                        blocks.append({
-                                            "type": "math",
-                                            "display": True,
-                                            "content": part[2:-2].strip()
-                                        })
-                                    elif part.startswith("$"):
-                                        if current_block["content"]:
-                                            blocks.append(current_block)
-                                            current_block = {"type": "text", "content": ""}
-                                        blocks.append({
-                                            "type": "math",
-                                            "display": False,
-                                            "content": part[1:-1].strip()
-                                        })
-                                    elif part:
-                                        current_block["content"] += part + " "
-                        
-                        # 마지막 블록 추가
-                        if current_block["content"]:
-                            blocks.append(current_block)
-                        
-                        # 응답 전송
-                        await websocket.send_json({
-                            "type": "message",
-                            "content": blocks,
-                            "model": model
-                        })
-                        
-                        # 채팅 기록에 AI 응답 추가
-                        if new_token in manager.chat_histories:
-                            manager.chat_histories[new_token].append({
-                                "role": "assistant",
-                                "content": blocks,
-                                "model": model
-                            })
-                            
-                    except Exception as e:
-                        print(f"API 오류: {str(e)}")
-                        await websocket.send_json({
+                        connection.start(request_id, answer_chat_message(connection, client_id, session_token, data, request_id))
+                    except ValueError as e:
+                        await connection.send({
                             "type": "error",
-                            "content": f"오류가 발생했습니다: {str(e)}"
+                            "content": str(e),
+                            "request_id": request_id
+                        })
+
+                elif data["type"] == "cancel":
+                    # 요청 ID를 주지 않으면 이 연결에서 진행 중인 요청을 모두 취소합니다
+                    for request_id in connection.cancel(data.get("request_id")):
+                        await connection.send({
+                            "type": "cancelled",
+                            "request_id": request_id
                         })
                         
             except json.JSONDecodeError as e:
-                print(f"JSON 디코딩 오류: {str(e)}")
-                await websocket.send_json({
+                logger.warning("ws.invalid_json", client_id=client_id, error=str(e))
+                await connection.send({
                     "type": "error",
                     "content": "잘못된 메시지 형식입니다."
                 })
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, client_id)
+        pass
+
+    except SendError as e:
+        logger.warning("ws.send_failed", client_id=client_id, error=str(e))
         
     except Exception as e:
-        print(f"WebSocket 오류: {str(e)}")
-        manager.disconnect(websocket, client_id)
+        logger.exception("ws.failed", client_id=client_id, error=str(e))
         try:
             await websocket.send_json({
                 "type": "error",
@@ -223,76 +392,170 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, reconnect_tok
         except:
             pass
 
-@app.post("/upload")
+    finally:
+        # 연결이 끊기면 진행 중인 요청과 업스트림 LLM 호출을 모두 취소합니다
+        cancelled = connection.in_flight
+        await connection.close()
+        if cancelled:
+            logger.info("ws.requests_cancelled", client_id=client_id, requests=len(cancelled))
+        manager.disconnect(websocket, client_id)
+
+@app.post("/upload", status_code=202)
 async def upload_file(file: UploadFile = File(...)):
     try:
-        # 파일 저장 경로 설정
-        upload_dir = BASE_DIR / "data" / "papers"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 파일 저장
-        file_extension = os.path.splitext(file.filename)[1]
-        saved_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = upload_dir / saved_filename
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # 문서 처리
-        processed_data = document_processor.process_document(str(file_path))
-        
-        # 데이터베이스에 저장
-        document_data = {
-            "original_filename": file.filename,
-            "saved_filename": saved_filename,
-            "file_path": str(file_path),
-            "file_type": file_extension[1:],
-            "upload_date": datetime.now().isoformat(),
-            "file_size": len(content),
-            "processed_file": processed_data.get("processed_file"),
-            "text_length": processed_data.get("text_length"),
-            "processed_date": datetime.now().isoformat(),
-            "title": processed_data.get("title"),
-            "authors": processed_data.get("authors"),
-            "abstract": processed_data.get("abstract"),
-            "keywords": processed_data.get("keywords"),
-            "publication_date": processed_data.get("publication_date"),
-            "journal": processed_data.get("journal"),
-            "doi": processed_data.get("doi"),
-            "citations": processed_data.get("citations"),
-            "categories": processed_data.get("categories"),
-            "tags": processed_data.get("tags"),
-            "vector_id": processed_data.get("vector_id"),
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-        
-        doc_id = database.insert_document(document_data)
-        
-        return {"message": "파일이 성공적으로 업로드되었습니다.", "doc_id": doc_id}
-        
+        # 업로드를 디스크에 스트리밍하고 백그라운드 처리 작업을 등록
+        job = await services.ingestion.submit(file, file.filename)
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "message": "파일이 업로드되었습니다. 문서 처리 중입니다.",
+        "job_id": job["job_id"],
+        "status_url": f"/jobs/{job['job_id']}"
+    }
+
+@app.post("/upload/bulk", status_code=202)
+async def upload_archive(file: UploadFile = File(...)):
+    try:
+        # zip/tar 압축 파일 안의 문서를 백그라운드에서 일괄 수집
+        job = await services.ingestion.submit_archive(file, file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return {
+        "message": "압축 파일이 업로드되었습니다. 문서를 일괄 처리 중입니다.",
+        "job_id": job["job_id"],
+        "status_url": f"/jobs/{job['job_id']}"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = services.ingestion.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """쉼표로 구분된 fields 쿼리 파라미터를 필드 목록으로 바꿉니다."""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+@app.get("/documents")
+async def list_documents(limit: int = 50, cursor: Optional[str] = None, fields: Optional[str] = None,
+                         file_type: Optional[str] = None, journal: Optional[str] = None,
+                         uploaded_from: Optional[str] = None, uploaded_to: Optional[str] = None,
+                         published_from: Optional[str] = None, published_to: Optional[str] = None):
+    try:
+        return await services.async_database.list_documents(
+            limit=limit, cursor=cursor, fields=_parse_fields(fields),
+            file_type=file_type, journal=journal,
+            uploaded_from=uploaded_from, uploaded_to=uploaded_to,
+            published_from=published_from, published_to=published_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/documents/{doc_id}")
-async def get_document(doc_id: str):
-    document = database.get_document(doc_id)
+async def get_document(doc_id: str, fields: Optional[str] = None):
+    try:
+        document = await services.async_database.get_document(doc_id, fields=_parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not document:
         raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
     return document
 
+async def _open_document_text(doc_id: str) -> ProcessedText:
+    document = await services.async_database.get_document(doc_id, fields=["processed_file"])
+    if not document:
+        raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
+    if not document.get("processed_file"):
+        raise HTTPException(status_code=404, detail="처리된 본문이 없습니다.")
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, open_processed_text, document["processed_file"])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="처리된 본문이 없습니다.")
+
+@app.get("/documents/{doc_id}/outline")
+async def get_document_outline(doc_id: str):
+    """본문 길이와 페이지 시작 위치, 절 제목과 그 [start, end) 글자 위치를 반환합니다."""
+    processed = await _open_document_text(doc_id)
+    sections = [
+        dict(section, end=processed.section_span(i)[1]) for i, section in enumerate(processed.sections)
+    ]
+    return {"doc_id": doc_id, "length": processed.length, "pages": processed.pages, "sections": sections}
+
+@app.get("/documents/{doc_id}/text")
+async def get_document_text(doc_id: str, start: int = 0, end: Optional[int] = None,
+                            page: Optional[int] = None, section: Optional[int] = None):
+    """본문의 [start, end) 글자 구간이나 페이지(page), 절(section) 하나를 반환합니다. (검색 결과 인용용)
+
+    압축 구간 중 요청한 구간에 걸친 것만 풀며, 한 번에 최대 MAX_TEXT_SPAN 글자를 반환합니다.
+    """
+    processed = await _open_document_text(doc_id)
+    try:
+        if page is not None:
+            start, end = processed.page_span(page)
+        elif section is not None:
+            start, end = processed.section_span(section)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    start = min(max(0, start), processed.length)
+    end = min(processed.length, start + MAX_TEXT_SPAN if end is None else end)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end는 start보다 작을 수 없습니다.")
+    truncated = end - start > MAX_TEXT_SPAN
+    if truncated:
+        end = start + MAX_TEXT_SPAN
+    loop = asyncio.get_running_loop()
+    text = await loop.run_in_executor(None, processed.read, start, end)
+    return {"doc_id": doc_id, "start": start, "end": end, "length": processed.length,
+            "truncated": truncated, "text": text}
+
 @app.get("/search")
-async def search_documents(query: str, limit: int = 10):
-    results = database.search_documents(query, limit)
+async def search_documents(query: str, limit: int = 10, fields: Optional[str] = None):
+    try:
+        results = await services.async_database.search_documents(query, limit, fields=_parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return results
 
 @app.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str):
-    success = database.delete_document(doc_id)
-    if not success:
+    # 레코드와 함께 원본 파일, 처리된 텍스트, 청크, 벡터를 지웁니다
+    loop = asyncio.get_running_loop()
+    report = await loop.run_in_executor(None, services.storage_collector.delete_document, doc_id)
+    if report is None:
         raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
-    return {"message": "문서가 성공적으로 삭제되었습니다."}
+    return {"message": "문서가 성공적으로 삭제되었습니다.", "bytes_reclaimed": report["bytes_reclaimed"]}
+
+@app.get("/storage/stats")
+async def storage_stats():
+    """데이터베이스 페이지 사용량과 마지막 저장소 정리 결과를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, services.storage_collector.stats)
+
+@app.post("/storage/gc")
+async def collect_storage():
+    """고아 파일과 행을 바로 정리하고 회수한 공간을 반환합니다."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, services.storage_collector.collect)
+    except CollectionInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+# import에 걸린 시간 (FastAPI와 라우트 정의 포함, 서비스 생성 제외)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+STARTUP_SECONDS.set(IMPORT_SECONDS, phase="import")
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
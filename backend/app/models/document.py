@@ -20,11 +20,13 @@ class Document(BaseModel):
     publication_date: Optional[str] = None
     journal: Optional[str] = None
     doi: Optional[str] = None
+    arxiv_id: Optional[str] = None
     citations: Optional[List[str]] = None
     references: Optional[List[str]] = None
     categories: Optional[List[str]] = None
     tags: Optional[List[str]] = None
     vector_id: Optional[str] = None
+    content_hash: Optional[str] = None
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
 
@@ -0,0 +1,116 @@
+"""FastAPI 앱이 사용하는 서비스 객체(문서 처리기, 데이터베이스, LLM, 캐시, 검색, 수집, 저장소 정리, 공유 상태)를 관리합니다.
+
+app.main을 가져오는 것만으로는 디렉토리, 데이터베이스 테이블, 스레드 풀이 만들어지지 않도록 서비스는
+lifespan에서 start()로 생성합니다. 도구나 테스트는 start() 없이 앱을 가져올 수 있습니다.
+"""
+import asyncio
+import importlib
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from .utils.document_processor import DocumentProcessor, EXTRACTOR_MODULES
+from .utils.database import Database, AsyncDatabase
+from .utils.llm import DeepSeekAPI
+from .utils.ingestion import IngestionPipeline
+from .utils.retrieval import RetrievalEngine
+from .utils.response_cache import ResponseCache
+from .utils.session_store import SessionStore
+from .utils.shared_state import create_state_backend
+from .utils.storage_gc import StorageCollector
+from .utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Services:
+    """lifespan에서 만들어지고 정리되는 서비스 객체 모음입니다."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.started = False
+
+    def __getattr__(self, name: str):
+        # start() 전에는 서비스 속성이 없습니다
+        raise AttributeError(f"서비스가 아직 시작되지 않았습니다: {name}")
+
+    def start(self):
+        """서비스 객체를 만듭니다. 디렉토리와 데이터베이스 테이블도 이때 만들어집니다."""
+        base_dir = self.base_dir
+        self.document_processor = DocumentProcessor(str(base_dir))
+        self.database = Database(str(base_dir / "data" / "db" / "documents.db"))
+        self.async_database = AsyncDatabase(self.database, max_workers=int(os.getenv("FESTA_DB_WORKERS", "4")))
+        self.llm = DeepSeekAPI()
+        self.response_cache = ResponseCache(
+            str(base_dir / "data" / "db" / "response_cache.db"),
+            ttl=float(os.getenv("FESTA_CACHE_TTL", "86400")),
+            max_memory_entries=int(os.getenv("FESTA_CACHE_MEMORY_ENTRIES", "512")),
+            max_disk_entries=int(os.getenv("FESTA_CACHE_DISK_ENTRIES", "10000"))
+        )
+        self.llm.cache = self.response_cache
+        # 문서가 삭제되면 그 문서를 참조한 캐시 응답을 무효화
+        self.database.add_delete_listener(self.response_cache.invalidate_document)
+        self.retrieval = RetrievalEngine(str(base_dir / "data" / "index"), self.database)
+        self.ingestion = IngestionPipeline(
+            self.document_processor,
+            self.async_database,
+            retrieval=self.retrieval,
+            max_workers=int(os.getenv("FESTA_INGEST_WORKERS", "2")),
+            max_pending=int(os.getenv("FESTA_INGEST_MAX_PENDING", "32"))
+        )
+        self.storage_collector = StorageCollector(
+            self.document_processor,
+            self.database,
+            retrieval=self.retrieval,
+            min_age=float(os.getenv("FESTA_GC_MIN_AGE", "3600")),
+            io_rate=float(os.getenv("FESTA_GC_IO_RATE", str(8 * 1024 * 1024)))
+        )
+        # 작업 프로세스끼리 공유하는 세션 기록과 브로드캐스트 채널 (기본값은 같은 호스트용 SQLite)
+        self.state = create_state_backend(default_path=str(base_dir / "data" / "db" / "sessions.db"))
+        # 재연결 토큰별 대화 기록 (연결된 세션은 메모리에 두고 메시지는 상태 백엔드에도 기록)
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv("FESTA_SESSION_MAX", "1000")),
+            idle_ttl=float(os.getenv("FESTA_SESSION_IDLE_TTL", "3600")),
+            max_bytes=int(os.getenv("FESTA_SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+            backend=self.state
+        )
+        self.started = True
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """첫 요청이 느리지 않도록 지연 로딩되는 구성 요소를 미리 준비하고 단계별 소요 시간을 반환합니다.
+
+        수집 프로세스 풀의 작업 프로세스를 띄우고, 추출 라이브러리와 HTTP 클라이언트를 가져오고,
+        검색 인덱스와 임베더를 한 번 사용합니다. 요청 처리와 함께 백그라운드에서 실행됩니다.
+        """
+        loop = asyncio.get_running_loop()
+        timings = {}
+
+        # 스레드에서 모듈을 가져오는 동안 fork된 작업 프로세스는 import 잠금을 쥔 채 멈출 수 있으므로
+        # 작업 프로세스를 먼저 모두 띄운 뒤에 이 프로세스의 모듈을 가져옵니다
+        start = time.perf_counter()
+        await self.ingestion.warm_up()
+        timings["ingestion"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for module in EXTRACTOR_MODULES + ("httpx",):
+            await loop.run_in_executor(None, importlib.import_module, module)
+        self.llm.warm_up()
+        timings["imports"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await loop.run_in_executor(None, self.retrieval.search, "warm up", 1)
+        timings["retrieval"] = time.perf_counter() - start
+        return timings
+
+    async def aclose(self):
+        """백그라운드 작업과 연결을 정리합니다."""
+        if not self.started:
+            return
+        self.storage_collector.stop()
+        self.ingestion.shutdown()
+        await self.llm.aclose()
+        self.async_database.close()
+        self.response_cache.close()
+        await self.state.aclose()
+        self.started = False
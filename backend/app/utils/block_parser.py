@@ -0,0 +1,165 @@
+import re
+from typing import List, Dict, Any, Optional
+
+# 코드 블록 구분자
+CODE_FENCE = "```"
+
+# 텍스트 줄에서 수식 시작을 찾는 패턴 ($$ 또는 한 줄 안의 $...$)
+MATH_PATTERN = re.compile(r'\$\$|\$([^\$\n]+)\$')
+
+# 파서 상태
+TEXT, CODE, MATH = "text", "code", "math"
+
+
+class BlockParser:
+    """마크다운 응답을 텍스트/코드/수식 블록으로 나누는 증분 파서입니다.
+
+    텍스트 조각을 도착하는 대로 feed()에 넣으면 완성된 블록을 돌려주고,
+    마지막에 close()를 호출하면 남은 블록을 돌려줍니다. 입력은 한 번만 훑습니다.
+    """
+
+    def __init__(self):
+        self.state = TEXT
+        self._partial_line: List[str] = []
+        self._text_parts: List[str] = []
+        self._code_lines: List[str] = []
+        self._code_language = ""
+        self._math_parts: List[str] = []
+        self._ready: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """텍스트 조각을 처리하고 새로 완성된 블록을 반환합니다."""
+        if "\n" not in chunk:
+            # 줄이 끝나기 전까지는 모아 두기만 합니다
+            self._partial_line.append(chunk)
+            return []
+
+        lines = chunk.split("\n")
+        # 앞부분은 이전 조각에서 이어지는 줄입니다
+        self._partial_line.append(lines[0])
+        self._process_line("".join(self._partial_line))
+        for line in lines[1:-1]:
+            self._process_line(line)
+        self._partial_line = [lines[-1]]
+        return self._take_ready()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """입력을 마치고 남은 블록을 모두 반환합니다. 닫히지 않은 코드/수식 블록도 내보냅니다."""
+        if self._partial_line:
+            line = "".join(self._partial_line)
+            self._partial_line = []
+            if line:
+                self._process_line(line, final=True)
+
+        if self.state == CODE:
+            self._emit_code()
+        elif self.state == MATH:
+            self._emit_math()
+        self._flush_text()
+        return self._take_ready()
+
+    def _take_ready(self) -> List[Dict[str, Any]]:
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _process_line(self, line: str, final: bool = False):
+        newline = "" if final else "\n"
+
+        if self.state == CODE:
+            if line.startswith(CODE_FENCE):
+                self._emit_code()
+            else:
+                self._code_lines.append(line)
+            return
+
+        if self.state == TEXT and line.startswith(CODE_FENCE):
+            self._flush_text()
+            self.state = CODE
+            self._code_language = line[3:].strip()
+            self._code_lines = []
+            return
+
+        position = 0
+        if self.state == MATH:
+            end = line.find("$$")
+            if end == -1:
+                self._math_parts.append(line + newline)
+                return
+            self._math_parts.append(line[:end])
+            self._emit_math()
+            position = end + 2
+
+        self._process_text(line, position)
+        if self.state == MATH:
+            self._math_parts.append(newline)
+        else:
+            self._text_parts.append(newline)
+
+    def _process_text(self, line: str, position: int):
+        """텍스트 줄에서 인라인/디스플레이 수식을 분리합니다."""
+        while True:
+            match = MATH_PATTERN.search(line, position)
+            if match is None:
+                self._text_parts.append(line[position:])
+                return
+
+            self._text_parts.append(line[position:match.start()])
+            if match.group(1) is not None:
+                # $...$ 인라인 수식
+                self._flush_text()
+                self._ready.append({"type": "math", "display": False, "content": match.group(1).strip()})
+                position = match.end()
+                continue
+
+            # $$ 디스플레이 수식: 같은 줄에서 닫히지 않으면 다음 줄로 이어집니다
+            self._flush_text()
+            end = line.find("$$", match.end())
+            if end == -1:
+                self.state = MATH
+                self._math_parts = [line[match.end():]]
+                return
+            self._ready.append({"type": "math", "display": True, "content": line[match.end():end].strip()})
+            position = end + 2
+
+    def _flush_text(self):
+        content = "".join(self._text_parts).strip("\n")
+        self._text_parts = []
+        if content.strip():
+            self._ready.append({"type": "text", "content": content})
+
+    def _emit_code(self):
+        self._ready.append({
+            "type": "code",
+            "language": self._code_language,
+            "content": "\n".join(self._code_lines)
+        })
+        self._code_lines = []
+        self._code_language = ""
+        self.state = TEXT
+
+    def _emit_math(self):
+        self._ready.append({"type": "math", "display": True, "content": "".join(self._math_parts).strip()})
+        self._math_parts = []
+        self.state = TEXT
+
+
+def parse_blocks(text: str, parser: Optional[BlockParser] = None) -> List[Dict[str, Any]]:
+    """전체 응답을 한 번에 블록으로 변환합니다."""
+    parser = parser or BlockParser()
+    return parser.feed(text) + parser.close()
+
+
+def blocks_to_text(blocks: List[Dict[str, Any]]) -> str:
+    """구조화된 블록 목록을 마크다운 텍스트로 되돌립니다."""
+    parts = []
+    for block in blocks:
+        if block["type"] == "code":
+            parts.append(f"\n```{block.get('language', '')}\n{block['content']}\n```\n")
+        elif block["type"] == "math":
+            if block.get("display"):
+                parts.append(f"\n$${block['content']}$$\n")
+            else:
+                parts.append(f"${block['content']}$")
+        else:
+            parts.append(block["content"] + " ")
+    return "".join(parts).strip()
@@ -0,0 +1,376 @@
+"""압축 파일(zip/tar)이나 디렉토리에 있는 문서를 한 번에 수집합니다.
+
+사용법 (backend 디렉토리에서, 서버가 문서를 수집하지 않는 동안 실행):
+    python -m app.utils.bulk_ingestion /path/to/papers --workers 4
+    python -m app.utils.bulk_ingestion papers.zip
+"""
+import argparse
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .database import Database
+from .document_processor import DocumentProcessor, SUPPORTED_EXTENSIONS
+from .ingestion import _get_worker_processor, _process_in_worker, build_document, observe_worker_timings
+from .retrieval import RetrievalEngine
+from .text_store import find_processed, read_processed_text
+
+# 지원하는 압축 파일 확장자
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# 통계에 남길 최대 오류 수
+MAX_REPORTED_ERRORS = 20
+
+# 압축 파일 하나에서 풀어 낼 수 있는 한도 (압축 폭탄 방지). 넘으면 수집을 중단합니다
+MAX_ARCHIVE_MEMBERS = int(os.getenv("FESTA_ARCHIVE_MAX_MEMBERS", "10000"))
+MAX_ARCHIVE_BYTES = int(os.getenv("FESTA_ARCHIVE_MAX_BYTES", str(4 * 1024 ** 3)))
+MAX_COMPRESSION_RATIO = float(os.getenv("FESTA_ARCHIVE_MAX_RATIO", "100"))
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def iter_source_files(root: Path) -> Iterator[Tuple[Path, str]]:
+    """디렉토리 아래의 지원하는 문서를 (경로, 상대 경로 이름) 형태로 순회합니다. 숨김 파일은 건너뜁니다."""
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(name for name in dir_names if not name.startswith('.'))
+        for file_name in sorted(file_names):
+            if file_name.startswith('.') or Path(file_name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            path = Path(dir_path) / file_name
+            yield path, str(path.relative_to(root))
+
+
+def extract_archive(archive_path: Path, dest_dir: Path, max_members: int = MAX_ARCHIVE_MEMBERS,
+                    max_bytes: int = MAX_ARCHIVE_BYTES, max_ratio: float = MAX_COMPRESSION_RATIO) -> int:
+    """압축 파일에서 지원하는 문서만 풀어 내고 그 수를 반환합니다.
+
+    절대 경로나 상위 디렉토리를 가리키는 항목, 일반 파일이 아닌 항목은 건너뜁니다.
+    항목 수, 풀어 낸 전체 크기, 압축률이 한도를 넘으면 ValueError를 발생시킵니다. 헤더에 적힌 크기는
+    믿을 수 없으므로 복사하면서도 실제로 쓴 크기를 확인합니다.
+    """
+    # 압축률 한도는 압축 파일 전체 크기 기준입니다
+    max_bytes = min(max_bytes, int(max(archive_path.stat().st_size, COPY_BUFFER_SIZE) * max_ratio))
+    members = 0
+    written = 0
+
+    def check_member():
+        nonlocal members
+        members += 1
+        if members > max_members:
+            raise ValueError(f"압축 파일의 항목이 너무 많습니다 (최대 {max_members}개).")
+
+    def check_size(size: int):
+        if written + size > max_bytes:
+            raise ValueError(f"압축을 푼 크기가 한도를 넘습니다 (최대 {max_bytes / 1024 / 1024:.0f} MB).")
+
+    def copy(source, target: Path):
+        nonlocal written
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'wb') as file:
+            while True:
+                data = source.read(COPY_BUFFER_SIZE)
+                if not data:
+                    break
+                check_size(len(data))
+                written += len(data)
+                file.write(data)
+
+    def safe_target(name: str) -> Optional[Path]:
+        parts = Path(name).parts
+        if not parts or Path(name).is_absolute() or '..' in parts:
+            return None
+        if Path(name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+            return None
+        return dest_dir.joinpath(*parts)
+
+    count = 0
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                check_member()
+                target = None if info.is_dir() else safe_target(info.filename)
+                if target is None:
+                    continue
+                # 작은 항목은 압축률이 높아도 허용합니다
+                if info.file_size > COPY_BUFFER_SIZE and info.file_size > info.compress_size * max_ratio:
+                    raise ValueError(f"압축률이 비정상적으로 높은 항목이 있습니다: {info.filename}")
+                check_size(info.file_size)
+                with archive.open(info) as source:
+                    copy(source, target)
+                count += 1
+    elif tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path) as archive:
+            for member in archive:
+                check_member()
+                target = safe_target(member.name) if member.isfile() else None
+                if target is None:
+                    continue
+                check_size(member.size)
+                with archive.extractfile(member) as source:
+                    copy(source, target)
+                count += 1
+    else:
+        raise ValueError("zip 또는 tar 형식의 압축 파일이 아닙니다.")
+    return count
+
+
+def _store_and_process_in_worker(base_dir: str, source_path: str, original_filename: str,
+                                 embedder_spec: Optional[str] = None, chunk_size: int = 800,
+                                 overlap: int = 100) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """작업 프로세스에서 파일을 내용 해시 이름으로 저장하고 문서를 처리합니다.
+
+    같은 내용이 이미 처리되어 있으면 추출을 건너뜁니다. 저장하고 처리하는 동안 내용 해시의 공유 잠금을 잡아
+    같은 내용의 문서를 지우는 작업이 파일을 지우지 않도록 합니다. (레코드 삽입까지는 부모 프로세스가 잠급니다)
+    """
+    source = Path(source_path)
+    processor = _get_worker_processor(base_dir)
+
+    content_hash = DocumentProcessor.file_hash(source)
+    with processor.acquire_content_lock(content_hash, shared=True):
+        return _store_and_process_locked(processor, source, original_filename, content_hash,
+                                         embedder_spec, chunk_size, overlap)
+
+
+def _store_and_process_locked(processor: DocumentProcessor, source: Path, original_filename: str, content_hash: str,
+                              embedder_spec: Optional[str], chunk_size: int,
+                              overlap: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    file_extension = source.suffix.lower()
+    saved_filename = f"{content_hash}{file_extension}"
+    file_path = processor.papers_dir / saved_filename
+    if not file_path.exists():
+        # 다른 작업이 같은 파일을 동시에 저장해도 깨지지 않도록 임시 파일에 쓴 뒤 교체합니다
+        tmp_path = processor.papers_dir / f".bulk-{uuid.uuid4()}.part"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, file_path)
+    else:
+        # 저장소 정리 작업이 다시 쓰이는 파일을 오래된 고아 파일로 보지 않도록 수정 시간을 갱신합니다
+        os.utime(file_path)
+
+    stored = {
+        "original_filename": original_filename,
+        "saved_filename": saved_filename,
+        "file_path": file_path,
+        "file_type": file_extension[1:],
+        "file_size": source.stat().st_size,
+        "content_hash": content_hash,
+    }
+
+    processed_file = find_processed(processor.processed_dir, saved_filename)
+    if processed_file is not None:
+        os.utime(processed_file)
+        return stored, {"deduplicated": True}
+    return stored, _process_in_worker(str(processor.base_dir), str(file_path), embedder_spec, chunk_size, overlap)
+
+
+class BulkIngestor:
+    """많은 문서를 프로세스 풀에서 처리하고 레코드를 배치 단위로 삽입합니다.
+
+    동시에 처리 중인 파일 수를 제한하여 파일 수와 관계없이 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, document_processor: DocumentProcessor, database: Database,
+                 retrieval: Optional[RetrievalEngine] = None, executor: Optional[Executor] = None,
+                 max_workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 batch_size: int = 200, skip_existing: bool = True):
+        self.document_processor = document_processor
+        self.database = database
+        self.retrieval = retrieval
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.batch_size = batch_size
+        # 이미 같은 내용의 문서가 있으면 레코드를 추가하지 않습니다 (다시 실행해도 중복되지 않음)
+        self.skip_existing = skip_existing
+        self._executor = executor
+
+    def ingest(self, files: Iterable[Tuple[Path, str]],
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """(경로, 원래 파일명) 목록을 수집하고 처리량과 형식별 통계를 반환합니다.
+
+        progress를 지정하면 배치를 삽입할 때마다 통계 사본과 함께 호출합니다.
+        """
+        own_executor = self._executor is None
+        executor = self._executor or ProcessPoolExecutor(max_workers=self.max_workers)
+        stats = {
+            "files": 0, "completed": 0, "failed": 0, "skipped": 0, "deduplicated": 0,
+            "bytes": 0, "elapsed": 0.0, "files_per_sec": 0.0, "mb_per_sec": 0.0,
+            "by_format": {}, "errors": []
+        }
+        started = time.perf_counter()
+        seen_hashes = set()
+        batch: List[Dict[str, Any]] = []
+        # 배치의 레코드를 삽입할 때까지 잡아 두는 내용 해시 공유 잠금
+        batch_locks = []
+        pending = {}
+
+        def worker_args(path: Path, name: str) -> list:
+            args = [str(self.document_processor.base_dir), str(path), name]
+            if self.retrieval is not None:
+                chunker = self.retrieval.chunker
+                args += [self.retrieval.embedder.name, chunker.chunk_size, chunker.overlap]
+            return args
+
+        def format_stats(file_type: str) -> Dict[str, int]:
+            return stats["by_format"].setdefault(file_type, {"completed": 0, "failed": 0, "skipped": 0})
+
+        def flush():
+            try:
+                if batch:
+                    self.database.insert_documents(batch)
+            finally:
+                batch.clear()
+                for lock in batch_locks:
+                    lock.close()
+                batch_locks.clear()
+            elapsed = time.perf_counter() - started
+            stats["elapsed"] = round(elapsed, 3)
+            stats["files_per_sec"] = round(stats["completed"] / elapsed, 2) if elapsed else 0.0
+            stats["mb_per_sec"] = round(stats["bytes"] / elapsed / (1024 * 1024), 2) if elapsed else 0.0
+            if progress is not None:
+                progress(_copy_stats(stats))
+
+        def collect(future, name: str, file_type: str):
+            try:
+                stored, processed_data = future.result()
+                observe_worker_timings(processed_data)
+                content_hash = stored["content_hash"]
+                if content_hash in seen_hashes or (
+                        self.skip_existing and self.database.find_by_content_hash(content_hash)):
+                    stats["skipped"] += 1
+                    format_stats(file_type)["skipped"] += 1
+                    return
+
+                # 작업 프로세스가 잠금을 푼 뒤 같은 내용의 문서가 삭제되면서 파일이 지워졌을 수 있으므로 잠근 뒤 확인합니다
+                lock = self.document_processor.acquire_content_lock(content_hash, shared=True)
+                batch_locks.append(lock)
+                if not Path(stored["file_path"]).exists():
+                    raise FileNotFoundError(f"저장한 파일이 삭제되었습니다: {stored['saved_filename']}")
+
+                if processed_data.pop("deduplicated", False):
+                    stats["deduplicated"] += 1
+                    processed_data = self._reuse_processed(stored)
+                elif self.retrieval is not None and processed_data.get("chunks"):
+                    self.retrieval.add_chunks(content_hash, processed_data["chunks"], processed_data["vectors"])
+                    processed_data = dict(processed_data, vector_id=content_hash)
+
+                batch.append(build_document(stored, processed_data))
+                # 레코드를 배치에 넣은 뒤에만 기록해서 실패한 파일과 같은 내용의 다음 파일은 다시 시도합니다
+                seen_hashes.add(content_hash)
+                stats["completed"] += 1
+                stats["bytes"] += stored["file_size"]
+                format_stats(file_type)["completed"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                format_stats(file_type)["failed"] += 1
+                if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                    stats["errors"].append({"file": name, "error": str(e)})
+            if len(batch) >= self.batch_size:
+                flush()
+
+        try:
+            for path, name in files:
+                stats["files"] += 1
+                future = executor.submit(_store_and_process_in_worker, *worker_args(path, name))
+                pending[future] = (name, path.suffix.lower()[1:])
+                # 처리 중인 파일 수를 제한합니다
+                while len(pending) >= self.max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future, *pending.pop(future))
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, *pending.pop(future))
+            flush()
+        finally:
+            for lock in batch_locks:
+                lock.close()
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+        return stats
+
+    def _reuse_processed(self, stored: Dict[str, Any]) -> Dict[str, Any]:
+        """이미 추출된 텍스트를 재사용합니다. 검색 색인이 빠져 있으면 다시 만듭니다."""
+        processed_file = find_processed(self.document_processor.processed_dir, stored['saved_filename'])
+        text = read_processed_text(processed_file)
+        processed_data = {"processed_file": str(processed_file), "text_length": len(text)}
+        if self.retrieval is not None:
+            content_hash = stored["content_hash"]
+            if not self.database.has_chunks(content_hash):
+                self.retrieval.index_document(content_hash, text)
+            self.database.set_vector_id(content_hash)
+            processed_data["vector_id"] = content_hash
+        return processed_data
+
+
+def _copy_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(
+        stats,
+        by_format={file_type: dict(counts) for file_type, counts in stats["by_format"].items()},
+        errors=list(stats["errors"])
+    )
+
+
+def format_report(stats: Dict[str, Any]) -> str:
+    """통계를 사람이 읽기 쉬운 문자열로 만듭니다."""
+    lines = [
+        f"파일 {stats['files']}개: 완료 {stats['completed']}, 실패 {stats['failed']}, "
+        f"건너뜀 {stats['skipped']}, 추출 재사용 {stats['deduplicated']}",
+        f"소요 시간 {stats['elapsed']:.1f}s, {stats['files_per_sec']:.1f} files/s, {stats['mb_per_sec']:.1f} MB/s",
+    ]
+    for file_type, counts in sorted(stats["by_format"].items()):
+        lines.append(f"  {file_type:>5}: 완료 {counts['completed']}, 실패 {counts['failed']}, 건너뜀 {counts['skipped']}")
+    for error in stats["errors"]:
+        lines.append(f"  오류 {error['file']}: {error['error']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help="문서 디렉토리 또는 zip/tar 압축 파일")
+    parser.add_argument("--base-dir", type=Path, default=Path(__file__).resolve().parents[2],
+                        help="데이터 디렉토리(data/)가 있는 backend 경로")
+    parser.add_argument("--workers", type=int, default=None, help="추출 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=200, help="한 트랜잭션에 삽입할 레코드 수")
+    parser.add_argument("--no-index", action="store_true", help="검색용 청크 색인을 만들지 않음")
+    parser.add_argument("--allow-duplicates", action="store_true", help="이미 있는 내용의 문서도 레코드를 추가")
+    args = parser.parse_args()
+
+    document_processor = DocumentProcessor(str(args.base_dir))
+    database = Database(str(args.base_dir / "data" / "db" / "documents.db"))
+    retrieval = None if args.no_index else RetrievalEngine(str(args.base_dir / "data" / "index"), database)
+    ingestor = BulkIngestor(
+        document_processor, database, retrieval,
+        max_workers=args.workers, batch_size=args.batch_size, skip_existing=not args.allow_duplicates
+    )
+
+    def progress(stats: Dict[str, Any]):
+        print(f"\r처리 {stats['completed'] + stats['failed'] + stats['skipped']}/{stats['files']} "
+              f"({stats['files_per_sec']:.1f} files/s)", end="", flush=True)
+
+    try:
+        if args.source.is_dir():
+            stats = ingestor.ingest(iter_source_files(args.source), progress)
+        else:
+            with tempfile.TemporaryDirectory(dir=document_processor.base_dir / "data") as tmp:
+                extract_archive(args.source, Path(tmp))
+                stats = ingestor.ingest(iter_source_files(Path(tmp)), progress)
+        print()
+        print(format_report(stats))
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""WebSocket 채팅 연결 하나에서 여러 요청을 동시에 처리하기 위한 송신 대기열과 요청 작업 관리."""
+import asyncio
+from typing import Any, Coroutine, Dict, List, Optional, Union
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 연결 하나에서 동시에 처리하는 요청 수
+DEFAULT_MAX_IN_FLIGHT = 4
+# 클라이언트가 읽지 않은 채 쌓아 둘 수 있는 프레임 수
+DEFAULT_SEND_QUEUE = 64
+# 송신 대기열이 가득 찬 채 이 시간(초)이 지나면 클라이언트가 멈춘 것으로 보고 연결을 닫습니다
+DEFAULT_SEND_TIMEOUT = 30.0
+
+
+class SendError(Exception):
+    """연결이 끊겼거나 클라이언트가 제시간에 읽지 않아 프레임을 보낼 수 없을 때 발생합니다."""
+
+
+class ChatConnection:
+    """WebSocket 연결 하나의 송신 대기열과 진행 중인 요청 작업을 관리합니다.
+
+    프레임은 크기가 제한된 대기열을 거쳐 송신 작업 하나가 순서대로 보냅니다. 느린 클라이언트 때문에
+    대기열이 차면 send()가 기다리므로, 요청 작업도 LLM 응답을 그만큼 천천히 읽습니다.
+    """
+
+    def __init__(self, websocket, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 send_queue: int = DEFAULT_SEND_QUEUE, send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.websocket = websocket
+        self.max_in_flight = max_in_flight
+        self.send_timeout = send_timeout
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=send_queue)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._writer = asyncio.create_task(self._write())
+
+    @property
+    def in_flight(self) -> List[str]:
+        """진행 중인 요청 ID 목록입니다."""
+        return list(self._tasks)
+
+    async def send(self, frame: Union[Dict[str, Any], str]):
+        """프레임(JSON으로 보낼 dict 또는 텍스트)을 송신 대기열에 넣습니다. 대기열이 가득 차 있으면 자리가 날 때까지 기다립니다."""
+        if self._writer.done():
+            raise SendError("연결이 닫혔습니다.")
+        try:
+            await asyncio.wait_for(self._outbox.put(frame), self.send_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("ws.client_stalled", queued=self._outbox.qsize(), timeout=self.send_timeout)
+            await self._abort()
+            raise SendError("클라이언트가 응답을 읽지 않습니다.")
+
+    def offer(self, frame: Union[Dict[str, Any], str]) -> bool:
+        """기다리지 않고 프레임을 송신 대기열에 넣습니다. 대기열이 가득 찼거나 연결이 닫혔으면 False를 반환합니다."""
+        if self._writer.done():
+            return False
+        try:
+            self._outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def start(self, request_id: str, coro: Coroutine):
+        """요청 처리를 작업으로 시작합니다.
+
+        같은 ID의 요청이 진행 중이거나 진행 중인 요청 수가 한도에 이르렀으면 ValueError를 발생시킵니다.
+        """
+        if request_id in self._tasks or len(self._tasks) >= self.max_in_flight:
+            coro.close()
+            if request_id in self._tasks:
+                raise ValueError(f"이미 처리 중인 요청 ID입니다: {request_id}")
+            raise ValueError(f"동시에 처리할 수 있는 요청은 {self.max_in_flight}개까지입니다.")
+        task = asyncio.create_task(coro)
+        self._tasks[request_id] = task
+        task.add_done_callback(lambda done: self._finished(request_id, done))
+
+    def cancel(self, request_id: Optional[str] = None) -> List[str]:
+        """요청 하나를 취소합니다. ID를 주지 않으면 진행 중인 요청을 모두 취소합니다. 취소한 요청 ID를 반환합니다."""
+        request_ids = [request_id] if request_id else list(self._tasks)
+        cancelled = []
+        for request_id in request_ids:
+            task = self._tasks.get(request_id)
+            if task is not None and task.cancel():
+                cancelled.append(request_id)
+        return cancelled
+
+    async def close(self):
+        """진행 중인 요청을 모두 취소하고 끝날 때까지 기다린 뒤 송신 작업을 멈춥니다."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+
+    def _finished(self, request_id: str, task: asyncio.Task):
+        if self._tasks.get(request_id) is task:
+            del self._tasks[request_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("ws.request_failed", request_id=request_id, error=str(task.exception()))
+
+    async def _write(self):
+        while True:
+            frame = await self._outbox.get()
+            if isinstance(frame, str):
+                await self.websocket.send_text(frame)
+            else:
+                await self.websocket.send_json(frame)
+
+    async def _abort(self):
+        """멈춘 클라이언트의 연결을 닫습니다. 수신 루프는 연결 종료를 받아 남은 요청을 정리합니다."""
+        self._writer.cancel()
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
@@ -0,0 +1,121 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+from .response_cache import normalize_text
+from .retrieval import format_context
+from .tokens import count_tokens
+
+# 같은 문서에서 떨어진 구간을 이어 붙일 때 넣는 구분자
+SPAN_SEPARATOR = "\n…\n"
+
+# 이미 선택된 구간과 이 비율 이상 겹치면 중복으로 보고 건너뜁니다
+DUPLICATE_OVERLAP = 0.5
+
+
+def pack_context(chunks: List[Dict[str, Any]], budget_tokens: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """검색된 청크를 점수 순으로 골라 토큰 예산 안에 채웁니다.
+
+    같은 문서에서 겹치는 구간은 한 번만 넣고, 선택된 청크는 문서별로 원문 순서대로 합칩니다.
+    합친 청크 목록과 사용한 토큰 수 등의 보고서를 반환합니다.
+    """
+    ranked = sorted(chunks, key=lambda chunk: chunk.get("score", 0.0), reverse=True)
+    report = {
+        "budget": budget_tokens, "candidates": len(ranked), "selected": 0,
+        "duplicates": 0, "over_budget": 0, "tokens": 0
+    }
+
+    selected = []
+    spans: Dict[str, List[Tuple[int, int]]] = {}
+    seen_texts = set()
+    used = 0
+    for chunk in ranked:
+        key = chunk.get("vector_id") or chunk["doc_id"]
+        trimmed = _trim_overlap(chunk, spans.get(key, []))
+        normalized = normalize_text(chunk["text"])
+        if trimmed is None or normalized in seen_texts:
+            report["duplicates"] += 1
+            continue
+
+        cost = count_tokens(trimmed["text"])
+        if key not in spans:
+            # 문서마다 한 번 붙는 출처 표시
+            cost += count_tokens(format_context(dict(chunk, text="")))
+        if used + cost > budget_tokens:
+            report["over_budget"] += 1
+            continue
+
+        used += cost
+        selected.append(trimmed)
+        seen_texts.add(normalized)
+        spans.setdefault(key, []).append((trimmed["start"], trimmed["end"]))
+
+    # 토크나이저에 따라 합친 결과가 청크별 합계와 조금 다를 수 있으므로 실제 값으로 확인합니다
+    while True:
+        packed = _merge_spans(selected)
+        tokens = sum(count_tokens(format_context(chunk)) for chunk in packed)
+        if tokens <= budget_tokens or not selected:
+            break
+        selected.pop()
+        report["over_budget"] += 1
+
+    report["selected"] = len(selected)
+    report["tokens"] = tokens
+    return packed, report
+
+
+def _trim_overlap(chunk: Dict[str, Any], spans: List[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+    """이미 선택된 구간과 겹치는 부분을 잘라 냅니다. 대부분 겹치면 None을 반환합니다.
+
+    선택된 구간이 청크 한가운데에 있으면 양쪽 중 긴 쪽만 남깁니다.
+    """
+    start, end = chunk["start"], chunk["end"]
+    for span_start, span_end in spans:
+        overlap = min(end, span_end) - max(start, span_start)
+        if overlap > 0 and overlap >= (end - start) * DUPLICATE_OVERLAP:
+            return None
+
+    new_start, new_end = start, end
+    for span_start, span_end in sorted(spans):
+        if span_end <= new_start or span_start >= new_end:
+            continue
+        if span_start <= new_start:
+            new_start = span_end
+        elif span_end >= new_end:
+            new_end = span_start
+        elif span_start - new_start >= new_end - span_end:
+            new_end = span_start
+        else:
+            new_start = span_end
+        if new_start >= new_end:
+            return None
+
+    if (new_start, new_end) == (start, end):
+        return chunk
+
+    # 청크 텍스트는 양 끝 공백이 제거되어 있으므로, 잘라 낼 길이를 그만큼 보수적으로 줄입니다
+    text = chunk["text"]
+    slack = (end - start) - len(text)
+    front = max(0, new_start - start - slack)
+    back = max(0, end - new_end - slack)
+    return dict(chunk, text=text[front:len(text) - back].strip(), start=new_start, end=new_end)
+
+
+def _merge_spans(selected: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """선택된 청크를 문서별로 모아 원문 순서대로 이어 붙입니다. 문서 순서는 가장 높은 점수 순입니다."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in selected:
+        groups.setdefault(chunk.get("vector_id") or chunk["doc_id"], []).append(chunk)
+
+    packed = []
+    for group in groups.values():
+        group.sort(key=lambda chunk: chunk["start"])
+        parts = [group[0]["text"]]
+        for previous, chunk in zip(group, group[1:]):
+            parts.append(" " if chunk["start"] <= previous["end"] else SPAN_SEPARATOR)
+            parts.append(chunk["text"])
+        packed.append(dict(
+            group[0],
+            text="".join(parts),
+            end=group[-1]["end"],
+            score=max(chunk.get("score", 0.0) for chunk in group)
+        ))
+    return packed
@@ -1,18 +1,156 @@
 import sqlite3
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+import base64
 import json
+import re
+import uuid
 from datetime import datetime
 
+from .metrics import REGISTRY
+from .metadata import parse_identifier
+from .text_store import read_processed_text
+
+# 연결마다 적용하는 SQLite 설정
+CONNECTION_PRAGMAS = [
+    # 새 데이터베이스는 삭제로 생긴 빈 페이지를 조금씩 돌려줄 수 있게 만듭니다 (WAL 전환 전에 설정해야 하며,
+    # 기존 데이터베이스는 한 번 VACUUM해야 적용됩니다)
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+]
+
+# 연결마다 캐시할 준비된 구문(prepared statement) 수
+STATEMENT_CACHE_SIZE = 256
+
+# 전문 검색 인덱스에 포함되는 컬럼. FTS 행 번호는 fts_rows 표의 INTEGER PRIMARY KEY로 문서 ID와 연결합니다
+# (documents는 TEXT 기본 키라 VACUUM이 rowid를 다시 매길 수 있음)
+FTS_COLUMNS = ['title', 'authors', 'abstract', 'keywords', 'body']
+FTS_METADATA_COLUMNS = FTS_COLUMNS[:-1]
+
+# 기존 문서를 색인할 때 한 번에 처리하는 문서 수
+FTS_BACKFILL_BATCH = 500
+
+# BM25 컬럼 가중치 (title, authors, abstract, keywords, body 순서)
+FTS_WEIGHTS = (10.0, 5.0, 3.0, 3.0, 1.0)
+
+# 검색어에서 토큰을 추출하는 패턴
+FTS_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# 같은 내용(content_hash)의 문서끼리 공유하는 처리 결과 필드
+ARTIFACT_FIELDS = [
+    'processed_file', 'text_length', 'processed_date', 'title', 'authors', 'abstract',
+    'keywords', 'publication_date', 'journal', 'doi', 'arxiv_id', 'citations', 'categories', 'tags', 'vector_id'
+]
+
+# 기존 데이터베이스에 없으면 추가하는 컬럼
+ADDED_COLUMNS = {
+    'content_hash': 'TEXT',
+    'arxiv_id': 'TEXT',
+}
+
+# documents 테이블의 컬럼 (조회할 필드를 검증할 때 사용)
+DOCUMENT_COLUMNS = (
+    'id', 'original_filename', 'saved_filename', 'file_path', 'file_type', 'upload_date', 'file_size',
+    'processed_file', 'text_length', 'processed_date', 'title', 'authors', 'abstract', 'keywords',
+    'publication_date', 'journal', 'doi', 'arxiv_id', 'citations', 'categories', 'tags', 'vector_id',
+    'content_hash', 'created_at', 'updated_at'
+)
+
+# JSON 리스트 문자열로 저장되는 필드
+LIST_FIELDS = ('authors', 'keywords', 'citations', 'references', 'categories', 'tags')
+
+# 목록 조회의 기본 필드. 모두 idx_documents_listing에 들어 있어 테이블을 읽지 않고 응답합니다
+DEFAULT_LIST_FIELDS = ('id', 'title', 'original_filename', 'file_type', 'journal', 'publication_date', 'upload_date')
+
+# 목록 조회에서 한 번에 반환하는 최대 문서 수
+MAX_LIST_LIMIT = 200
+
+# 메타데이터 조회와 목록 조회(최신순 keyset 페이지네이션, 필터)용 인덱스
+METADATA_INDEXES = {
+    'idx_documents_doi': 'doi',
+    'idx_documents_arxiv_id': 'arxiv_id',
+    'idx_documents_title': 'title COLLATE NOCASE',
+    'idx_documents_publication_date': 'publication_date',
+    'idx_documents_listing': 'upload_date, id, file_type, title, original_filename, journal, publication_date',
+    'idx_documents_file_type': 'file_type, upload_date, id',
+    'idx_documents_journal_date': 'journal COLLATE NOCASE, upload_date, id',
+}
+
+# 다른 인덱스로 대체되어 지우는 인덱스
+DROPPED_INDEXES = ('idx_documents_journal',)
+
+# Database 메서드별 실행 시간과 오류 수
+DB_LATENCY = REGISTRY.histogram("festa_db_call_seconds", "Database 메서드 실행 시간 (초)", ["method"])
+DB_ERRORS = REGISTRY.counter("festa_db_errors_total", "예외로 끝난 Database 메서드 호출 수", ["method"])
+
+
+def instrumented(method: Callable) -> Callable:
+    """메서드의 실행 시간과 오류 수를 메서드 이름으로 기록합니다."""
+    name = method.__name__
+    timed = DB_LATENCY.wrap(method, method=name)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return timed(*args, **kwargs)
+        except Exception:
+            DB_ERRORS.inc(method=name)
+            raise
+    return wrapper
+
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 스레드마다 하나의 연결을 유지합니다
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # 문서 삭제 후 호출되는 콜백 (캐시 무효화 등)
+        self._delete_listeners: List[Callable[[str], None]] = []
         self._init_db()
 
+    def add_delete_listener(self, listener: Callable[[str], None]):
+        """문서가 삭제된 뒤 문서 ID와 함께 호출될 콜백을 등록합니다."""
+        self._delete_listeners.append(listener)
+
+    def _connect(self) -> sqlite3.Connection:
+        """현재 스레드의 연결을 반환합니다. 없으면 새로 만듭니다."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """열려 있는 모든 연결을 닫습니다."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
     def _init_db(self):
         """데이터베이스와 테이블을 초기화합니다."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # documents 테이블 생성
@@ -35,29 +173,211 @@ class Database:
                     publication_date TEXT,
                     journal TEXT,
                     doi TEXT,
+                    arxiv_id TEXT,
                     citations TEXT,
                     categories TEXT,
                     tags TEXT,
                     vector_id TEXT,
+                    content_hash TEXT,
                     created_at TIMESTAMP NOT NULL,
                     updated_at TIMESTAMP NOT NULL
                 )
             ''')
+
+            # 기존 데이터베이스에 새로 추가된 컬럼 반영
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(documents)')}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    cursor.execute(f'ALTER TABLE documents ADD COLUMN {column} {column_type}')
+
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash)')
+            for index in DROPPED_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS {index}')
+            for index, column in METADATA_INDEXES.items():
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {index} ON documents({column})')
+
+            # 검색용 청크 테이블 (vector_row는 벡터 인덱스의 행 번호)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS chunks (
+                    vector_row INTEGER PRIMARY KEY,
+                    vector_id TEXT NOT NULL,
+                    ordinal INTEGER NOT NULL,
+                    start_offset INTEGER NOT NULL,
+                    end_offset INTEGER NOT NULL,
+                    text TEXT NOT NULL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_chunks_vector_id ON chunks(vector_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_vector_id ON documents(vector_id)')
+
+            # 메타데이터와 본문 전문 검색용 FTS5 테이블 (지원하지 않는 SQLite면 LIKE 검색 사용)
+            try:
+                tables = {name for (name,) in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                if 'documents_fts' in tables and 'fts_rows' not in tables:
+                    # 이전 버전은 documents의 rowid를 FTS 행 번호로 썼으므로 색인을 다시 만듭니다
+                    cursor.execute('DROP TABLE documents_fts')
+                cursor.execute(f'''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                        {', '.join(FTS_COLUMNS)},
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                ''')
+                # body_file은 본문을 색인한 행에만 있습니다 (처리된 텍스트 파일마다 한 행)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS fts_rows (
+                        fts_rowid INTEGER PRIMARY KEY,
+                        doc_id TEXT NOT NULL UNIQUE,
+                        body_file TEXT
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_fts_rows_body_file ON fts_rows(body_file)')
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                self.fts_enabled = False
+
+            # 색인되지 않은 기존 문서 반영
+            if self.fts_enabled:
+                cursor.execute('SELECT id FROM documents WHERE id NOT IN (SELECT doc_id FROM fts_rows)')
+                missing = [doc_id for (doc_id,) in cursor.fetchall()]
+                for i in range(0, len(missing), FTS_BACKFILL_BATCH):
+                    self._index_fts_many(cursor, missing[i:i + FTS_BACKFILL_BATCH])
             
             conn.commit()
 
-    def insert_document(self, document: Dict[str, Any]) -> str:
-        """문서를 데이터베이스에 삽입합니다."""
+    @staticmethod
+    def _read_processed_text(processed_file: Optional[str]) -> str:
+        """처리된 본문 텍스트를 읽습니다."""
+        if not processed_file:
+            return ""
+        try:
+            return read_processed_text(processed_file)
+        except (OSError, ValueError):
+            return ""
+
+    def _index_fts_many(self, cursor: sqlite3.Cursor, doc_ids: List[str]):
+        """새 문서들의 전문 검색 색인 행을 추가합니다.
+
+        본문은 처리된 텍스트 파일마다 한 번만 읽어 색인합니다. 이미 색인된 파일을 가리키는 문서(같은 내용을 다시
+        올린 문서)의 행에는 메타데이터만 넣습니다.
+        """
+        if not self.fts_enabled or not doc_ids:
+            return
+        placeholders = ','.join(['?' for _ in doc_ids])
+        cursor.execute(f'''
+            SELECT id, title, authors, abstract, keywords, processed_file
+            FROM documents WHERE id IN ({placeholders})
+        ''', doc_ids)
+        documents = cursor.fetchall()
+        files = sorted({document[5] for document in documents if document[5]})
+        indexed = set()
+        if files:
+            cursor.execute(
+                f'SELECT body_file FROM fts_rows WHERE body_file IN ({",".join(["?" for _ in files])})', files
+            )
+            indexed = {body_file for (body_file,) in cursor.fetchall()}
+
+        rows = []
+        for doc_id, title, authors, abstract, keywords, processed_file in documents:
+            body_file = processed_file if processed_file and processed_file not in indexed else None
+            if body_file:
+                indexed.add(body_file)
+            cursor.execute('INSERT INTO fts_rows (doc_id, body_file) VALUES (?, ?)', (doc_id, body_file))
+            rows.append((cursor.lastrowid, title or "", self._list_text(authors), abstract or "",
+                         self._list_text(keywords), self._read_processed_text(body_file)))
+        cursor.executemany(f'''
+            INSERT INTO documents_fts (rowid, {','.join(FTS_COLUMNS)})
+            VALUES (?, {','.join(['?' for _ in FTS_COLUMNS])})
+        ''', rows)
+
+    def _update_fts_metadata(self, cursor: sqlite3.Cursor, doc_id: str):
+        """문서의 제목, 저자, 초록, 키워드 색인만 갱신합니다. (본문은 다시 읽지 않음)"""
+        if not self.fts_enabled:
+            return
+        cursor.execute('SELECT title, authors, abstract, keywords FROM documents WHERE id = ?', (doc_id,))
+        title, authors, abstract, keywords = cursor.fetchone()
+        cursor.execute(f'''
+            UPDATE documents_fts SET {', '.join(f'{column} = ?' for column in FTS_METADATA_COLUMNS)}
+            WHERE rowid = (SELECT fts_rowid FROM fts_rows WHERE doc_id = ?)
+        ''', (title or "", self._list_text(authors), abstract or "", self._list_text(keywords), doc_id))
+
+    def _remove_fts(self, cursor: sqlite3.Cursor, doc_id: str):
+        """문서의 전문 검색 색인 행을 지웁니다.
+
+        그 행이 본문을 가지고 있었으면 같은 파일을 가리키는 다른 문서의 행으로 본문을 옮깁니다. 파일을 다시 읽지 않도록
+        색인에 저장된 본문을 씁니다.
+        """
+        if not self.fts_enabled:
+            return
+        cursor.execute('SELECT fts_rowid, body_file FROM fts_rows WHERE doc_id = ?', (doc_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        fts_rowid, body_file = row
+        if body_file:
+            cursor.execute('''
+                SELECT f.fts_rowid FROM documents d JOIN fts_rows f ON f.doc_id = d.id
+                WHERE d.processed_file = ? AND d.id != ? LIMIT 1
+            ''', (body_file, doc_id))
+            heir = cursor.fetchone()
+            if heir:
+                cursor.execute('SELECT body FROM documents_fts WHERE rowid = ?', (fts_rowid,))
+                (body,) = cursor.fetchone()
+                cursor.execute('UPDATE documents_fts SET body = ? WHERE rowid = ?', (body, heir[0]))
+                cursor.execute('UPDATE fts_rows SET body_file = ? WHERE fts_rowid = ?', (body_file, heir[0]))
+        cursor.execute('DELETE FROM documents_fts WHERE rowid = ?', (fts_rowid,))
+        cursor.execute('DELETE FROM fts_rows WHERE fts_rowid = ?', (fts_rowid,))
+
+    @staticmethod
+    def _list_text(value: Optional[str]) -> str:
+        """JSON 리스트 필드를 검색용 텍스트로 변환합니다."""
+        if not value:
+            return ""
+        try:
+            items = json.loads(value)
+        except ValueError:
+            return value
+        return " ".join(map(str, items)) if isinstance(items, list) else str(items)
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """사용자 검색어를 FTS5 MATCH 구문으로 변환합니다. 마지막 토큰은 접두어로 검색합니다."""
+        tokens = FTS_TOKEN_PATTERN.findall(query)
+        if not tokens:
+            return ""
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    @staticmethod
+    def _prepare_document(cursor: sqlite3.Cursor, document: Dict[str, Any]) -> str:
+        """리스트 필드를 직렬화하고 공유 산출물을 채운 뒤 새 문서 ID를 반환합니다."""
         # 리스트 타입의 필드를 JSON 문자열로 변환
-        for field in ['authors', 'keywords', 'citations', 'references', 'categories', 'tags']:
+        for field in LIST_FIELDS:
             if field in document and document[field]:
                 document[field] = json.dumps(document[field])
 
-        with sqlite3.connect(self.db_path) as conn:
+        # 같은 내용의 문서가 이미 처리되어 있으면 그 산출물을 가리키는 레코드만 추가
+        if document.get('content_hash') and not document.get('processed_file'):
+            cursor.execute(f'''
+                SELECT {','.join(ARTIFACT_FIELDS)} FROM documents
+                WHERE content_hash = ? AND processed_file IS NOT NULL
+                LIMIT 1
+            ''', (document['content_hash'],))
+            row = cursor.fetchone()
+            if row:
+                for field, value in zip(ARTIFACT_FIELDS, row):
+                    if document.get(field) is None:
+                        document[field] = value
+
+        # ID 생성 (timestamp + random string)
+        return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}_{document['saved_filename']}"
+
+    @instrumented
+    def insert_document(self, document: Dict[str, Any]) -> str:
+        """문서를 데이터베이스에 삽입합니다."""
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            # ID 생성 (timestamp + random string)
-            doc_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{document['saved_filename']}"
+            doc_id = self._prepare_document(cursor, document)
             
             # SQL 쿼리 생성
             fields = list(document.keys())
@@ -73,15 +393,69 @@ class Database:
             values = [doc_id] + [document[field] for field in fields]
             
             cursor.execute(query, values)
+            self._index_fts_many(cursor, [doc_id])
             conn.commit()
             
             return doc_id
 
-    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        """문서를 ID로 조회합니다."""
-        with sqlite3.connect(self.db_path) as conn:
+    @instrumented
+    def insert_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """여러 문서를 한 트랜잭션에서 executemany로 삽입하고 문서 ID 목록을 반환합니다."""
+        if not documents:
+            return []
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            doc_ids = [self._prepare_document(cursor, document) for document in documents]
+
+            # 필드 구성이 같은 문서끼리 묶어 한 구문으로 삽입합니다
+            groups: Dict[tuple, List[list]] = {}
+            for doc_id, document in zip(doc_ids, documents):
+                fields = tuple(document.keys())
+                groups.setdefault(fields, []).append([doc_id] + [document[field] for field in fields])
+            for fields, rows in groups.items():
+                cursor.executemany(f'''
+                    INSERT INTO documents (id, {','.join(fields)})
+                    VALUES (?, {','.join(['?' for _ in fields])})
+                ''', rows)
+
+            self._index_fts_many(cursor, doc_ids)
+            conn.commit()
+            return doc_ids
+
+    @staticmethod
+    def _select_columns(fields: Optional[List[str]], required: tuple = ('id',), prefix: str = '') -> str:
+        """조회할 필드 목록을 검증해 SELECT 절의 컬럼 목록으로 만듭니다. 지정하지 않으면 모든 컬럼입니다."""
+        if not fields:
+            return f'{prefix}*'
+        unknown = [field for field in fields if field not in DOCUMENT_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown)}")
+        return ', '.join(f'{prefix}{column}' for column in dict.fromkeys([*required, *fields]))
+
+    @staticmethod
+    def encode_cursor(upload_date: str, doc_id: str) -> str:
+        """목록 조회의 다음 페이지 위치(upload_date, id)를 불투명한 문자열로 만듭니다."""
+        raw = json.dumps([upload_date, doc_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            upload_date, doc_id = json.loads(raw)
+        except (ValueError, TypeError):
+            raise ValueError("잘못된 cursor 값입니다.")
+        if not isinstance(upload_date, str) or not isinstance(doc_id, str):
+            raise ValueError("잘못된 cursor 값입니다.")
+        return upload_date, doc_id
+
+    @instrumented
+    def get_document(self, doc_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """문서를 ID로 조회합니다. fields를 지정하면 그 필드만 읽습니다."""
+        columns = self._select_columns(fields)
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM documents WHERE id = ?', (doc_id,))
+            cursor.execute(f'SELECT {columns} FROM documents WHERE id = ?', (doc_id,))
             row = cursor.fetchone()
             
             if not row:
@@ -94,20 +468,144 @@ class Database:
             result = dict(zip(columns, row))
             
             # JSON 문자열을 리스트로 변환
-            for field in ['authors', 'keywords', 'citations', 'references', 'categories', 'tags']:
+            for field in LIST_FIELDS:
                 if field in result and result[field]:
                     result[field] = json.loads(result[field])
             
             return result
 
+    @instrumented
+    def list_documents(self, limit: int = 50, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                       file_type: Optional[str] = None, journal: Optional[str] = None,
+                       uploaded_from: Optional[str] = None, uploaded_to: Optional[str] = None,
+                       published_from: Optional[str] = None, published_to: Optional[str] = None) -> Dict[str, Any]:
+        """문서를 최신 업로드 순으로 한 페이지씩 조회합니다.
+
+        (upload_date, id) 기준 keyset 페이지네이션이므로 몇 번째 페이지든 인덱스에서 바로 이어 읽습니다.
+        날짜 범위의 끝 값은 접두어로 비교하므로 uploaded_to='2024-05'는 5월 전체를 포함합니다.
+        반환값의 next_cursor를 다음 호출의 cursor로 넘기면 다음 페이지를 읽고, 마지막 페이지면 None입니다.
+        """
+        limit = max(1, min(limit, MAX_LIST_LIMIT))
+        columns = self._select_columns(list(fields or DEFAULT_LIST_FIELDS), required=('id', 'upload_date'))
+
+        conditions, params = [], []
+        if file_type:
+            conditions.append('file_type = ?')
+            params.append(file_type.lower().lstrip('.'))
+        if journal:
+            conditions.append('journal = ? COLLATE NOCASE')
+            params.append(journal)
+        for column, start, end in (('upload_date', uploaded_from, uploaded_to),
+                                   ('publication_date', published_from, published_to)):
+            if start:
+                conditions.append(f'{column} >= ?')
+                params.append(start)
+            if end:
+                conditions.append(f'{column} <= ?')
+                params.append(end + '\uffff')
+        if cursor:
+            conditions.append('(upload_date, id) < (?, ?)')
+            params.extend(self.decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._connect() as conn:
+            db_cursor = conn.cursor()
+            # 한 건 더 읽어 다음 페이지가 있는지 확인합니다
+            db_cursor.execute(f'''
+                SELECT {columns} FROM documents
+                {where}
+                ORDER BY upload_date DESC, id DESC
+                LIMIT ?
+            ''', [*params, limit + 1])
+            documents = self._rows_to_documents(db_cursor)
+
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = self.encode_cursor(documents[-1]['upload_date'], documents[-1]['id'])
+        return {"documents": documents, "next_cursor": next_cursor}
+
+    @instrumented
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """같은 내용 해시를 가진 처리 완료 문서를 조회합니다."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, file_path, processed_file FROM documents
+                WHERE content_hash = ? AND processed_file IS NOT NULL
+                LIMIT 1
+            ''', (content_hash,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return dict(zip(['id', 'file_path', 'processed_file'], row))
+
+    @instrumented
+    def find_by_identifier(self, doi: Optional[str] = None, arxiv_id: Optional[str] = None,
+                           limit: int = 10, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """정규화된 DOI 또는 arXiv ID로 문서를 조회합니다. (인덱스 사용)"""
+        column, value = ('doi', doi) if doi else ('arxiv_id', arxiv_id)
+        if not value:
+            return []
+        columns = self._select_columns(fields)
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {columns} FROM documents WHERE {column} = ?
+                ORDER BY upload_date DESC
+                LIMIT ?
+            ''', (value, limit))
+            return self._rows_to_documents(cursor)
+
+    @instrumented
+    def get_documents_without_metadata(self, after_rowid: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """제목과 식별자가 모두 비어 있는 문서를 rowid 순서로 조회합니다. (메타데이터 채우기용)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT rowid, id, file_path, processed_file FROM documents
+                WHERE rowid > ? AND title IS NULL AND doi IS NULL AND arxiv_id IS NULL
+                ORDER BY rowid
+                LIMIT ?
+            ''', (after_rowid, limit))
+            columns = ['rowid', 'id', 'file_path', 'processed_file']
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @instrumented
+    def get_documents_without_vectors(self, after_rowid: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """처리된 텍스트는 있지만 vector_id가 비어 있는 문서를 rowid 순서로 조회합니다. (청크 색인 채우기용)"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT rowid, id, content_hash, processed_file FROM documents
+                WHERE rowid > ? AND vector_id IS NULL AND processed_file IS NOT NULL AND content_hash IS NOT NULL
+                ORDER BY rowid
+                LIMIT ?
+            ''', (after_rowid, limit))
+            columns = ['rowid', 'id', 'content_hash', 'processed_file']
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @instrumented
+    def set_vector_id(self, content_hash: str) -> int:
+        """같은 내용의 문서 중 vector_id가 비어 있는 레코드에 청크 색인(content_hash)을 연결하고 갱신된 수를 반환합니다."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'UPDATE documents SET vector_id = ? WHERE content_hash = ? AND vector_id IS NULL',
+                (content_hash, content_hash)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    @instrumented
     def update_document(self, doc_id: str, updates: Dict[str, Any]) -> bool:
         """문서를 업데이트합니다."""
         # 리스트 타입의 필드를 JSON 문자열로 변환
-        for field in ['authors', 'keywords', 'citations', 'references', 'categories', 'tags']:
+        for field in LIST_FIELDS:
             if field in updates and updates[field]:
                 updates[field] = json.dumps(updates[field])
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # 업데이트 쿼리 생성
@@ -122,26 +620,289 @@ class Database:
             values = list(updates.values()) + [datetime.now(), doc_id]
             
             cursor.execute(query, values)
+            updated = cursor.rowcount > 0
+            if updated and 'processed_file' in updates:
+                self._remove_fts(cursor, doc_id)
+                self._index_fts_many(cursor, [doc_id])
+            elif updated and any(column in updates for column in FTS_METADATA_COLUMNS):
+                self._update_fts_metadata(cursor, doc_id)
             conn.commit()
             
-            return cursor.rowcount > 0
+            return updated
 
     def delete_document(self, doc_id: str) -> bool:
-        """문서를 삭제합니다."""
-        with sqlite3.connect(self.db_path) as conn:
+        """문서를 삭제합니다. 파일과 벡터까지 정리하려면 StorageCollector.delete_document를 사용합니다."""
+        return self.remove_document(doc_id) is not None
+
+    @instrumented
+    def remove_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """문서 레코드와 전문 검색 색인, 다른 문서가 쓰지 않는 청크를 한 트랜잭션으로 삭제합니다.
+
+        더 이상 아무 문서도 참조하지 않는 원본/처리된 텍스트 파일 경로, 내용 해시, 벡터 행 번호를 반환합니다.
+        (파일 삭제와 벡터 삭제 표시는 호출하는 쪽에서 합니다) 문서가 없으면 None을 반환합니다.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT rowid, file_path, processed_file, vector_id, content_hash FROM documents WHERE id = ?
+            ''', (doc_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            rowid, file_path, processed_file, vector_id, content_hash = row
+
+            self._remove_fts(cursor, doc_id)
+            cursor.execute('DELETE FROM documents WHERE rowid = ?', (rowid,))
+
+            # 같은 내용으로 업로드된 다른 문서가 있으면 그 문서가 쓰는 산출물은 남깁니다
+            shared_paths, shared_hash = set(), False
+            if content_hash:
+                cursor.execute('SELECT file_path, processed_file FROM documents WHERE content_hash = ?', (content_hash,))
+                for other_file, other_processed in cursor.fetchall():
+                    shared_paths.update((other_file, other_processed))
+                    shared_hash = True
+
+            vector_rows = []
+            if vector_id:
+                cursor.execute('SELECT 1 FROM documents WHERE vector_id = ? LIMIT 1', (vector_id,))
+                if cursor.fetchone() is None:
+                    cursor.execute('SELECT vector_row FROM chunks WHERE vector_id = ?', (vector_id,))
+                    vector_rows = [vector_row for (vector_row,) in cursor.fetchall()]
+                    cursor.execute('DELETE FROM chunks WHERE vector_id = ?', (vector_id,))
+            conn.commit()
+
+        for listener in self._delete_listeners:
+            listener(doc_id)
+        return {
+            "id": doc_id,
+            "files": [path for path in (file_path, processed_file) if path and path not in shared_paths],
+            "content_hash": content_hash if content_hash and not shared_hash else None,
+            "vector_rows": vector_rows,
+        }
+
+    @instrumented
+    def get_referenced_artifacts(self) -> Dict[str, set]:
+        """문서가 참조하는 파일 이름, 내용 해시, vector_id 집합을 반환합니다. (고아 산출물 정리용)"""
+        files, hashes, vector_ids = set(), set(), set()
+        with self._connect() as conn:
+            for file_path, processed_file, content_hash, vector_id in conn.execute(
+                    'SELECT file_path, processed_file, content_hash, vector_id FROM documents'):
+                files.add(Path(file_path).name)
+                if processed_file:
+                    files.add(Path(processed_file).name)
+                if content_hash:
+                    hashes.add(content_hash)
+                if vector_id:
+                    vector_ids.add(vector_id)
+        return {"files": files, "content_hashes": hashes, "vector_ids": vector_ids}
+
+    @instrumented
+    def delete_orphan_rows(self, protected_vector_ids: Optional[set] = None, batch_size: int = 100,
+                           throttle: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """문서가 없는 청크와 전문 검색 색인 행을 삭제하고, 삭제한 청크의 벡터 행 번호와 삭제한 행 수를 반환합니다.
+
+        청크는 vector_id batch_size개씩 나눠 커밋하며, 커밋할 때마다 삭제한 청크 수로 throttle을 호출합니다.
+        protected_vector_ids의 청크는 수집 중이라 아직 문서가 삽입되지 않았을 수 있으므로 남깁니다.
+        """
+        protected = protected_vector_ids or set()
+        vector_rows, fts_rows = [], 0
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+            cursor.execute('''
+                SELECT DISTINCT vector_id FROM chunks
+                WHERE vector_id NOT IN (SELECT vector_id FROM documents WHERE vector_id IS NOT NULL)
+            ''')
+            orphan_ids = [vector_id for (vector_id,) in cursor.fetchall() if vector_id not in protected]
+            for i in range(0, len(orphan_ids), batch_size):
+                batch = orphan_ids[i:i + batch_size]
+                placeholders = ','.join('?' for _ in batch)
+                cursor.execute(f'SELECT vector_row FROM chunks WHERE vector_id IN ({placeholders})', batch)
+                vector_rows.extend(vector_row for (vector_row,) in cursor.fetchall())
+                cursor.execute(f'DELETE FROM chunks WHERE vector_id IN ({placeholders})', batch)
+                conn.commit()
+                if throttle is not None:
+                    throttle(cursor.rowcount)
+
+            if self.fts_enabled:
+                cursor.execute('SELECT doc_id FROM fts_rows WHERE doc_id NOT IN (SELECT id FROM documents)')
+                orphan_docs = [doc_id for (doc_id,) in cursor.fetchall()]
+                for doc_id in orphan_docs:
+                    self._remove_fts(cursor, doc_id)
+                fts_rows = len(orphan_docs)
+                conn.commit()
+        return {"vector_rows": vector_rows, "chunks": len(vector_rows), "fts_rows": fts_rows}
+
+    @instrumented
+    def get_processed_files(self) -> List[str]:
+        """문서가 참조하는 처리된 텍스트 경로를 중복 없이 반환합니다."""
+        with self._connect() as conn:
+            return [path for (path,) in conn.execute(
+                'SELECT DISTINCT processed_file FROM documents WHERE processed_file IS NOT NULL')]
+
+    @instrumented
+    def replace_processed_file(self, old_path: str, new_path: str) -> int:
+        """처리된 텍스트 경로가 old_path인 문서를 모두 new_path로 바꾸고 바꾼 수를 반환합니다. (본문은 같으므로 색인은 그대로 둡니다)"""
+        with self._connect() as conn:
+            cursor = conn.execute('UPDATE documents SET processed_file = ? WHERE processed_file = ?', (new_path, old_path))
+            changed = cursor.rowcount
+            if self.fts_enabled:
+                conn.execute('UPDATE fts_rows SET body_file = ? WHERE body_file = ?', (new_path, old_path))
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
+
+    @instrumented
+    def get_vector_rows(self) -> List[int]:
+        """청크가 남아 있는 벡터 행 번호를 반환합니다."""
+        with self._connect() as conn:
+            return [vector_row for (vector_row,) in conn.execute('SELECT vector_row FROM chunks')]
+
+    @instrumented
+    def remap_vector_rows(self, live_rows: List[int]):
+        """벡터 인덱스를 압축한 뒤 청크의 vector_row를 live_rows 안의 순번으로 한 트랜잭션에서 바꿉니다.
 
-    def search_documents(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """문서를 검색합니다."""
-        with sqlite3.connect(self.db_path) as conn:
+        live_rows는 오름차순이어야 합니다. 새 번호는 이전 번호보다 작거나 같으므로 앞에서부터 바꾸면 겹치지 않습니다.
+        """
+        with self._connect() as conn:
+            conn.executemany('UPDATE chunks SET vector_row = ? WHERE vector_row = ?', [
+                (new_row, old_row) for new_row, old_row in enumerate(live_rows) if new_row != old_row
+            ])
+            conn.commit()
+
+    @instrumented
+    def storage_stats(self) -> Dict[str, int]:
+        """데이터베이스 페이지 크기, 전체/빈 페이지 수와 auto_vacuum 모드를 반환합니다."""
+        with self._connect() as conn:
+            return {
+                pragma: conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+                for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum')
+            }
+
+    @instrumented
+    def incremental_vacuum(self, pages: int) -> int:
+        """빈 페이지를 최대 pages개 파일에서 돌려주고 남은 빈 페이지 수를 반환합니다.
+
+        auto_vacuum이 INCREMENTAL인 데이터베이스에서만 효과가 있습니다.
+        """
+        with self._connect() as conn:
+            # execute는 한 단계만 실행해 페이지를 하나만 돌려주므로 끝까지 실행하는 executescript를 사용합니다
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+            return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    @instrumented
+    def checkpoint(self):
+        """WAL 내용을 데이터베이스 파일에 반영하고 WAL 파일을 비웁니다."""
+        with self._connect() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+
+    @instrumented
+    def vacuum(self):
+        """데이터베이스 전체를 다시 써서 공간을 돌려주고 auto_vacuum을 INCREMENTAL로 전환합니다.
+
+        파일 전체를 복사하므로 오래 걸리고 그동안 쓰기가 막힙니다.
+        """
+        with self._connect() as conn:
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+
+    @instrumented
+    def has_chunks(self, vector_id: str) -> bool:
+        """해당 vector_id의 청크가 이미 색인되어 있는지 확인합니다."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1 FROM chunks WHERE vector_id = ? LIMIT 1', (vector_id,))
+            return cursor.fetchone() is not None
+
+    @instrumented
+    def insert_chunks(self, vector_id: str, chunks: List[Dict[str, Any]]):
+        """청크를 한 트랜잭션으로 저장합니다."""
+        with self._connect() as conn:
+            conn.executemany('''
+                INSERT INTO chunks (vector_row, vector_id, ordinal, start_offset, end_offset, text)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (chunk["vector_row"], vector_id, chunk["ordinal"], chunk["start"], chunk["end"], chunk["text"])
+                for chunk in chunks
+            ])
+            conn.commit()
+
+    @instrumented
+    def get_chunks(self, vector_rows: List[int]) -> Dict[int, Dict[str, Any]]:
+        """벡터 행 번호로 청크와 그 청크를 가진 문서 정보를 조회합니다.
+
+        삭제되어 문서가 남아 있지 않은 청크는 결과에서 제외됩니다.
+        """
+        if not vector_rows:
+            return {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            placeholders = ','.join(['?' for _ in vector_rows])
+            cursor.execute(f'''
+                SELECT c.vector_row, c.vector_id, c.ordinal, c.start_offset, c.end_offset, c.text,
+                       d.id, d.title, d.original_filename
+                FROM chunks c
+                JOIN documents d ON d.id = (
+                    SELECT id FROM documents WHERE vector_id = c.vector_id ORDER BY upload_date DESC LIMIT 1
+                )
+                WHERE c.vector_row IN ({placeholders})
+            ''', vector_rows)
+            columns = ['vector_row', 'vector_id', 'ordinal', 'start', 'end', 'text', 'doc_id', 'title', 'original_filename']
+            return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+    @instrumented
+    def search_documents(self, query: str, limit: int = 10, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """문서를 검색합니다. 결과는 BM25 점수 순으로 정렬되며 강조된 발췌문을 포함합니다.
+
+        검색어가 DOI나 arXiv ID이면 식별자 인덱스로 바로 조회합니다. fields를 지정하면 그 필드만 읽습니다.
+        """
+        identifier = parse_identifier(query)
+        if identifier:
+            results = self.find_by_identifier(limit=limit, fields=fields, **identifier)
+            if results:
+                return results
+
+        if not self.fts_enabled:
+            return self._search_documents_like(query, limit, fields)
+        columns = self._select_columns(fields, prefix='d.')
+
+        match_query = self._fts_query(query)
+        if not match_query:
+            return []
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            # 제목, 저자, 초록, 키워드, 본문에서 검색
+            # 순위를 먼저 매긴 뒤 상위 문서에 대해서만 발췌문을 생성합니다
+            cursor.execute(f'''
+                WITH ranked AS (
+                    SELECT rowid, bm25(documents_fts, {', '.join(str(w) for w in FTS_WEIGHTS)}) AS score
+                    FROM documents_fts
+                    WHERE documents_fts MATCH ?
+                    ORDER BY score
+                    LIMIT ?
+                )
+                SELECT {columns}, ranked.score AS score,
+                       snippet(documents_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet
+                FROM ranked
+                JOIN documents_fts ON documents_fts.rowid = ranked.rowid
+                JOIN fts_rows f ON f.fts_rowid = ranked.rowid
+                JOIN documents d ON d.id = f.doc_id
+                WHERE documents_fts MATCH ?
+                ORDER BY ranked.score
+            ''', (match_query, limit, match_query))
+
+            return self._rows_to_documents(cursor)
+
+    def _search_documents_like(self, query: str, limit: int, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """FTS5를 사용할 수 없을 때의 LIKE 검색입니다."""
+        columns = self._select_columns(fields)
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # 제목, 저자, 초록, 키워드에서 검색
             search_query = f'''
-                SELECT * FROM documents 
+                SELECT {columns} FROM documents 
                 WHERE title LIKE ? 
                 OR authors LIKE ? 
                 OR abstract LIKE ? 
@@ -151,18 +912,79 @@ class Database:
             
             search_pattern = f"%{query}%"
             cursor.execute(search_query, (search_pattern, search_pattern, search_pattern, search_pattern, limit))
-            rows = cursor.fetchall()
-            
-            # 결과를 딕셔너리 리스트로 변환
-            columns = [description[0] for description in cursor.description]
-            results = []
-            
-            for row in rows:
-                result = dict(zip(columns, row))
-                # JSON 문자열을 리스트로 변환
-                for field in ['authors', 'keywords', 'citations', 'references', 'categories', 'tags']:
-                    if field in result and result[field]:
-                        result[field] = json.loads(result[field])
-                results.append(result)
-            
-            return results 
\ No newline at end of file
+            return self._rows_to_documents(cursor)
+
+    @staticmethod
+    def _rows_to_documents(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+        """조회 결과를 딕셔너리 리스트로 변환합니다."""
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        results = []
+        
+        for row in rows:
+            result = dict(zip(columns, row))
+            # JSON 문자열을 리스트로 변환
+            for field in LIST_FIELDS:
+                if field in result and result[field]:
+                    result[field] = json.loads(result[field])
+            results.append(result)
+        
+        return results
+
+
+
+class AsyncDatabase:
+    """Database 메서드를 전용 스레드 풀에서 실행하는 비동기 래퍼입니다.
+
+    스레드마다 연결이 하나씩 유지되므로 스레드 풀 크기가 곧 연결 풀 크기입니다.
+    """
+
+    def __init__(self, database: Database, max_workers: int = 4):
+        self.database = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="festa-db")
+        # 제출한 호출 수와 실행을 시작한 호출 수 (차이가 대기 중인 호출 수)
+        self._submitted = 0
+        self._started = 0
+        self._count_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.database, name)
+        if not callable(attr):
+            return attr
+
+        def run(*args, **kwargs):
+            with self._count_lock:
+                self._started += 1
+            return attr(*args, **kwargs)
+
+        async def call(*args, **kwargs):
+            with self._count_lock:
+                self._submitted += 1
+            try:
+                future = self._executor.submit(run, *args, **kwargs)
+            except RuntimeError:
+                # 종료된 스레드 풀
+                with self._count_lock:
+                    self._submitted -= 1
+                raise
+            future.add_done_callback(self._forget_cancelled)
+            return await asyncio.wrap_future(future)
+
+        call.__name__ = name
+        return call
+
+    def _forget_cancelled(self, future):
+        """실행 전에 취소된 호출은 대기 수에서 뺍니다."""
+        if future.cancelled():
+            with self._count_lock:
+                self._submitted -= 1
+
+    def queue_depth(self) -> int:
+        """스레드 풀에서 실행을 기다리는 호출 수를 반환합니다."""
+        with self._count_lock:
+            return self._submitted - self._started
+
+    def close(self):
+        """스레드 풀과 데이터베이스 연결을 정리합니다."""
+        self._executor.shutdown(wait=True)
+        self.database.close()
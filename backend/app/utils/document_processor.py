@@ -1,32 +1,108 @@
+import fcntl
 import os
+import time
+import hashlib
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, Any
-import PyPDF2
-import markdown
-from bs4 import BeautifulSoup
+from typing import Optional, Dict, Any, List
 import re
 import shutil
 from datetime import datetime
+from itertools import accumulate
+
+from .markup import html_file_to_text, markdown_file_to_text
+from .metadata import extract_metadata
+from .text_store import processed_path, write_processed_text
+
+# 병렬 추출을 사용하기 위한 최소 페이지 수
+PARALLEL_MIN_PAGES = 16
+
+# 처리할 수 있는 문서 확장자
+SUPPORTED_EXTENSIONS = {'.pdf', '.md', '.html', '.tex', '.txt'}
+
+# 추출 라이브러리. 가져오는 데 시간이 걸리므로 해당 형식을 처음 처리할 때 가져옵니다
+EXTRACTOR_MODULES = ('PyPDF2',)
+
+# 내용 해시 이름(SHA-256 16진수)으로 저장된 파일의 이름 부분
+CONTENT_HASH_NAME = re.compile(r'[0-9a-f]{64}')
+
+# 내용 해시 잠금 파일을 나누는 해시 앞자리 수 (16^3 = 4096개)
+CONTENT_LOCK_PREFIX = 3
+
+# 페이지 캐시 압축 수준 (캐시는 추출이 끝나면 지우므로 빠른 수준을 씁니다)
+PAGE_CACHE_COMPRESSION_LEVEL = 1
+
+
+def _extract_pdf_pages(file_path: str, page_numbers: List[int]) -> List[str]:
+    """PDF의 지정된 페이지들에서 텍스트를 추출합니다. (작업 프로세스용)"""
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() for i in page_numbers]
+
 
 class DocumentProcessor:
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, pdf_workers: Optional[int] = None, use_page_cache: Optional[bool] = None):
         self.base_dir = Path(base_dir)
         self.papers_dir = self.base_dir / "data" / "papers"
         self.processed_dir = self.base_dir / "data" / "processed"
         self.db_dir = self.base_dir / "data" / "db"
+        self.page_cache_dir = self.base_dir / "data" / "cache" / "pages"
+        self.lock_dir = self.base_dir / "data" / "cache" / "locks"
+
+        # PDF 페이지 병렬 추출에 사용할 프로세스 수 (1이면 순차 처리)
+        if pdf_workers is None:
+            pdf_workers = int(os.getenv("FESTA_PDF_WORKERS", "1"))
+        self.pdf_workers = max(1, pdf_workers)
+        # 중단된 PDF 추출을 이어서 하기 위한 페이지별 캐시. 처리가 끝난 문서의 캐시는 지웁니다.
+        # 설정하지 않으면 페이지를 병렬로 추출할 때(pdf_workers > 1)만 사용합니다
+        if use_page_cache is None:
+            setting = os.getenv("FESTA_PDF_PAGE_CACHE", "")
+            use_page_cache = setting == "1" if setting else self.pdf_workers > 1
+        self.use_page_cache = use_page_cache
         
         # 디렉토리 생성
-        for dir_path in [self.papers_dir, self.processed_dir, self.db_dir]:
+        for dir_path in [self.papers_dir, self.processed_dir, self.db_dir, self.page_cache_dir, self.lock_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
+    def acquire_content_lock(self, content_hash: str, shared: bool = False):
+        """내용 해시에 대한 잠금을 잡고 잠금 파일을 반환합니다. 파일을 닫으면 풀립니다.
+
+        수집 중인 작업은 문서 레코드를 삽입할 때까지 공유 잠금을, 문서를 지우면서 원본과 산출물을 지우는 쪽은
+        배타 잠금을 잡습니다. 다른 프로세스와도 동작하도록 flock을 쓰며, 잠금 파일은 해시 앞자리로 나눠 씁니다.
+        """
+        lock_file = open(self.lock_dir / f"{content_hash[:CONTENT_LOCK_PREFIX]}.lock", 'ab')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            lock_file.close()
+            raise
+        return lock_file
+
+    @staticmethod
+    def file_hash(file_path: Path) -> str:
+        """파일 내용의 SHA-256 해시를 계산합니다."""
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def content_hash(self, file_path: Path) -> str:
+        """파일의 내용 해시를 반환합니다. 내용 해시 이름으로 저장된 파일은 다시 읽지 않고 이름을 씁니다."""
+        if CONTENT_HASH_NAME.fullmatch(file_path.stem):
+            return file_path.stem
+        return self.file_hash(file_path)
+
     def save_document(self, file_content: bytes, original_filename: str) -> Dict[str, Any]:
         """문서를 저장하고 메타데이터를 반환합니다."""
         # 파일 확장자 추출
         file_ext = Path(original_filename).suffix.lower()
         
         # 허용된 파일 형식 확인
-        allowed_extensions = {'.pdf', '.md', '.html', '.tex', '.txt'}
-        if file_ext not in allowed_extensions:
+        if file_ext not in SUPPORTED_EXTENSIONS:
             raise ValueError(f"지원하지 않는 파일 형식입니다: {file_ext}")
         
         # 고유한 파일명 생성
@@ -67,30 +143,98 @@ class DocumentProcessor:
         else:
             raise ValueError(f"지원하지 않는 파일 형식입니다: {file_ext}")
 
+    def extract_pages(self, file_path: Path) -> List[str]:
+        """문서에서 페이지별 텍스트를 추출합니다. 이어 붙이면 extract_text()와 같으며, 페이지가 없는 형식은 한 덩어리로 반환합니다."""
+        if file_path.suffix.lower() == '.pdf':
+            return self._extract_pdf_page_texts(file_path)
+        return [self.extract_text(file_path)]
+
     def _extract_pdf_text(self, file_path: Path) -> str:
         """PDF 파일에서 텍스트를 추출합니다."""
-        text = ""
+        return "".join(self._extract_pdf_page_texts(file_path))
+
+    def _extract_pdf_page_texts(self, file_path: Path) -> List[str]:
+        """PDF 파일에서 페이지별 텍스트를 추출합니다. 페이지마다 끝에 줄바꿈을 붙입니다."""
+        import PyPDF2
+
+        file_hash = self.content_hash(file_path) if self.use_page_cache else None
+
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+            page_count = len(pdf_reader.pages)
+
+            # 캐시된 페이지는 다시 추출하지 않습니다
+            pages: List[Optional[str]] = [self._read_cached_page(file_hash, i) for i in range(page_count)]
+            missing = [i for i, page in enumerate(pages) if page is None]
+
+            if missing and (self.pdf_workers == 1 or len(missing) < PARALLEL_MIN_PAGES):
+                for i in missing:
+                    pages[i] = pdf_reader.pages[i].extract_text()
+                    self._write_cached_page(file_hash, i, pages[i])
+                missing = []
+
+        if missing:
+            self._extract_pdf_pages_parallel(file_path, file_hash, missing, pages)
+
+        return [f"{page}\n" for page in pages]
+
+    def _extract_pdf_pages_parallel(self, file_path: Path, file_hash: Optional[str],
+                                    page_numbers: List[int], pages: List[Optional[str]]):
+        """페이지 범위를 여러 프로세스에 나누어 추출하고 순서대로 채웁니다."""
+        # 부하 분산을 위해 작업자 수보다 잘게 나눕니다
+        batch_size = max(1, -(-len(page_numbers) // (self.pdf_workers * 4)))
+        batches = [page_numbers[i:i + batch_size] for i in range(0, len(page_numbers), batch_size)]
+
+        with ProcessPoolExecutor(max_workers=self.pdf_workers) as executor:
+            futures = {
+                executor.submit(_extract_pdf_pages, str(file_path), batch): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                for page_number, page_text in zip(batch, future.result()):
+                    pages[page_number] = page_text
+                    self._write_cached_page(file_hash, page_number, page_text)
+
+    def _page_cache_path(self, file_hash: str, page_number: int) -> Path:
+        return self.page_cache_dir / file_hash / f"{page_number:05d}.z"
+
+    def discard_page_cache(self, file_path: Path):
+        """문서의 페이지 캐시를 지웁니다. (처리된 텍스트를 저장한 뒤에는 필요 없음)"""
+        if not self.use_page_cache or file_path.suffix.lower() != '.pdf':
+            return
+        shutil.rmtree(self.page_cache_dir / self.content_hash(file_path), ignore_errors=True)
+
+    def _read_cached_page(self, file_hash: Optional[str], page_number: int) -> Optional[str]:
+        """캐시된 페이지 텍스트를 읽습니다. 없으면 None을 반환합니다."""
+        if not file_hash:
+            return None
+        cache_path = self._page_cache_path(file_hash, page_number)
+        try:
+            with open(cache_path, 'rb') as file:
+                return zlib.decompress(file.read()).decode('utf-8')
+        except (FileNotFoundError, zlib.error):
+            return None
+
+    def _write_cached_page(self, file_hash: Optional[str], page_number: int, text: str):
+        """페이지 텍스트를 캐시에 저장합니다."""
+        if not file_hash:
+            return
+        cache_path = self._page_cache_path(file_hash, page_number)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # 중간에 실패해도 깨진 캐시가 남지 않도록 임시 파일에 쓴 뒤 교체합니다
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as file:
+            file.write(zlib.compress(text.encode('utf-8'), PAGE_CACHE_COMPRESSION_LEVEL))
+        os.replace(tmp_path, cache_path)
 
     def _extract_markdown_text(self, file_path: Path) -> str:
-        """Markdown 파일에서 텍스트를 추출합니다."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            # HTML로 변환
-            html = markdown.markdown(content)
-            # HTML에서 텍스트 추출
-            soup = BeautifulSoup(html, 'html.parser')
-            return soup.get_text()
+        """Markdown 파일에서 텍스트를 추출합니다. 제목은 '#' 줄로 남습니다."""
+        return markdown_file_to_text(file_path)
 
     def _extract_html_text(self, file_path: Path) -> str:
-        """HTML 파일에서 텍스트를 추출합니다."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            soup = BeautifulSoup(file, 'html.parser')
-            return soup.get_text()
+        """HTML 파일에서 본문 텍스트를 스트리밍으로 추출합니다. 제목은 '#' 줄로 남습니다."""
+        return html_file_to_text(file_path)
 
     def _extract_latex_text(self, file_path: Path) -> str:
         """LaTeX 파일에서 텍스트를 추출합니다."""
@@ -110,18 +254,31 @@ class DocumentProcessor:
     def process_document(self, file_path: Path) -> Dict[str, Any]:
         """문서를 처리하고 결과를 반환합니다."""
         # 텍스트 추출
-        text = self.extract_text(file_path)
+        start = time.perf_counter()
+        pages = self.extract_pages(file_path)
+        text = "".join(pages)
+        extracted = time.perf_counter()
         
-        # 처리된 파일 저장
-        processed_filename = f"processed_{file_path.name}.txt"
-        processed_path = self.processed_dir / processed_filename
-        
-        with open(processed_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        # 처리된 텍스트를 페이지 위치와 함께 압축해 저장
+        processed_file = processed_path(self.processed_dir, file_path.name)
+        page_starts = list(accumulate((len(page) for page in pages[:-1]), initial=0))
+        write_processed_text(processed_file, text, page_starts)
+        self.discard_page_cache(file_path)
+        written = time.perf_counter()
+
+        # 서지 메타데이터 (제목, 저자, 초록, 키워드, DOI 등)
+        metadata = extract_metadata(file_path, text)
         
         return {
+            **metadata,
             "original_file": str(file_path),
-            "processed_file": str(processed_path),
+            "processed_file": str(processed_file),
             "text_length": len(text),
-            "processed_date": datetime.now().strftime("%Y%m%d_%H%M%S")
+            "processed_date": datetime.now().strftime("%Y%m%d_%H%M%S"),
+            # 단계별 소요 시간 (작업 프로세스에서 실행되므로 호출한 쪽에서 메트릭으로 기록)
+            "timings": {
+                "extract": extracted - start,
+                "write": written - extracted,
+                "metadata": time.perf_counter() - written
+            }
         } 
\ No newline at end of file
@@ -0,0 +1,436 @@
+import asyncio
+import hashlib
+import importlib
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiofiles
+import aiofiles.os
+
+from .document_processor import DocumentProcessor, EXTRACTOR_MODULES
+from .database import AsyncDatabase
+from .retrieval import RetrievalEngine, Chunker, create_embedder, prepare_chunks
+from .metrics import REGISTRY
+from .log import get_logger, get_request_id
+from .text_store import read_processed_text
+
+# 업로드를 디스크에 쓸 때 사용하는 청크 크기 (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 작업 단계 (순서대로 진행)
+JOB_STAGES = ("stored", "extracted", "indexed")
+
+# 수집 단계별 소요 시간 (store: 디스크 저장, queue: 프로세스 풀 대기, extract/write/metadata/embed: 작업 프로세스,
+# index: 벡터 색인, insert: 레코드 삽입)과 작업 결과
+INGEST_STAGE_LATENCY = REGISTRY.histogram("festa_ingest_stage_seconds", "문서 수집 단계별 소요 시간 (초)", ["stage"])
+INGEST_JOBS = REGISTRY.counter("festa_ingest_jobs_total", "끝난 문서 수집 작업 수", ["status"])
+
+logger = get_logger(__name__)
+
+# 작업 프로세스마다 한 번만 생성되는 문서 처리기와 임베더
+_worker_processor: Optional[DocumentProcessor] = None
+_worker_embedders: Dict[str, Any] = {}
+
+
+def _get_worker_processor(base_dir: str) -> DocumentProcessor:
+    global _worker_processor
+    if _worker_processor is None or str(_worker_processor.base_dir) != base_dir:
+        _worker_processor = DocumentProcessor(base_dir)
+    return _worker_processor
+
+
+def _get_worker_embedder(embedder_spec: str):
+    embedder = _worker_embedders.get(embedder_spec)
+    if embedder is None:
+        embedder = _worker_embedders[embedder_spec] = create_embedder(embedder_spec)
+    return embedder
+
+
+def _warm_up_worker(base_dir: str, embedder_spec: Optional[str] = None):
+    """작업 프로세스가 시작될 때 추출 라이브러리, 문서 처리기, 임베더를 미리 준비합니다. (프로세스 풀 initializer)
+
+    initializer가 예외를 내면 프로세스 풀 전체가 망가지므로 실패는 기록만 하고 첫 작업에서 다시 준비합니다.
+    """
+    try:
+        for module in EXTRACTOR_MODULES:
+            importlib.import_module(module)
+        _get_worker_processor(base_dir)
+        if embedder_spec:
+            _get_worker_embedder(embedder_spec)
+    except Exception as e:
+        logger.warning("ingest.worker_warmup_failed", pid=os.getpid(), error=str(e))
+
+
+def _process_in_worker(base_dir: str, file_path: str,
+                       embedder_spec: Optional[str] = None, chunk_size: int = 800, overlap: int = 100) -> Dict[str, Any]:
+    """작업 프로세스에서 문서를 처리하고, 임베더가 지정되면 청크 분할과 임베딩까지 수행합니다."""
+    processed_data = _get_worker_processor(base_dir).process_document(Path(file_path))
+
+    if embedder_spec:
+        embedder = _get_worker_embedder(embedder_spec)
+        text = read_processed_text(processed_data["processed_file"])
+        start = time.perf_counter()
+        chunks, vectors = prepare_chunks(text, Chunker(chunk_size, overlap), embedder)
+        processed_data["timings"]["embed"] = time.perf_counter() - start
+        processed_data["chunks"] = chunks
+        processed_data["vectors"] = vectors
+    return processed_data
+
+
+def _place_file(tmp_path: Path, file_path: Path):
+    """내용 해시 이름으로 받은 임시 파일을 옮깁니다. 이미 같은 내용의 파일이 있으면 새로 받은 사본은 버립니다."""
+    if file_path.exists():
+        tmp_path.unlink()
+        # 저장소 정리 작업이 다시 쓰이는 파일을 오래된 고아 파일로 보지 않도록 수정 시간을 갱신합니다
+        os.utime(file_path)
+    else:
+        os.replace(tmp_path, file_path)
+
+
+def build_document(stored: Dict[str, Any], processed_data: Dict[str, Any]) -> Dict[str, Any]:
+    """저장된 파일 정보와 처리 결과로 documents 테이블에 넣을 레코드를 만듭니다."""
+    return {
+        "original_filename": stored["original_filename"],
+        "saved_filename": stored["saved_filename"],
+        "file_path": str(stored["file_path"]),
+        "file_type": stored["file_type"],
+        "upload_date": datetime.now().isoformat(),
+        "file_size": stored["file_size"],
+        "processed_file": processed_data.get("processed_file"),
+        "text_length": processed_data.get("text_length"),
+        "processed_date": datetime.now().isoformat(),
+        "title": processed_data.get("title"),
+        "authors": processed_data.get("authors"),
+        "abstract": processed_data.get("abstract"),
+        "keywords": processed_data.get("keywords"),
+        "publication_date": processed_data.get("publication_date"),
+        "journal": processed_data.get("journal"),
+        "doi": processed_data.get("doi"),
+        "arxiv_id": processed_data.get("arxiv_id"),
+        "citations": processed_data.get("citations"),
+        "categories": processed_data.get("categories"),
+        "tags": processed_data.get("tags"),
+        "vector_id": processed_data.get("vector_id"),
+        "content_hash": stored["content_hash"],
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+
+
+def observe_worker_timings(processed_data: Dict[str, Any]) -> float:
+    """작업 프로세스가 보고한 단계별 소요 시간을 메트릭에 기록하고 합계를 반환합니다."""
+    timings = processed_data.pop("timings", None) or {}
+    for stage, seconds in timings.items():
+        INGEST_STAGE_LATENCY.observe(seconds, stage=stage)
+    return sum(timings.values())
+
+
+class IngestionQueueFull(Exception):
+    """대기 중인 수집 작업이 한도를 넘었을 때 발생합니다."""
+
+
+class IngestionPipeline:
+    """업로드된 문서를 프로세스 풀에서 처리하고 작업 상태를 추적합니다."""
+
+    def __init__(self, document_processor: DocumentProcessor, database: AsyncDatabase,
+                 retrieval: Optional[RetrievalEngine] = None,
+                 max_workers: int = 2, max_pending: int = 32, max_jobs: int = 1000):
+        self.document_processor = document_processor
+        self.database = database
+        self.retrieval = retrieval
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending = 0
+        self._tasks = set()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 작업 프로세스마다 시작할 때 한 번씩 추출 라이브러리와 임베더를 준비합니다
+            embedder_spec = self.retrieval.embedder.name if self.retrieval is not None else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_warm_up_worker,
+                initargs=(str(self.document_processor.base_dir), embedder_spec)
+            )
+        return self._executor
+
+    async def warm_up(self):
+        """작업 프로세스를 모두 띄우고 준비를 기다립니다.
+
+        fork 방식의 프로세스 풀은 첫 작업을 제출할 때 작업 프로세스를 모두 띄우고, 각 프로세스는 initializer로
+        준비를 마친 뒤에야 작업을 받습니다. 프로세스 수만큼 빈 작업을 보내 그 작업들이 끝날 때까지 기다립니다.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*[loop.run_in_executor(executor, os.getpid) for _ in range(self.max_workers)])
+
+    async def store_upload(self, upload, original_filename: str) -> Dict[str, Any]:
+        """업로드 스트림을 청크 단위로 디스크에 저장하면서 내용 해시를 계산합니다.
+
+        파일은 내용 해시 이름으로 저장되므로 같은 파일은 한 번만 보관됩니다. 같은 내용의 문서를 지우는 작업이
+        이 파일을 지우지 않도록 내용 해시의 공유 잠금을 잡아 "content_lock"으로 반환하며, 레코드를 삽입한 뒤 닫습니다.
+        """
+        file_extension = os.path.splitext(original_filename)[1].lower()
+        tmp_path = self.document_processor.papers_dir / f".upload-{uuid.uuid4()}.part"
+        content_hash, file_size = await self._write_upload(upload, tmp_path)
+        saved_filename = f"{content_hash}{file_extension}"
+        file_path = self.document_processor.papers_dir / saved_filename
+
+        loop = asyncio.get_running_loop()
+        try:
+            content_lock = await loop.run_in_executor(
+                None, self.document_processor.acquire_content_lock, content_hash, True
+            )
+        except Exception:
+            await aiofiles.os.remove(tmp_path)
+            raise
+        try:
+            await loop.run_in_executor(None, _place_file, tmp_path, file_path)
+        except Exception:
+            content_lock.close()
+            raise
+
+        return {
+            "original_filename": original_filename,
+            "saved_filename": saved_filename,
+            "file_path": file_path,
+            "file_type": file_extension[1:],
+            "file_size": file_size,
+            "content_hash": content_hash,
+            "content_lock": content_lock,
+        }
+
+    @staticmethod
+    async def _write_upload(upload, path: Path):
+        """업로드 스트림을 파일에 쓰고 (SHA-256 해시, 크기)를 반환합니다."""
+        sha256 = hashlib.sha256()
+        file_size = 0
+        try:
+            async with aiofiles.open(path, "wb") as buffer:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    file_size += len(chunk)
+                    await buffer.write(chunk)
+        except Exception:
+            await aiofiles.os.remove(path)
+            raise
+        return sha256.hexdigest(), file_size
+
+    async def submit(self, upload, original_filename: str) -> Dict[str, Any]:
+        """업로드를 저장하고 백그라운드 처리 작업을 등록합니다."""
+        if self._pending >= self.max_pending:
+            raise IngestionQueueFull("처리 대기 중인 문서가 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+        self._pending += 1
+        job = self._create_job(original_filename)
+        try:
+            with INGEST_STAGE_LATENCY.time(stage="store"):
+                stored = await self.store_upload(upload, original_filename)
+        except Exception as e:
+            self._pending -= 1
+            self._fail(job, e)
+            raise
+        self._mark(job, "stored")
+
+        task = asyncio.create_task(self._run(job, stored))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def submit_archive(self, upload, original_filename: str) -> Dict[str, Any]:
+        """zip/tar 압축 파일을 저장하고 안에 든 문서를 일괄 수집하는 작업을 등록합니다."""
+        # bulk_ingestion이 이 모듈을 가져오므로 순환 import를 피해 여기서 가져옵니다
+        from .bulk_ingestion import is_archive
+
+        if not is_archive(original_filename):
+            raise ValueError("zip 또는 tar 형식의 압축 파일만 업로드할 수 있습니다.")
+        if self._pending >= self.max_pending:
+            raise IngestionQueueFull("처리 대기 중인 문서가 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+        self._pending += 1
+        job = self._create_job(original_filename)
+        job["kind"] = "bulk"
+        job["stats"] = None
+        archive_path = self.document_processor.papers_dir / f".archive-{uuid.uuid4()}.part"
+        try:
+            await self._write_upload(upload, archive_path)
+        except Exception as e:
+            self._pending -= 1
+            self._fail(job, e)
+            raise
+        self._mark(job, "stored")
+
+        task = asyncio.create_task(self._run_archive(job, archive_path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    @property
+    def pending(self) -> int:
+        """저장 중이거나 처리를 기다리는 작업 수입니다."""
+        return self._pending
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태를 조회합니다."""
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: Dict[str, Any], stored: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        try:
+            job["status"] = "running"
+            content_hash = stored["content_hash"]
+
+            # 같은 내용이 이미 처리되어 있으면 추출을 건너뛰고 기존 산출물을 재사용합니다
+            existing = await self.database.find_by_content_hash(content_hash)
+            if existing and existing.get("processed_file") and Path(existing["processed_file"]).exists():
+                processed_data = {}
+                job["deduplicated"] = True
+                # 검색 엔진이 생기기 전에 수집됐거나 색인이 실패한 내용이면 지금 색인합니다
+                if self.retrieval is not None:
+                    with INGEST_STAGE_LATENCY.time(stage="index"):
+                        await loop.run_in_executor(
+                            None, self._index_existing, content_hash, existing["processed_file"]
+                        )
+                    processed_data = {"vector_id": content_hash}
+            else:
+                processed_data = await self._extract(content_hash, stored["file_path"])
+            self._mark(job, "extracted")
+
+            # 검색용 청크와 벡터 색인
+            if self.retrieval is not None and processed_data.get("chunks"):
+                with INGEST_STAGE_LATENCY.time(stage="index"):
+                    await loop.run_in_executor(
+                        None, self.retrieval.add_chunks,
+                        content_hash, processed_data["chunks"], processed_data["vectors"]
+                    )
+                processed_data = dict(processed_data, vector_id=content_hash)
+
+            document_data = build_document(stored, processed_data)
+            with INGEST_STAGE_LATENCY.time(stage="insert"):
+                doc_id = await self.database.insert_document(document_data)
+            job["doc_id"] = doc_id
+            self._mark(job, "indexed")
+            job["status"] = "completed"
+            logger.info("ingest.completed", job_id=job["job_id"], doc_id=doc_id, filename=job["filename"],
+                        deduplicated=job["deduplicated"])
+        except Exception as e:
+            logger.exception("ingest.failed", job_id=job["job_id"], filename=job["filename"], error=str(e))
+            self._fail(job, e)
+        finally:
+            stored["content_lock"].close()
+            self._pending -= 1
+            INGEST_JOBS.inc(status=job["status"])
+
+    def _index_existing(self, content_hash: str, processed_file: str):
+        """이미 처리된 텍스트의 청크 색인이 없으면 만들고 vector_id가 빈 기존 레코드에 연결합니다. (스레드에서 실행)"""
+        if not self.database.database.has_chunks(content_hash):
+            self.retrieval.index_document(content_hash, read_processed_text(processed_file))
+        self.database.database.set_vector_id(content_hash)
+
+    async def _run_archive(self, job: Dict[str, Any], archive_path: Path):
+        loop = asyncio.get_running_loop()
+        try:
+            job["status"] = "running"
+            job["stats"] = await loop.run_in_executor(None, self._ingest_archive, job, archive_path)
+            self._mark(job, "indexed")
+            job["status"] = "completed"
+            stats = job["stats"]
+            logger.info("ingest.bulk_completed", job_id=job["job_id"], filename=job["filename"],
+                        **{key: stats[key] for key in ("files", "completed", "failed", "skipped", "elapsed")})
+        except Exception as e:
+            logger.exception("ingest.bulk_failed", job_id=job["job_id"], filename=job["filename"], error=str(e))
+            self._fail(job, e)
+        finally:
+            self._pending -= 1
+            INGEST_JOBS.inc(status=job["status"])
+            await aiofiles.os.remove(archive_path)
+
+    def _ingest_archive(self, job: Dict[str, Any], archive_path: Path) -> Dict[str, Any]:
+        """압축을 풀고 수집 프로세스 풀에서 문서를 일괄 처리합니다. (스레드에서 실행)"""
+        from .bulk_ingestion import BulkIngestor, extract_archive, iter_source_files
+
+        with tempfile.TemporaryDirectory(dir=self.document_processor.base_dir / "data") as tmp:
+            extract_archive(archive_path, Path(tmp))
+            self._mark(job, "extracted")
+            ingestor = BulkIngestor(
+                self.document_processor, self.database.database, self.retrieval,
+                executor=self._get_executor(), max_workers=self.max_workers
+            )
+            return ingestor.ingest(iter_source_files(Path(tmp)), progress=lambda stats: job.update(stats=stats))
+
+    async def _extract(self, content_hash: str, file_path: Path) -> Dict[str, Any]:
+        """문서를 추출합니다. 같은 해시의 추출이 진행 중이면 그 결과를 함께 사용합니다."""
+        inflight = self._inflight.get(content_hash)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        loop = asyncio.get_running_loop()
+        worker_args = [str(self.document_processor.base_dir), str(file_path)]
+        if self.retrieval is not None:
+            chunker = self.retrieval.chunker
+            worker_args += [self.retrieval.embedder.name, chunker.chunk_size, chunker.overlap]
+        start = time.perf_counter()
+        future = loop.run_in_executor(self._get_executor(), _process_in_worker, *worker_args)
+        self._inflight[content_hash] = future
+        try:
+            processed_data = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(content_hash, None)
+
+        # 작업 프로세스에서 보낸 시간을 뺀 나머지는 프로세스 풀 대기와 결과 전달 비용입니다
+        worker_seconds = observe_worker_timings(processed_data)
+        INGEST_STAGE_LATENCY.observe(max(0.0, time.perf_counter() - start - worker_seconds), stage="queue")
+        return processed_data
+
+    def _create_job(self, original_filename: str) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            # 업로드 요청의 ID (이 작업의 로그에도 같은 ID가 붙습니다)
+            "request_id": get_request_id(),
+            "filename": original_filename,
+            "status": "queued",
+            "stages": {stage: None for stage in JOB_STAGES},
+            "doc_id": None,
+            "deduplicated": False,
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+        }
+        self.jobs[job_id] = job
+
+        # 오래된 완료 작업은 제거하여 메모리 사용량을 제한합니다
+        while len(self.jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest["status"] not in ("completed", "failed"):
+                break
+            del self.jobs[oldest_id]
+        return job
+
+    def _mark(self, job: Dict[str, Any], stage: str):
+        job["stages"][stage] = datetime.now().isoformat()
+
+    def _fail(self, job: Dict[str, Any], error: Exception):
+        job["status"] = "failed"
+        job["error"] = str(error)
+
+    def shutdown(self):
+        """프로세스 풀을 종료합니다."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
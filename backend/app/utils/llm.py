@@ -1,32 +1,100 @@
 import os
 import json
-import httpx
+import time
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, TYPE_CHECKING
+
+from .response_cache import ResponseCache, make_cache_key
+from .single_flight import SingleFlight
+from .metrics import REGISTRY
+from .log import get_logger
+
+if TYPE_CHECKING:
+    import httpx
 
 # .env 파일 로드
 load_dotenv()
 
+# 재시도할 응답 상태 코드
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 응답 생성 지연 시간과 업스트림 호출 결과
+LLM_LATENCY = REGISTRY.histogram("festa_llm_response_seconds", "LLM 응답 생성 전체 시간 (초, 캐시 적중 포함)", ["mode"])
+LLM_FIRST_TOKEN = REGISTRY.histogram("festa_llm_first_token_seconds", "스트리밍 응답의 첫 조각까지 걸린 시간 (초)")
+LLM_RETRIES = REGISTRY.counter("festa_llm_retries_total", "업스트림 호출 재시도 수")
+LLM_ERRORS = REGISTRY.counter("festa_llm_errors_total", "실패로 끝난 업스트림 호출 수")
+# 동시에 들어온 같은 질문을 묶은 결과 (합류 비율 = coalesced / (flights + coalesced))
+LLM_FLIGHTS = REGISTRY.counter("festa_llm_flights_total", "새로 시작한 응답 생성 수 (같은 질문이 진행 중이 아닐 때)", ["mode"])
+LLM_COALESCED = REGISTRY.counter("festa_llm_coalesced_total", "진행 중인 같은 질문의 응답 생성에 합류한 요청 수", ["mode"])
+
+logger = get_logger(__name__)
+
+def _httpx():
+    """httpx는 가져오는 데 시간이 걸리므로 처음 LLM을 호출할 때 가져옵니다."""
+    import httpx
+    return httpx
+
+class LLMClientClosed(RuntimeError):
+    """종료 중에 닫힌 LLM 클라이언트로 호출했을 때 발생합니다."""
+
 class DeepSeekAPI:
     def __init__(self):
         self.api_key = os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError("DEEPSEEK_API_KEY가 설정되지 않았습니다.")
-        print(f"DeepSeek API 초기화 완료 (API Key: {self.api_key[:8]}...)")
-        
-        self.base_url = "https://api.deepseek.com/v1/chat/completions"
+        # 로컬 스텁 서버 등으로 바꿀 수 있도록 API 주소를 환경 변수로 받습니다
+        api_base = os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1").rstrip("/")
+        logger.info("llm.initialized", api_base=api_base, api_key_set=True)
+        self.base_url = f"{api_base}/chat/completions"
+
+        # 업스트림 호출 제한과 재시도 설정
+        self.max_concurrency = int(os.getenv("FESTA_LLM_MAX_CONCURRENCY", "8"))
+        self.max_retries = int(os.getenv("FESTA_LLM_MAX_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("FESTA_LLM_BACKOFF_BASE", "0.5"))
+        self.backoff_max = float(os.getenv("FESTA_LLM_BACKOFF_MAX", "8.0"))
+        # 서버가 Retry-After로 요청한 대기 시간의 상한 (지수 백오프 상한과 별도)
+        self.retry_after_max = float(os.getenv("FESTA_LLM_RETRY_AFTER_MAX", "120.0"))
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0, "queued": 0}
+
+        # 연결을 재사용하는 공유 클라이언트와 동시 호출 제한 (이벤트 루프에서 처음 사용할 때 생성)
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+        # 같은 질문에 대한 응답 캐시 (설정하지 않으면 사용하지 않음)
+        self.cache: Optional[ResponseCache] = None
+        # 동시에 들어온 같은 질문(모델, 검색 문맥, 대화 기록 포함)은 업스트림 호출 하나를 함께 씁니다
+        self.flights: Optional[SingleFlight] = SingleFlight() if os.getenv("FESTA_LLM_COALESCE", "1") != "0" else None
+        # context_tokens: 시스템 프롬프트에 넣을 검색 문맥의 토큰 예산
         self.models = [
-            {"id": "deepseek-chat", "name": "DeepSeek Chat", "description": "기본 대화 모델"},
-            {"id": "deepseek-coder", "name": "DeepSeek Coder", "description": "코딩 특화 모델"}
+            {"id": "deepseek-chat", "name": "DeepSeek Chat", "description": "기본 대화 모델",
+             "context_window": 65536, "context_tokens": 6000},
+            {"id": "deepseek-coder", "name": "DeepSeek Coder", "description": "코딩 특화 모델",
+             "context_window": 65536, "context_tokens": 6000}
         ]
 
     def get_available_models(self) -> List[Dict[str, str]]:
         return self.models
 
-    async def generate_response(self, user_input: str, chat_history: Optional[List[Dict[str, str]]] = None, context_docs: Optional[List[str]] = None, model_id: str = "deepseek-chat") -> str:
-        print(f"API 요청 시작 - 모델: {model_id}")
-        print(f"사용자 입력: {user_input}")
-        
+    def get_context_budget(self, model_id: str) -> int:
+        """모델의 검색 문맥 토큰 예산을 반환합니다. 모르는 모델이면 기본 모델의 값을 씁니다."""
+        for model in self.models:
+            if model["id"] == model_id:
+                return model["context_tokens"]
+        return self.models[0]["context_tokens"]
+
+    @staticmethod
+    def _log_request(mode: str, model_id: str, user_input: str, messages: List[Dict[str, str]]):
+        """요청 전체를 직렬화하지 않고 메시지 수와 길이만 기록합니다."""
+        logger.info("llm.request", mode=mode, model=model_id, messages=len(messages),
+                    prompt_chars=sum(len(message["content"]) for message in messages), user_input=user_input)
+
+    def _build_messages(self, user_input: str, chat_history: Optional[List[Dict[str, str]]] = None, context_docs: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """시스템 프롬프트, 채팅 기록, 사용자 입력으로 메시지 목록을 구성합니다."""
         # 시스템 프롬프트 구성
         system_prompt = "당신은 논문과 연구에 대해 잘 알고 있는 AI 어시스턴트입니다. "
         if context_docs:
@@ -37,46 +105,280 @@ class DeepSeekAPI:
         # 메시지 구성
         messages = [{"role": "system", "content": system_prompt}]
         
-        # 채팅 기록 추가
+        # 채팅 기록 추가 (호출하는 쪽에서 토큰 예산에 맞춰 잘라서 전달)
         if chat_history:
-            for msg in chat_history[-10:]:  # 최근 10개 메시지만 사용
+            for msg in chat_history:
                 messages.append({
                     "role": msg["role"],
                     "content": msg["content"]
                 })
         
         messages.append({"role": "user", "content": user_input})
-        
-        print(f"전송할 메시지: {json.dumps(messages, ensure_ascii=False)}")
+        return messages
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._closed:
+            raise LLMClientClosed("LLM 클라이언트가 닫혔습니다.")
+        if self._client is None:
+            httpx = _httpx()
+            self._client = httpx.AsyncClient(
+                headers=self._headers(),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60.0
+                )
+            )
+        if self._limiter is None:
+            # asyncio.Semaphore는 대기 순서대로 깨우므로 공정한 대기열 역할을 합니다
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def warm_up(self):
+        """첫 질문이 기다리지 않도록 공유 HTTP 클라이언트를 미리 만듭니다. (이벤트 루프에서 호출)"""
+        self._get_client()
+
+    async def aclose(self):
+        """공유 HTTP 클라이언트를 닫습니다.
+
+        진행 중이거나 재시도를 기다리는 호출이 슬롯을 돌려줄 수 있도록 동시 호출 제한은 남겨 두고,
+        이후 시도는 LLMClientClosed로 끝냅니다.
+        """
+        self._closed = True
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """재시도 대기 시간을 계산합니다. Retry-After 헤더가 있으면 retry_after_max까지 따릅니다."""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.retry_after_max)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(delay, 0.0), self.retry_after_max)
+                except (TypeError, ValueError):
+                    pass
+        # full jitter 지수 백오프
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        """캐시된 응답을 조회합니다. 메모리에 없을 때만 스레드에서 디스크를 조회합니다."""
+        if key is None:
+            return None
+        cached = self.cache.get_memory(key)
+        if cached is None:
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None:
+            logger.info("llm.cache_hit", key=key[:12])
+        return cached
+
+    async def _cache_put(self, key: Optional[str], model_id: str, response: str, source_ids: Optional[List[str]]):
+        if key is None:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.cache.put, key, model_id, response, source_ids)
+
+    @asynccontextmanager
+    async def _request(self, payload: Dict[str, Any], timeout: "httpx.Timeout"):
+        """동시 호출 수를 제한하고 429/5xx와 연결 오류를 재시도하며 응답을 스트림으로 엽니다."""
+        client = self._get_client()
+        httpx = _httpx()
+        attempt = 0
+        while True:
+            self.stats["queued"] += 1
+            try:
+                await self._limiter.acquire()
+            finally:
+                # 슬롯을 기다리다 취소되어도 대기 수를 되돌립니다
+                self.stats["queued"] -= 1
+            self.stats["in_flight"] += 1
+            try:
+                # 슬롯이나 재시도를 기다리는 동안 클라이언트가 닫혔으면 닫힌 클라이언트로 보내지 않습니다
+                if self._closed:
+                    raise LLMClientClosed("LLM 클라이언트가 닫혔습니다.")
+                self.stats["requests"] += 1
+                request = client.build_request("POST", self.base_url, json=payload, timeout=timeout)
+                try:
+                    response = await client.send(request, stream=True)
+                except httpx.TransportError:
+                    if attempt >= self.max_retries:
+                        self.stats["errors"] += 1
+                        LLM_ERRORS.inc()
+                        raise
+                    delay = self._backoff_delay(attempt)
+                else:
+                    if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                        delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                        await response.aclose()
+                    else:
+                        if response.status_code != 200:
+                            self.stats["errors"] += 1
+                            LLM_ERRORS.inc()
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+            finally:
+                self.stats["in_flight"] -= 1
+                self._limiter.release()
+
+            # 대기하는 동안에는 호출 슬롯을 다른 요청에 양보합니다
+            attempt += 1
+            self.stats["retries"] += 1
+            LLM_RETRIES.inc()
+            logger.warning("llm.retry", attempt=attempt, max_retries=self.max_retries, delay=round(delay, 2))
+            await asyncio.sleep(delay)
+
+    async def _coalesce(self, mode: str, model_id: str, messages: List[Dict[str, str]],
+                        factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """같은 모드와 메시지로 진행 중인 응답 생성이 있으면 합류하고, 없으면 factory()로 새로 시작합니다."""
+        if self.flights is None:
+            async for chunk in factory():
+                yield chunk
+            return
+        key = f"{mode}:{make_cache_key(model_id, messages)}"
+
+        def count(leader: bool):
+            (LLM_FLIGHTS if leader else LLM_COALESCED).inc(mode=mode)
+
+        stream = self.flights.stream(key, factory, on_join=count)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # 이 요청이 중간에 빠져도 다른 요청이 기다리는 호출은 계속됩니다
+            await stream.aclose()
+
+    async def generate_response(self, user_input: str, chat_history: Optional[List[Dict[str, str]]] = None, context_docs: Optional[List[str]] = None, model_id: str = "deepseek-chat", source_ids: Optional[List[str]] = None) -> str:
+        messages = self._build_messages(user_input, chat_history, context_docs)
+
+        async def generate() -> AsyncIterator[str]:
+            yield await self._generate_response(user_input, messages, model_id, source_ids)
+
+        with LLM_LATENCY.time(mode="generate"):
+            return "".join([part async for part in self._coalesce("generate", model_id, messages, generate)])
+
+    async def _generate_response(self, user_input: str, messages: List[Dict[str, str]], model_id: str, source_ids: Optional[List[str]]) -> str:
+        self._log_request("generate", model_id, user_input, messages)
+
+        cache_key = make_cache_key(model_id, messages) if self.cache else None
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.base_url,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model_id,
-                        "messages": messages,
-                        "temperature": 0.7,
-                        "max_tokens": 2000
-                    },
-                    timeout=30.0
-                )
+            async with self._request(
+                {
+                    "model": model_id,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": 2000
+                },
+                timeout=_httpx().Timeout(30.0)
+            ) as response:
+                await response.aread()
                 
-                print(f"API 응답 상태 코드: {response.status_code}")
                 response_data = response.json()
-                print(f"API 응답 데이터: {json.dumps(response_data, ensure_ascii=False)}")
                 
                 if response.status_code == 200 and "choices" in response_data:
-                    return response_data["choices"][0]["message"]["content"]
+                    content = response_data["choices"][0]["message"]["content"]
+                    logger.info("llm.response", status=response.status_code, usage=response_data.get("usage"),
+                                answer=content)
+                    await self._cache_put(cache_key, model_id, content, source_ids)
+                    return content
                 else:
                     error_message = response_data.get("error", {}).get("message", "알 수 없는 오류가 발생했습니다.")
-                    print(f"API 오류: {error_message}")
+                    logger.error("llm.failed", status=response.status_code, error=error_message)
                     return f"죄송합니다. API 호출 중 오류가 발생했습니다: {error_message}"
                     
         except Exception as e:
-            print(f"API 호출 중 예외 발생: {str(e)}")
-            return f"죄송합니다. API 호출 중 오류가 발생했습니다: {str(e)}" 
\ No newline at end of file
+            logger.exception("llm.failed", error=str(e))
+            return f"죄송합니다. API 호출 중 오류가 발생했습니다: {str(e)}"
+
+    async def stream_response(self, user_input: str, chat_history: Optional[List[Dict[str, str]]] = None, context_docs: Optional[List[str]] = None, model_id: str = "deepseek-chat", source_ids: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """SSE 스트리밍으로 응답을 받아 생성되는 텍스트 조각을 순서대로 반환합니다."""
+        messages = self._build_messages(user_input, chat_history, context_docs)
+        start = time.perf_counter()
+        first = True
+        try:
+            async for delta in self._coalesce("stream", model_id, messages,
+                                              lambda: self._stream_response(user_input, messages, model_id, source_ids)):
+                if first:
+                    LLM_FIRST_TOKEN.observe(time.perf_counter() - start)
+                    first = False
+                yield delta
+        finally:
+            LLM_LATENCY.observe(time.perf_counter() - start, mode="stream")
+
+    async def _stream_response(self, user_input: str, messages: List[Dict[str, str]], model_id: str, source_ids: Optional[List[str]]) -> AsyncIterator[str]:
+        self._log_request("stream", model_id, user_input, messages)
+
+        cache_key = make_cache_key(model_id, messages) if self.cache else None
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            async with self._request(
+                {
+                    "model": model_id,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": 2000,
+                    "stream": True
+                },
+                # 전체 생성 시간이 아니라 토큰 사이의 대기 시간에 적용됩니다
+                timeout=_httpx().Timeout(30.0, read=60.0)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    try:
+                        error_message = json.loads(body).get("error", {}).get("message", "알 수 없는 오류가 발생했습니다.")
+                    except ValueError:
+                        error_message = "알 수 없는 오류가 발생했습니다."
+                    logger.error("llm.failed", status=response.status_code, error=error_message)
+                    yield f"죄송합니다. API 호출 중 오류가 발생했습니다: {error_message}"
+                    return
+
+                parts = []
+                async for delta in self._iter_sse_deltas(response):
+                    parts.append(delta)
+                    yield delta
+
+            # 끝까지 받은 응답만 캐시합니다
+            content = "".join(parts)
+            logger.info("llm.response", status=200, deltas=len(parts), answer=content)
+            await self._cache_put(cache_key, model_id, content, source_ids)
+                    
+        except Exception as e:
+            logger.exception("llm.failed", error=str(e))
+            yield f"죄송합니다. API 호출 중 오류가 발생했습니다: {str(e)}"
+
+    @staticmethod
+    async def _iter_sse_deltas(response: "httpx.Response") -> AsyncIterator[str]:
+        """SSE 이벤트에서 delta 텍스트를 추출합니다."""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            for choice in event.get("choices", []):
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    yield delta
@@ -0,0 +1,351 @@
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+
+from .metrics import REGISTRY
+
+# 큐가 가득 차 버려진 로그 수
+LOG_DROPPED = REGISTRY.counter("festa_log_dropped_total", "로그 큐가 가득 차 버려진 로그 수")
+
+# 현재 요청(업로드, 채팅 메시지)의 ID. 같은 요청에서 나온 로그를 하나로 묶는 데 씁니다
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("festa_request_id", default=None)
+
+# 클라이언트가 보낸 X-Request-ID는 이 형식일 때만 그대로 사용합니다
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def valid_request_id(value: Any) -> Optional[str]:
+    """클라이언트가 보낸 요청 ID가 허용된 문자와 길이(64자)에 맞으면 그대로, 아니면 None을 반환합니다."""
+    if isinstance(value, str) and _REQUEST_ID_PATTERN.fullmatch(value):
+        return value
+    return None
+
+
+def get_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def set_request_id(request_id: Optional[str] = None) -> str:
+    """현재 컨텍스트의 요청 ID를 설정합니다. 지정하지 않으면 새로 만듭니다."""
+    request_id = request_id or new_request_id()
+    request_id_var.set(request_id)
+    return request_id
+
+
+@contextmanager
+def bind_request_id(request_id: Optional[str] = None) -> Iterator[str]:
+    """with 블록 안에서만 요청 ID를 설정합니다."""
+    token = request_id_var.set(request_id or new_request_id())
+    try:
+        yield request_id_var.get()
+    finally:
+        request_id_var.reset(token)
+
+
+class _Large:
+    """긴 문자열/바이트. 호출한 쪽에서는 참조만 넘기고 자르기와 해시는 로그 스레드에서 합니다."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _compact(value: Any, max_chars: int, max_items: int, depth: int = 0) -> Any:
+    """로그 필드를 큐에 넣기 전에 크기를 제한합니다. 원본 크기에 비례하는 작업은 하지 않습니다."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else _Large(value)
+    if isinstance(value, (bytes, bytearray)):
+        return _Large(bytes(value))
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"<dict len={len(value)}>"
+        compacted = {str(key): _compact(item, max_chars, max_items, depth + 1)
+                     for key, item in islice(value.items(), max_items)}
+        if len(value) > max_items:
+            compacted["..."] = f"+{len(value) - max_items} keys"
+        return compacted
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if depth >= 2:
+            return f"<{type(value).__name__} len={len(value)}>"
+        compacted = [_compact(item, max_chars, max_items, depth + 1) for item in islice(value, max_items)]
+        if len(value) > max_items:
+            compacted.append(f"... +{len(value) - max_items} items")
+        return compacted
+    return _compact(str(value), max_chars, max_items, depth)
+
+
+def _expand(value: Any, max_chars: int) -> Any:
+    """로그 스레드에서 긴 값을 앞부분, 길이, SHA-256 해시로 바꿉니다."""
+    if isinstance(value, _Large):
+        data = value.value
+        raw = data if isinstance(data, bytes) else data.encode("utf-8", "surrogatepass")
+        expanded = {"length": len(data), "sha256": hashlib.sha256(raw).hexdigest()[:16]}
+        if isinstance(data, str):
+            expanded["head"] = data[:max_chars]
+        return expanded
+    if isinstance(value, dict):
+        return {key: _expand(item, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item, max_chars) for item in value]
+    return value
+
+
+class Sampler:
+    """이벤트 이름별 비율로 로그를 표본 추출합니다.
+
+    요청 ID가 있으면 ID의 해시로 결정하므로 같은 요청의 로그는 함께 남거나 함께 빠집니다.
+    비율은 이벤트 이름의 가장 긴 접두사(점 단위)에 지정된 값을 씁니다.
+    """
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    @classmethod
+    def from_spec(cls, default_rate: float, spec: str) -> "Sampler":
+        """'chat=0.1,llm.request=0.01' 형식의 설정을 읽습니다."""
+        rates = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            event, _, rate = item.partition("=")
+            rates[event.strip()] = float(rate)
+        return cls(default_rate, rates)
+
+    def rate(self, event: str) -> float:
+        name = event
+        while True:
+            if name in self.rates:
+                return self.rates[name]
+            if "." not in name:
+                return self.default_rate
+            name = name.rsplit(".", 1)[0]
+
+    def keep(self, event: str, request_id: Optional[str] = None) -> bool:
+        rate = self.rate(event)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        if request_id:
+            digest = hashlib.blake2b(request_id.encode(), digest_size=4).digest()
+            return int.from_bytes(digest, "big") / 2 ** 32 < rate
+        return random.random() < rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """로그 레코드를 JSON 한 줄(json) 또는 key=value 형식(text)으로 만듭니다."""
+
+    def __init__(self, output_format: str = "json", max_chars: int = 256):
+        super().__init__()
+        self.output_format = output_format
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(_expand(getattr(record, "fields", None) or {}, self.max_chars))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        if self.output_format == "json":
+            return json.dumps(entry, ensure_ascii=False, default=str)
+        head = f"{entry.pop('ts')} {entry.pop('level'):<7} {entry.pop('logger')} {entry.pop('event')}"
+        exc = entry.pop("exc", None)
+        pairs = " ".join(f"{key}={self._format_value(value)}" for key, value in entry.items())
+        line = f"{head} {pairs}" if pairs else head
+        return f"{line}\n{exc}" if exc else line
+
+    @staticmethod
+    def _format_value(value: Any) -> str:
+        if isinstance(value, str) and value and not any(char.isspace() or char == '"' for char in value):
+            return value
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 로그를 버립니다. 포맷은 로그 스레드에서 합니다."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class _LogState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid: Optional[int] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.sampler = Sampler()
+        self.max_chars = 256
+        self.max_items = 20
+
+
+_state = _LogState()
+
+
+def configure_logging(level: Optional[str] = None, output_format: Optional[str] = None,
+                      sample_rate: Optional[float] = None, sample_rates: Optional[str] = None,
+                      max_chars: Optional[int] = None, queue_size: Optional[int] = None,
+                      stream=None):
+    """'festa' 로거에 큐 기반 핸들러를 설치합니다. 지정하지 않은 값은 환경 변수에서 읽습니다.
+
+    호출한 쪽은 레코드를 큐에 넣기만 하고, 포맷과 출력은 별도 스레드가 맡습니다.
+    """
+    with _state.lock:
+        _configure(level, output_format, sample_rate, sample_rates, max_chars, queue_size, stream)
+
+
+def _ensure_configured():
+    """이 프로세스에서 아직 설정하지 않았으면 환경 변수 값으로 설정합니다."""
+    with _state.lock:
+        if _state.pid != os.getpid():
+            _configure()
+
+
+def _configure(level=None, output_format=None, sample_rate=None, sample_rates=None,
+               max_chars=None, queue_size=None, stream=None):
+    _shutdown_listener()
+    _state.max_chars = max_chars or int(os.getenv("FESTA_LOG_MAX_FIELD_CHARS", "256"))
+    _state.sampler = Sampler.from_spec(
+        sample_rate if sample_rate is not None else float(os.getenv("FESTA_LOG_SAMPLE_RATE", "1.0")),
+        sample_rates if sample_rates is not None else os.getenv("FESTA_LOG_SAMPLE_RATES", "")
+    )
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(StructuredFormatter(
+        output_format or os.getenv("FESTA_LOG_FORMAT", "json"), _state.max_chars
+    ))
+    log_queue = queue.Queue(maxsize=queue_size or int(os.getenv("FESTA_LOG_QUEUE_SIZE", "10000")))
+
+    root = logging.getLogger("festa")
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+    root.setLevel((level or os.getenv("FESTA_LOG_LEVEL", "INFO")).upper())
+    root.propagate = False
+
+    _state.listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _state.listener.start()
+    _state.pid = os.getpid()
+
+
+def _shutdown_listener():
+    listener, _state.listener = _state.listener, None
+    # 포크된 프로세스에는 로그 스레드가 없으므로 부모 프로세스에서만 멈춥니다
+    if listener is not None and _state.pid == os.getpid():
+        try:
+            listener.stop()
+        except queue.Full:
+            pass
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 출력하고 로그 스레드를 멈춥니다."""
+    with _state.lock:
+        _shutdown_listener()
+        _state.pid = None
+
+
+atexit.register(shutdown_logging)
+
+
+class StructuredLogger:
+    """이벤트 이름과 필드로 로그를 남깁니다.
+
+    긴 문자열은 잘라 길이와 해시만 남기고, WARNING 미만은 FESTA_LOG_SAMPLE_RATE(S) 비율로 표본 추출합니다.
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"festa.{name}")
+
+    def _log(self, level: int, event: str, exc_info=None, **fields):
+        if _state.pid != os.getpid():
+            _ensure_configured()
+        if not self._logger.isEnabledFor(level):
+            return
+        request_id = request_id_var.get()
+        if level < logging.WARNING and not _state.sampler.keep(event, request_id):
+            return
+        self._logger.log(level, event, exc_info=exc_info, extra={
+            "request_id": request_id,
+            "fields": {key: _compact(value, _state.max_chars, _state.max_items) for key, value in fields.items()},
+        })
+
+    def debug(self, event: str, **fields):
+        self._log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self._log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self._log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, exc_info=None, **fields):
+        self._log(logging.ERROR, event, exc_info=exc_info, **fields)
+
+    def exception(self, event: str, **fields):
+        """처리 중인 예외의 트레이스백과 함께 ERROR 로그를 남깁니다."""
+        self._log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name.rsplit(".", 1)[-1])
+
+
+class RequestIdMiddleware:
+    """HTTP/WebSocket 요청마다 요청 ID를 설정하고 HTTP 응답에 X-Request-ID 헤더로 돌려줍니다.
+
+    클라이언트가 보낸 X-Request-ID가 올바른 형식이면 그대로 이어서 씁니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = valid_request_id(incoming) or new_request_id()
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        with bind_request_id(request_id):
+            await self.app(scope, receive, send_with_request_id)
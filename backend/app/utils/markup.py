@@ -0,0 +1,250 @@
+"""HTML과 Markdown 문서를 문서 트리 없이 스트리밍으로 본문 텍스트로 바꿉니다.
+
+파일을 블록(또는 줄) 단위로 읽으면서 태그 이벤트만 처리하므로 메모리 사용량은 출력 텍스트 크기를
+넘지 않습니다. 스크립트, 스타일, 내비게이션 같은 본문이 아닌 부분은 버리고, 절 제목은 청크 분할에서
+경계로 쓸 수 있도록 Markdown처럼 '#' 줄로 남깁니다.
+"""
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+# 한 번에 파서에 넣을 HTML 크기 (문자 수)
+HTML_BLOCK_CHARS = 64 * 1024
+
+# 내용 전체를 버리는 요소
+SKIP_TAGS = frozenset({
+    'head', 'script', 'style', 'noscript', 'template', 'svg', 'canvas',
+    'nav', 'footer', 'iframe', 'object', 'button', 'select', 'textarea'
+})
+HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+# 앞뒤에 빈 줄을 두는 블록 요소
+PARAGRAPH_TAGS = frozenset({
+    'p', 'div', 'section', 'article', 'main', 'header', 'aside', 'blockquote', 'figure', 'figcaption',
+    'table', 'ul', 'ol', 'dl', 'hr', 'address', 'details', 'summary', 'body'
+})
+# 줄을 바꾸는 요소
+LINE_TAGS = frozenset({'br', 'li', 'tr', 'dt', 'dd', 'caption'})
+# 같은 줄에서 공백으로 구분하는 표 칸
+CELL_TAGS = frozenset({'td', 'th'})
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Markdown 블록 패턴
+MD_FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+MD_HEADING_PATTERN = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+MD_SETEXT_PATTERN = re.compile(r'^ {0,3}(=+|-+)\s*$')
+MD_RULE_PATTERN = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+MD_REFERENCE_PATTERN = re.compile(r'^ {0,3}\[[^\]]+\]:\s+\S')
+MD_TABLE_RULE_PATTERN = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)+\|?\s*$')
+MD_BLOCK_MARKER_PATTERN = re.compile(r'^\s*(?:>\s?)+|^\s*(?:[-*+]|\d+[.)])\s+')
+# Markdown 인라인 문법 (앞에서부터 차례로 적용)
+MD_INLINE_PATTERNS = (
+    (re.compile(r'(`+)(.+?)\1'), r'\2'),
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]+)\](?:\([^)]*\)|\[[^\]]*\])'), r'\1'),
+    (re.compile(r'<(https?://[^>\s]+)>'), r'\1'),
+    (re.compile(r'<!--.*?-->|</?[A-Za-z][^>]*>'), ''),
+    (re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1'), r'\2'),
+    (re.compile(r'\*(?=\S)(.+?)(?<=\S)\*'), r'\1'),
+    (re.compile(r'\\([\\`*_{}\[\]()#+\-.!|])'), r'\1'),
+)
+
+
+class HTMLTextExtractor(HTMLParser):
+    """태그 이벤트를 받아 본문 텍스트만 모으는 파서입니다. 문서 트리를 만들지 않습니다.
+
+    feed()로 HTML 조각을 넣고 close()한 뒤 text()로 결과를 얻습니다.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._inline: List[str] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._heading = 0
+        self._pre = 0
+        self._blank = True
+
+    def text(self) -> str:
+        """지금까지 모은 본문 텍스트를 반환합니다."""
+        self._flush()
+        return "".join(self.parts).rstrip("\n") + "\n" if self.parts else ""
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, closed=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, closed=True)
+        self.handle_endtag(tag)
+
+    def _start(self, tag, attrs, closed: bool):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            elif tag == 'body':
+                # 닫는 태그를 생략한 <head> 등에서 본문을 잃지 않도록 합니다
+                self._skip_tag = None
+            return
+
+        if tag == 'math':
+            # MathML 대신 LaTeX 원문(alttext)을 남깁니다. 없으면 안쪽 텍스트를 그대로 씁니다
+            alttext = dict(attrs).get('alttext')
+            if alttext:
+                delimiter = '$$' if dict(attrs).get('display') == 'block' else '$'
+                self._inline.append(f" {delimiter}{alttext}{delimiter} ")
+                self._begin_skip(tag, closed)
+            return
+        if tag in SKIP_TAGS:
+            self._begin_skip(tag, closed)
+        elif tag in HEADING_TAGS:
+            self._paragraph()
+            self._heading = int(tag[1])
+        elif tag in PARAGRAPH_TAGS:
+            self._paragraph()
+        elif tag in LINE_TAGS:
+            self._flush()
+        elif tag in CELL_TAGS:
+            self._inline.append(' ')
+        elif tag == 'pre':
+            self._paragraph()
+            self._pre += 1
+
+    def _begin_skip(self, tag: str, closed: bool):
+        if not closed:
+            self._skip_tag = tag
+            self._skip_depth = 1
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            elif tag in ('body', 'html'):
+                self._skip_tag = None
+            return
+
+        if tag in HEADING_TAGS:
+            self._paragraph()
+            self._heading = 0
+        elif tag in PARAGRAPH_TAGS:
+            self._paragraph()
+        elif tag in LINE_TAGS:
+            self._flush()
+        elif tag == 'pre' and self._pre:
+            self._paragraph()
+            self._pre -= 1
+
+    def handle_data(self, data):
+        if self._skip_tag is None:
+            self._inline.append(data)
+
+    def _flush(self):
+        """모아 둔 인라인 텍스트를 한 줄로 내보냅니다."""
+        if not self._inline:
+            return
+        text = "".join(self._inline)
+        self._inline = []
+        if self._pre:
+            text = text.strip("\n")
+        else:
+            text = WHITESPACE_PATTERN.sub(' ', text).strip()
+        if not text.strip():
+            return
+        if self._heading:
+            text = "#" * self._heading + " " + text
+        self.parts.append(text + "\n")
+        self._blank = False
+
+    def _paragraph(self):
+        """현재 줄을 내보내고 빈 줄로 문단을 구분합니다."""
+        self._flush()
+        if not self._blank:
+            self.parts.append("\n")
+            self._blank = True
+
+
+def html_file_to_text(file_path: Path, block_chars: int = HTML_BLOCK_CHARS) -> str:
+    """HTML 파일을 블록 단위로 읽어 본문 텍스트를 반환합니다."""
+    extractor = HTMLTextExtractor()
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        for block in iter(lambda: file.read(block_chars), ''):
+            extractor.feed(block)
+    extractor.close()
+    return extractor.text()
+
+
+def _markdown_inline(line: str) -> str:
+    for pattern, replacement in MD_INLINE_PATTERNS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+def _markdown_heading(level: int, text: str) -> List[str]:
+    return ["", "#" * level + " " + _markdown_inline(text).strip(), ""]
+
+
+def markdown_lines_to_text(lines: Iterable[str]) -> Iterator[str]:
+    """Markdown 줄을 받아 문법 기호를 걷어낸 본문 줄을 차례로 내보냅니다.
+
+    제목은 '#' 줄로, 코드 블록은 내용 그대로 남기고 front matter, 구분선, 참조 링크 정의는 버립니다.
+    빈 줄은 연달아 내보내지 않습니다.
+    """
+    fence = None
+    pending = None  # 다음 줄이 setext 제목 밑줄인지 봐야 하는 문단 줄
+    front_matter = False
+    blank = True
+    for number, line in enumerate(lines):
+        line = line.rstrip('\r\n')
+        if number == 0 and line.strip() == '---':
+            front_matter = True
+            continue
+        if front_matter:
+            front_matter = line.strip() not in ('---', '...')
+            continue
+
+        output: List[str] = []
+        if fence is not None:
+            if line.strip().startswith(fence):
+                fence = None
+            else:
+                output.append(line)
+        elif pending is not None and pending.strip() and MD_SETEXT_PATTERN.match(line):
+            output.extend(_markdown_heading(1 if line.strip().startswith('=') else 2, pending))
+            pending = None
+        else:
+            if pending is not None:
+                output.append(pending)
+                pending = None
+            fence_match = MD_FENCE_PATTERN.match(line)
+            heading = MD_HEADING_PATTERN.match(line)
+            if fence_match:
+                fence = fence_match.group(1)
+            elif heading:
+                output.extend(_markdown_heading(len(heading.group(1)), heading.group(2)))
+            elif MD_RULE_PATTERN.match(line) or MD_REFERENCE_PATTERN.match(line):
+                output.append("")
+            elif MD_TABLE_RULE_PATTERN.match(line):
+                pass
+            elif line.lstrip().startswith('|'):
+                output.append(_markdown_inline(" ".join(cell.strip() for cell in line.strip().strip('|').split('|'))))
+            elif MD_BLOCK_MARKER_PATTERN.match(line):
+                output.append(_markdown_inline(MD_BLOCK_MARKER_PATTERN.sub('', line, count=1)))
+            else:
+                pending = _markdown_inline(line)
+
+        for out in output:
+            if out.strip() or not blank:
+                yield out
+            blank = not out.strip()
+    if pending is not None:
+        yield pending
+
+
+def markdown_file_to_text(file_path: Path) -> str:
+    """Markdown 파일을 줄 단위로 읽어 본문 텍스트를 반환합니다."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        text = "\n".join(markdown_lines_to_text(file))
+    return text.strip("\n") + "\n" if text.strip() else ""
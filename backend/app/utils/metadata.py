@@ -0,0 +1,512 @@
+"""문서의 서지 메타데이터(제목, 저자, 초록, 키워드, DOI, arXiv ID 등)를 추출합니다.
+
+LLM을 호출하지 않고 PDF 문서 정보, HTML citation 메타 태그, LaTeX 명령, Markdown front matter와
+본문 앞부분의 정규식만 사용하므로 수집 작업 프로세스에서 바로 실행할 수 있습니다.
+
+메타데이터 없이 저장된 기존 문서를 채우려면 (backend 디렉토리에서):
+    python -m app.utils.metadata
+"""
+import argparse
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .text_store import ProcessedText
+
+# 식별자와 초록을 찾을 본문 앞부분 길이 (대략 첫 몇 쪽)
+HEAD_CHARS = 20000
+
+# 메타 태그를 찾을 HTML 앞부분 크기
+HTML_HEAD_BYTES = 256 * 1024
+
+# \title, \author, abstract 환경을 찾을 LaTeX 앞부분 길이 (프리앰블과 초록이 들어가는 정도)
+LATEX_HEAD_CHARS = 256 * 1024
+
+# 필드별 최대 길이
+MAX_TITLE_CHARS = 300
+MAX_ABSTRACT_CHARS = 5000
+MAX_KEYWORDS = 20
+
+# 추출하는 메타데이터 필드
+METADATA_FIELDS = ('title', 'authors', 'abstract', 'keywords', 'publication_date', 'journal', 'doi', 'arxiv_id')
+
+# 식별자 패턴은 소문자로 바꾼 텍스트에 적용합니다.
+# 대소문자 무시 플래그나 앞쪽 \b가 없어야 정규식 엔진이 고정 접두어로 빠르게 건너뛸 수 있습니다
+DOI_PATTERN = re.compile(r'(10\.\d{4,9}/[^\s"<>{}]+)')
+# doi: 또는 doi.org/ 뒤에 오는 DOI는 논문 자신의 DOI일 가능성이 높으므로 먼저 찾습니다
+LABELED_DOI_PATTERN = re.compile(r'doi(?:\s*[:=]?\s*|\.org/)(10\.\d{4,9}/[^\s"<>{}]+)')
+ARXIV_PATTERN = re.compile(r'arxiv(?:\s*:\s*|\.org/(?:abs|pdf)/)(\d{4}\.\d{4,5}|[a-z][a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?')
+BARE_ARXIV_PATTERN = re.compile(r'^\s*(\d{4}\.\d{4,5}|[a-z][a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?\s*$')
+
+# 줄 맨 앞의 표제어 뒤에 오는 초록과 키워드 (표제어 위치를 먼저 찾은 뒤 그 자리에서 적용합니다)
+ABSTRACT_LABELS = ('abstract', '초록', '요약')
+ABSTRACT_PATTERN = re.compile(
+    r'(?:abstract|초록|요약)\b[ \t]*[:.\-—–]?\s*(.+?)'
+    r'(?=\n\s*\n|\n[ \t]*(?:\d+\.?|I\.)?[ \t]*(?:introduction|keywords|key words|index terms|서론)\b|\Z)',
+    re.IGNORECASE | re.DOTALL
+)
+KEYWORD_LABELS = ('keywords', 'key words', 'index terms', '주제어', '키워드')
+KEYWORDS_PATTERN = re.compile(
+    r'(?:keywords|key words|index terms|주제어|키워드)\b[ \t]*[:.\-—–]?[ \t]*([^\n]+)',
+    re.IGNORECASE
+)
+
+# 본문 첫 줄 가운데 제목이 아니라 학회/저널 머리글인 줄
+HEADER_LINE_PATTERN = re.compile(
+    r'\b(conference|proceedings|journal|preprint|workshop|published|accepted|submitted|vol\.|volume|pp\.)\b',
+    re.IGNORECASE
+)
+# PDF 문서 정보에 흔히 들어가는 의미 없는 제목
+JUNK_TITLE_PATTERN = re.compile(r'^(untitled|microsoft word\b|document\d*$)|\.(docx?|pdf|tex|dvi|ps)$', re.IGNORECASE)
+
+
+def _clean(value: Any, limit: int = MAX_TITLE_CHARS) -> Optional[str]:
+    if value is None:
+        return None
+    value = re.sub(r'\s+', ' ', str(value)).strip()
+    return value[:limit] if value else None
+
+
+def _clean_title(value: Any) -> Optional[str]:
+    title = _clean(value)
+    if not title or len(title) < 4 or JUNK_TITLE_PATTERN.search(title) or not re.search(r'[^\W\d_]', title):
+        return None
+    return title
+
+
+def _split_list(value: Any, separators: str = r'[;,·•]') -> Optional[List[str]]:
+    """쉼표 등으로 구분된 문자열이나 리스트를 정리된 리스트로 만듭니다. 비어 있으면 None을 반환합니다."""
+    if value is None:
+        return None
+    parts = value if isinstance(value, list) else re.split(separators, str(value))
+    items = []
+    for part in parts:
+        item = _clean(part, 200)
+        if item and item not in items:
+            items.append(item)
+    return items[:MAX_KEYWORDS] or None
+
+
+def _split_authors(value: Any) -> Optional[List[str]]:
+    if isinstance(value, list):
+        return _split_list(value)
+    if value is None:
+        return None
+    value = str(value)
+    # "A; B" 형식이 아니면 "A, B and C" 형식으로 봅니다
+    separators = r';' if ';' in value else r',|\band\b|&'
+    return _split_list(value, separators)
+
+
+def normalize_doi(value: Optional[str]) -> Optional[str]:
+    """DOI를 찾아 소문자로 정규화합니다. DOI는 대소문자를 구분하지 않습니다."""
+    if not value:
+        return None
+    match = DOI_PATTERN.search(value.lower())
+    if not match:
+        return None
+    return match.group(1).rstrip('.,;:)]}\'"')
+
+
+def normalize_arxiv_id(value: Optional[str]) -> Optional[str]:
+    """arXiv ID를 버전 없이 반환합니다."""
+    if not value:
+        return None
+    value = value.lower()
+    match = ARXIV_PATTERN.search(value) or BARE_ARXIV_PATTERN.match(value)
+    return match.group(1) if match else None
+
+
+def parse_identifier(query: str) -> Optional[Dict[str, str]]:
+    """검색어 전체가 DOI나 arXiv ID이면 {'doi': ...} 또는 {'arxiv_id': ...}를 반환합니다."""
+    query = query.strip()
+    if not query or ' ' in query:
+        return None
+    doi = normalize_doi(query)
+    if doi and query.lower().endswith(doi):
+        return {'doi': doi}
+    arxiv_id = normalize_arxiv_id(query)
+    if arxiv_id:
+        return {'arxiv_id': arxiv_id}
+    return None
+
+
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    """날짜를 YYYY-MM-DD, YYYY-MM 또는 YYYY 형식으로 바꿉니다."""
+    if not value:
+        return None
+    value = str(value)
+    match = re.search(r'\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b', value)
+    if match:
+        return f"{match.group(1)}-{int(match.group(2)):02d}-{int(match.group(3)):02d}"
+    match = re.search(r'\b(\d{4})[-/](\d{1,2})\b', value)
+    if match:
+        return f"{match.group(1)}-{int(match.group(2)):02d}"
+    match = re.search(r'\b(1[89]\d{2}|20\d{2})\b', value)
+    return match.group(1) if match else None
+
+
+def find_identifiers(text: str) -> Dict[str, str]:
+    """본문 앞부분에서 DOI와 arXiv ID를 찾습니다."""
+    head = text[:HEAD_CHARS].lower()
+    found = {}
+    match = LABELED_DOI_PATTERN.search(head) or DOI_PATTERN.search(head)
+    if match:
+        found['doi'] = normalize_doi(match.group(1))
+    match = ARXIV_PATTERN.search(head)
+    if match:
+        found['arxiv_id'] = match.group(1)
+    return found
+
+
+def _find_line_label(lower: str, labels) -> Optional[int]:
+    """줄 맨 앞(공백과 제목 표시 '#' 제외)에 처음 나오는 표제어의 위치를 찾습니다."""
+    best = None
+    for label in labels:
+        position = lower.find(label)
+        while position >= 0 and (best is None or position < best):
+            line_start = lower.rfind('\n', 0, position) + 1
+            if not lower[line_start:position].strip(' \t#'):
+                best = position
+                break
+            position = lower.find(label, position + 1)
+    return best
+
+
+def _text_metadata(text: str) -> Dict[str, Any]:
+    """추출된 본문 앞부분에서 초록과 키워드를 찾습니다."""
+    head = text[:HEAD_CHARS]
+    lower = head.lower()
+    # 소문자로 바꾸며 길이가 달라지는 드문 문자가 있으면 위치를 그대로 쓸 수 없으므로 원문에서 찾습니다
+    if len(lower) != len(head):
+        lower = head
+    metadata = {}
+    position = _find_line_label(lower, ABSTRACT_LABELS)
+    match = ABSTRACT_PATTERN.match(head, position, position + 2 * MAX_ABSTRACT_CHARS) if position is not None else None
+    if match:
+        metadata['abstract'] = _clean(match.group(1), MAX_ABSTRACT_CHARS)
+    position = _find_line_label(lower, KEYWORD_LABELS)
+    match = KEYWORDS_PATTERN.match(head, position) if position is not None else None
+    if match:
+        metadata['keywords'] = _split_list(match.group(1))
+    return metadata
+
+
+def _first_line_title(text: str) -> Optional[str]:
+    """본문 첫 줄 가운데 제목으로 보이는 줄을 반환합니다."""
+    for line in text[:2000].splitlines()[:10]:
+        line = line.strip()
+        if len(line) < 10 or len(line.split()) < 2:
+            continue
+        lower = line.lower()
+        if ARXIV_PATTERN.search(lower) or DOI_PATTERN.search(lower) or HEADER_LINE_PATTERN.search(line) \
+                or '://' in line or '@' in line:
+            continue
+        return _clean_title(line)
+    return None
+
+
+def _pdf_metadata(file_path: Path) -> Dict[str, Any]:
+    """PDF 문서 정보 사전(/Title, /Author, /Keywords)을 읽습니다."""
+    import PyPDF2
+
+    try:
+        with open(file_path, 'rb') as file:
+            info = PyPDF2.PdfReader(file).metadata
+    except Exception:
+        return {}
+    if not info:
+        return {}
+    return {
+        'title': _clean_title(info.get('/Title')),
+        'authors': _split_authors(info.get('/Author')),
+        'keywords': _split_list(info.get('/Keywords')),
+    }
+
+
+class _MetaTagParser(HTMLParser):
+    """<head>의 <meta> 태그와 <title>을 모읍니다. <body>를 만나면 멈춥니다."""
+
+    class Done(Exception):
+        pass
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, List[str]] = {}
+        self.title_parts: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            raise self.Done()
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('name') or attrs.get('property') or '').lower()
+            if name and attrs.get('content'):
+                self.meta.setdefault(name, []).append(attrs['content'])
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            raise self.Done()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+
+def _html_metadata(file_path: Path) -> Dict[str, Any]:
+    """Highwire(citation_*), Dublin Core, Open Graph 메타 태그를 읽습니다."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        head = file.read(HTML_HEAD_BYTES)
+    parser = _MetaTagParser()
+    try:
+        parser.feed(head)
+    except _MetaTagParser.Done:
+        pass
+    meta = parser.meta
+
+    def first(*names):
+        for name in names:
+            if meta.get(name):
+                return meta[name][0]
+        return None
+
+    authors = meta.get('citation_author') or meta.get('dc.creator')
+    return {
+        'title': _clean_title(first('citation_title', 'dc.title', 'og:title') or ''.join(parser.title_parts)),
+        'authors': _split_list(authors) if authors else _split_authors(first('author')),
+        'abstract': _clean(first('citation_abstract', 'dc.description', 'description', 'og:description'),
+                           MAX_ABSTRACT_CHARS),
+        'keywords': _split_list(meta.get('citation_keyword') or first('citation_keywords', 'keywords')),
+        'publication_date': _normalize_date(first('citation_publication_date', 'citation_date',
+                                                  'citation_online_date', 'dc.date', 'article:published_time')),
+        'journal': _clean(first('citation_journal_title', 'citation_conference_title', 'prism.publicationname')),
+        'doi': normalize_doi(first('citation_doi', 'prism.doi', 'dc.identifier')),
+        'arxiv_id': normalize_arxiv_id(first('citation_arxiv_id')),
+    }
+
+
+def _latex_argument(source: str, command: str, start: int = 0) -> Optional[tuple]:
+    r"""\command[옵션]{인자}의 인자와 명령의 시작, 끝 위치를 반환합니다. 중첩된 중괄호를 처리합니다."""
+    match = re.compile(r'\\' + command + r'\*?\s*(?:\[[^\]]*\]\s*)?\{').search(source, start)
+    if not match:
+        return None
+    depth, position = 1, match.end()
+    while position < len(source) and depth:
+        char = source[position]
+        if char == '\\':
+            position += 2
+            continue
+        depth += {'{': 1, '}': -1}.get(char, 0)
+        position += 1
+    return source[match.end():position - 1], match.start(), position
+
+
+def _strip_latex_comments(source: str) -> str:
+    r"""% 주석을 지웁니다. \%는 남기고, 줄바꿈 명령 뒤의 주석(\\%)은 지웁니다."""
+    # 정규식 뒤보기보다 %를 str.find로 찾는 편이 빠르고, 반복문이라 \%가 많은 줄에서도 재귀 한도에 걸리지 않습니다
+    parts, position, search = [], 0, 0
+    while True:
+        start = source.find('%', search)
+        if start == -1:
+            break
+        # 바로 앞 역슬래시가 홀수 개면 이스케이프된 %입니다
+        backslashes = 0
+        while start - backslashes > position and source[start - backslashes - 1] == '\\':
+            backslashes += 1
+        if backslashes % 2:
+            search = start + 1
+            continue
+        end = source.find('\n', start)
+        end = len(source) if end == -1 else end
+        parts.append(source[position:start])
+        position = search = end
+    parts.append(source[position:])
+    return ''.join(parts)
+
+
+def _latex_to_text(value: str) -> str:
+    """LaTeX 조각에서 명령을 지우고 텍스트만 남깁니다."""
+    # 인자까지 지울 명령 (\citep, \eqref 같은 변형 포함)
+    for command in ('thanks', 'footnote', 'label', r'cite[a-zA-Z]*', r'[a-zA-Z]*ref'):
+        found = _latex_argument(value, command)
+        while found:
+            _, start, end = found
+            value = value[:start] + ' ' + value[end:]
+            found = _latex_argument(value, command, start)
+    value = value.replace('\\\\', ' ').replace('~', ' ')
+    value = re.sub(r'\\[a-zA-Z]+\*?(?:\[[^\]]*\])?', ' ', value)
+    value = value.replace('{', '').replace('}', '').replace('$', '')
+    value = re.sub(r'\s+([.,;:])', r'\1', value)
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def _latex_metadata(file_path: Path) -> Dict[str, Any]:
+    r"""\title, \author, abstract 환경, \keywords, \doi를 읽습니다."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        source = file.read(LATEX_HEAD_CHARS)
+    source = _strip_latex_comments(source)
+
+    metadata: Dict[str, Any] = {}
+    found = _latex_argument(source, 'title')
+    if found:
+        metadata['title'] = _clean_title(_latex_to_text(found[0]))
+
+    # \author는 여러 번 나올 수 있고(authblk), 한 번에 \and로 여러 명을 적을 수도 있습니다
+    authors, position = [], 0
+    while True:
+        found = _latex_argument(source, 'author', position)
+        if not found:
+            break
+        argument, _, position = found
+        for block in re.split(r'\\and\b', argument):
+            # 소속과 이메일은 보통 \\ 다음 줄에 옵니다
+            name = _latex_to_text(re.split(r'\\\\|\\thanks|\\footnote', block)[0])
+            authors.extend(_split_authors(name) or [])
+    metadata['authors'] = _split_list(authors)
+
+    match = re.search(r'\\begin\{abstract\}(.*?)\\end\{abstract\}', source, re.DOTALL)
+    if match:
+        metadata['abstract'] = _clean(_latex_to_text(match.group(1)), MAX_ABSTRACT_CHARS)
+    found = _latex_argument(source, 'keywords')
+    match = re.search(r'\\begin\{keywords\}(.*?)\\end\{keywords\}', source, re.DOTALL)
+    keywords = found[0] if found else match.group(1) if match else None
+    if keywords:
+        metadata['keywords'] = _split_list(_latex_to_text(keywords.replace('\\sep', ',')))
+    found = _latex_argument(source, 'date')
+    if found:
+        metadata['publication_date'] = _normalize_date(found[0])
+    found = _latex_argument(source, 'journal')
+    if found:
+        metadata['journal'] = _clean(_latex_to_text(found[0]))
+    found = _latex_argument(source, 'doi')
+    if found:
+        metadata['doi'] = normalize_doi(found[0])
+    return metadata
+
+
+def _markdown_metadata(file_path: Path) -> Dict[str, Any]:
+    """YAML front matter의 간단한 key: value 항목과 첫 번째 # 제목을 읽습니다."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        head = file.read(HEAD_CHARS)
+
+    fields: Dict[str, Any] = {}
+    lines = head.splitlines()
+    if lines and lines[0].strip() == '---':
+        key = None
+        for line in lines[1:]:
+            if line.strip() in ('---', '...'):
+                break
+            item = re.match(r'^\s+-\s+(.*)$', line)
+            if item and key:
+                if not isinstance(fields.get(key), list):
+                    fields[key] = []
+                fields[key].append(item.group(1).strip('\'" '))
+                continue
+            pair = re.match(r'^([A-Za-z_]+)\s*:\s*(.*)$', line)
+            if pair:
+                key, value = pair.group(1).lower(), pair.group(2).strip()
+                if value.startswith('[') and value.endswith(']'):
+                    value = [part.strip('\'" ') for part in value[1:-1].split(',')]
+                elif value:
+                    value = value.strip('\'"')
+                fields[key] = value or None
+
+    title = fields.get('title')
+    if not title:
+        heading = re.search(r'^#\s+(.+)$', head, re.MULTILINE)
+        title = heading.group(1) if heading else None
+    authors = fields.get('authors') or fields.get('author')
+    return {
+        'title': _clean_title(title),
+        'authors': _split_list(authors) if isinstance(authors, list) else _split_authors(authors),
+        'abstract': _clean(fields.get('abstract') or fields.get('description'), MAX_ABSTRACT_CHARS),
+        'keywords': _split_list(fields.get('keywords') or fields.get('tags')),
+        'publication_date': _normalize_date(fields.get('date')),
+        'journal': _clean(fields.get('journal') or fields.get('venue')),
+        'doi': normalize_doi(fields.get('doi')),
+        'arxiv_id': normalize_arxiv_id(fields.get('arxiv') or fields.get('eprint')),
+    }
+
+
+# 파일 형식별 구조화된 메타데이터 추출기
+_EXTRACTORS = {
+    '.pdf': _pdf_metadata,
+    '.html': _html_metadata,
+    '.tex': _latex_metadata,
+    '.md': _markdown_metadata,
+}
+
+
+def extract_metadata(file_path: Path, text: str) -> Dict[str, Any]:
+    """파일 형식별 메타데이터를 읽고 빈 필드는 추출된 본문 앞부분에서 찾아 채웁니다.
+
+    찾지 못한 필드는 결과에 넣지 않습니다.
+    """
+    file_path = Path(file_path)
+    extractor = _EXTRACTORS.get(file_path.suffix.lower())
+    metadata = {}
+    if extractor is not None:
+        try:
+            metadata = {field: value for field, value in extractor(file_path).items() if value}
+        except (OSError, ValueError):
+            metadata = {}
+
+    for field, value in {**find_identifiers(text), **_text_metadata(text)}.items():
+        if value and not metadata.get(field):
+            metadata[field] = value
+    if not metadata.get('title') and file_path.suffix.lower() in ('.pdf', '.txt'):
+        title = _first_line_title(text)
+        if title:
+            metadata['title'] = title
+    return metadata
+
+
+def _read_text_head(processed_file: Optional[str]) -> str:
+    """처리된 텍스트에서 메타데이터를 찾는 앞부분(HEAD_CHARS)만 읽습니다."""
+    if not processed_file:
+        return ""
+    try:
+        with ProcessedText(processed_file) as processed:
+            return processed.read(0, HEAD_CHARS)
+    except (OSError, ValueError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path,
+                        default=Path(__file__).resolve().parents[2] / "data" / "db" / "documents.db")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    # database가 이 모듈을 가져오므로 순환 import를 피해 여기서 가져옵니다
+    from .database import Database
+
+    database = Database(str(args.db))
+    scanned = updated = 0
+    after = 0
+    try:
+        while True:
+            documents = database.get_documents_without_metadata(after, args.batch_size)
+            if not documents:
+                break
+            for document in documents:
+                after = document["rowid"]
+                text = _read_text_head(document["processed_file"])
+                metadata = extract_metadata(Path(document["file_path"]), text)
+                scanned += 1
+                if metadata and database.update_document(document["id"], metadata):
+                    updated += 1
+        print(f"메타데이터 갱신: {updated}/{scanned}개 문서")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
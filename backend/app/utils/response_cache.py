@@ -0,0 +1,238 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+# 키 정규화에 사용하는 공백 패턴
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 디스크 항목 수는 직접 세어 두고, 다른 프로세스가 바꾼 수를 반영하도록 이 간격(초)마다 다시 셉니다
+DISK_RECOUNT_INTERVAL = 60.0
+
+
+def normalize_text(text: str) -> str:
+    """유니코드 정규화 후 연속된 공백을 하나로 줄입니다."""
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def make_cache_key(model_id: str, messages: List[Dict[str, Any]]) -> str:
+    """모델과 메시지(시스템 프롬프트, 검색 문맥, 대화 기록, 질문)로 캐시 키를 만듭니다."""
+    normalized = [
+        [message["role"], normalize_text(message["content"]) if isinstance(message["content"], str)
+         else json.dumps(message["content"], ensure_ascii=False, sort_keys=True)]
+        for message in messages
+    ]
+    payload = json.dumps([model_id, normalized], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """LLM 응답을 메모리 LRU와 SQLite 두 단계로 캐시합니다.
+
+    응답마다 참조한 문서 ID를 함께 기록하여 문서가 삭제되면 관련 응답을 무효화합니다.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 86400.0, max_memory_entries: int = 512,
+                 max_memory_bytes: int = 16 * 1024 * 1024, max_disk_entries: int = 10000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (만료 시각, 응답, 참조 문서 ID)
+        self._memory: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._memory_bytes = 0
+        # 메모리 LRU는 이벤트 루프에서도 조회하므로 SQLite 작업을 감싸는 잠금(_lock)과 따로 잠급니다.
+        # 두 잠금이 모두 필요하면 항상 _lock을 먼저 잡습니다
+        self._memory_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0,
+            "evictions": 0, "expirations": 0, "invalidations": 0
+        }
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_db()
+        self._disk_entries = 0
+        self._counted_at = 0.0
+        with self._lock:
+            self._recount_disk(time.time())
+
+    def _init_db(self):
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache_docs (
+                    key TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    PRIMARY KEY (key, doc_id)
+                ) WITHOUT ROWID
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_docs_doc ON response_cache_docs(doc_id)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache(last_access)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache(expires_at)')
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """메모리 캐시만 조회합니다. (이벤트 루프에서 바로 호출 가능, SQLite 잠금을 기다리지 않음)"""
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, response, _ = entry
+            if expires_at < time.time():
+                self._drop_memory(key)
+                self.counters["expirations"] += 1
+                return None
+            self._memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return response
+
+    def get(self, key: str) -> Optional[str]:
+        """메모리, SQLite 순서로 캐시를 조회합니다. 디스크 조회가 있으므로 스레드에서 호출합니다."""
+        response = self.get_memory(key)
+        if response is not None:
+            return response
+
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT response, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            response, expires_at = row
+            if expires_at < now:
+                self._delete_disk([key])
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._conn.execute('UPDATE response_cache SET last_access = ? WHERE key = ?', (now, key))
+            doc_ids = tuple(doc_id for (doc_id,) in self._conn.execute(
+                'SELECT doc_id FROM response_cache_docs WHERE key = ?', (key,)
+            ))
+            self.counters["disk_hits"] += 1
+            with self._memory_lock:
+                self._put_memory(key, expires_at, response, doc_ids)
+        return response
+
+    def put(self, key: str, model_id: str, response: str, doc_ids: Optional[List[str]] = None):
+        """응답을 두 단계 캐시에 저장합니다."""
+        now = time.time()
+        expires_at = now + self.ttl
+        doc_ids = tuple(sorted(set(doc_ids or [])))
+        with self._lock, self._conn:
+            with self._memory_lock:
+                self._put_memory(key, expires_at, response, doc_ids)
+            cursor = self._conn.execute('''
+                UPDATE response_cache SET model = ?, response = ?, created_at = ?, expires_at = ?, last_access = ?
+                WHERE key = ?
+            ''', (model_id, response, now, expires_at, now, key))
+            if cursor.rowcount == 0:
+                self._conn.execute('''
+                    INSERT INTO response_cache (key, model, response, created_at, expires_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (key, model_id, response, now, expires_at, now))
+                self._disk_entries += 1
+            self._conn.execute('DELETE FROM response_cache_docs WHERE key = ?', (key,))
+            self._conn.executemany(
+                'INSERT INTO response_cache_docs (key, doc_id) VALUES (?, ?)',
+                [(key, doc_id) for doc_id in doc_ids]
+            )
+            self.counters["puts"] += 1
+            self._evict_disk(now)
+
+    def invalidate_document(self, doc_id: str) -> int:
+        """문서를 참조한 캐시 응답을 모두 제거하고 제거한 수를 반환합니다."""
+        with self._lock, self._conn:
+            keys = {key for (key,) in self._conn.execute(
+                'SELECT key FROM response_cache_docs WHERE doc_id = ?', (doc_id,)
+            )}
+            with self._memory_lock:
+                keys.update(key for key, (_, _, doc_ids) in self._memory.items() if doc_id in doc_ids)
+                for key in keys:
+                    self._drop_memory(key)
+            self._delete_disk(list(keys))
+            self.counters["invalidations"] += len(keys)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패 카운터와 캐시 크기를 반환합니다."""
+        with self._lock, self._memory_lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return dict(
+                self.counters,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_bytes,
+                disk_entries=self._disk_entries,
+                hit_rate=hits / lookups if lookups else 0.0
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _put_memory(self, key: str, expires_at: float, response: str, doc_ids: Tuple[str, ...]):
+        # _memory_lock을 잡은 상태에서 호출합니다
+        self._drop_memory(key)
+        self._memory[key] = (expires_at, response, doc_ids)
+        self._memory_bytes += len(response)
+        # 항목 수와 크기 한도를 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다
+        while self._memory and (len(self._memory) > self.max_memory_entries
+                                or self._memory_bytes > self.max_memory_bytes):
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self.counters["evictions"] += 1
+
+    def _drop_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[1])
+
+    def _delete_disk(self, keys: List[str]):
+        if not keys:
+            return
+        cursor = self._conn.executemany('DELETE FROM response_cache WHERE key = ?', [(key,) for key in keys])
+        self._disk_entries = max(0, self._disk_entries - cursor.rowcount)
+        self._conn.executemany('DELETE FROM response_cache_docs WHERE key = ?', [(key,) for key in keys])
+
+    def _evict_disk(self, now: float):
+        expired = [key for (key,) in self._conn.execute(
+            'SELECT key FROM response_cache WHERE expires_at < ?', (now,)
+        )]
+        self._delete_disk(expired)
+        self.counters["expirations"] += len(expired)
+
+        if now - self._counted_at > DISK_RECOUNT_INTERVAL:
+            self._recount_disk(now)
+        if self._disk_entries > self.max_disk_entries:
+            overflow = [key for (key,) in self._conn.execute(
+                'SELECT key FROM response_cache ORDER BY last_access LIMIT ?',
+                (self._disk_entries - self.max_disk_entries,)
+            )]
+            self._delete_disk(overflow)
+            self.counters["evictions"] += len(overflow)
+
+    def _recount_disk(self, now: float):
+        self._disk_entries = self._conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+        self._counted_at = now
@@ -0,0 +1,467 @@
+"""문서를 청크로 나누어 임베딩하고 질문과 가까운 청크를 찾는 검색 엔진입니다.
+
+청크 색인 없이 저장된 기존 문서(vector_id가 빈 레코드)를 색인하려면 (backend 디렉토리에서):
+    python -m app.utils.retrieval
+"""
+import argparse
+import fcntl
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .database import Database
+from .text_store import read_processed_text
+
+# 토큰 추출 패턴 (한글/영문/숫자)
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# 삭제된 행이 이 비율 이상이면 정리 작업이 벡터 파일을 다시 씁니다
+COMPACT_MIN_DELETED_RATIO = 0.25
+
+
+class Chunker:
+    """텍스트를 겹치는 구간(청크)으로 나눕니다."""
+
+    def __init__(self, chunk_size: int = 800, overlap: int = 100):
+        if overlap >= chunk_size:
+            raise ValueError("overlap은 chunk_size보다 작아야 합니다.")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        """청크 목록을 반환합니다. 각 청크는 원문에서의 시작/끝 위치를 가집니다."""
+        chunks = []
+        length = len(text)
+        start = 0
+        while start < length:
+            end = min(start + self.chunk_size, length)
+            if end < length:
+                # 가능하면 절 제목('#' 줄) 앞, 문단, 문장, 공백 경계에서 자릅니다
+                window_start = start + self.chunk_size // 2
+                for separator, keep in (("\n\n#", 2), ("\n\n", 2), (". ", 2), ("\n", 1), (" ", 1)):
+                    cut = text.rfind(separator, window_start, end)
+                    if cut != -1:
+                        end = cut + keep
+                        break
+
+            chunk_text = text[start:end].strip()
+            if chunk_text:
+                chunks.append({
+                    "ordinal": len(chunks),
+                    "start": start,
+                    "end": end,
+                    "text": chunk_text
+                })
+
+            if end >= length:
+                break
+            start = max(end - self.overlap, start + 1)
+        return chunks
+
+
+@lru_cache(maxsize=200000)
+def _hash_bucket(token: str, dim: int) -> Tuple[int, float]:
+    """토큰의 (차원 번호, 부호)를 반환합니다. 프로세스가 달라도 같은 결과가 나오도록 crc32를 사용합니다."""
+    h = zlib.crc32(token.encode('utf-8'))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+
+class HashingEmbedder:
+    """외부 모델 없이 동작하는 특성 해싱(feature hashing) 임베더입니다."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vector = vectors[row]
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                index, sign = _hash_bucket(token, self.dim)
+                vector[index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 모델을 사용하는 임베더입니다."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=64, normalize_embeddings=True),
+            dtype=np.float32
+        )
+
+
+def create_embedder(spec: Optional[str] = None):
+    """설정 문자열로 임베더를 생성합니다. 예: "hashing:384", "sentence-transformers:all-MiniLM-L6-v2"."""
+    spec = spec or os.getenv("FESTA_EMBEDDER", "hashing:384")
+    kind, _, arg = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(int(arg) if arg else 384)
+    if kind == "sentence-transformers":
+        return SentenceTransformerEmbedder(arg or "all-MiniLM-L6-v2")
+    raise ValueError(f"지원하지 않는 임베더입니다: {spec}")
+
+
+class VectorIndex:
+    """파일에 이어 쓰고 메모리 매핑으로 읽는 float32 벡터 인덱스입니다.
+
+    벡터는 행 번호로 식별되며, 삭제된 행은 별도의 표시 파일로 관리합니다.
+    여러 작업 프로세스(서버 작업 프로세스, 일괄 수집, 정리 작업)가 같은 파일에 쓰므로 행 번호 할당과
+    이어 쓰기는 잠금 파일의 flock으로 직렬화합니다. 삭제된 행을 빼고 파일을 다시 쓰면(압축) 행 번호가 바뀌므로,
+    검색은 파일을 교체하는 동안 기다리도록 별도의 잠금 파일에 공유 잠금을 잡습니다.
+    """
+
+    def __init__(self, index_dir: str, dim: int, block_rows: int = 65536):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.block_rows = block_rows
+        self.vectors_path = self.index_dir / f"vectors_{dim}.f32"
+        self.deleted_path = self.index_dir / f"deleted_{dim}.u8"
+        self.lock_path = self.index_dir / f"index_{dim}.lock"
+        self.swap_lock_path = self.index_dir / f"swap_{dim}.lock"
+        self._lock = threading.Lock()
+        # 같은 스레드가 다시 잠글 수 있도록 (색인 추가 중 add 호출 등) 잠근 횟수를 셉니다
+        self._file_lock = threading.RLock()
+        self._file_lock_depth = 0
+        self._lock_file = None
+        self._matrix: Optional[np.memmap] = None
+        self._deleted: Optional[np.memmap] = None
+        self._mapped_file: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        if not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (self.dim * 4)
+
+    @contextmanager
+    def locked(self):
+        """다른 프로세스와 스레드를 배제하고 인덱스 파일을 잠급니다. 같은 스레드에서는 겹쳐 잠글 수 있습니다."""
+        with self._file_lock:
+            if self._file_lock_depth == 0:
+                self._lock_file = open(self.lock_path, 'ab')
+                try:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                except BaseException:
+                    self._lock_file.close()
+                    raise
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                if self._file_lock_depth == 0:
+                    # 파일을 닫으면 flock도 풀립니다
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    @contextmanager
+    def reading(self):
+        """검색하는 동안 다른 프로세스가 압축한 파일로 교체하지 않도록 공유 잠금을 잡습니다."""
+        with open(self.swap_lock_path, 'ab') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            yield
+
+    @contextmanager
+    def swapping(self):
+        """압축한 파일로 교체하는 동안 검색을 막습니다."""
+        with open(self.swap_lock_path, 'ab') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _views(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """현재 벡터 행렬과 삭제 표시의 메모리 매핑을 반환합니다."""
+        with self._lock:
+            try:
+                stat = self.vectors_path.stat()
+            except FileNotFoundError:
+                return None, None
+            rows = stat.st_size // (self.dim * 4)
+            if rows == 0:
+                return None, None
+            # 다른 프로세스가 압축해 파일을 교체했으면 inode가 바뀝니다
+            if self._matrix is None or self._mapped_file != (stat.st_ino, rows):
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+                self._deleted = np.memmap(self.deleted_path, dtype=np.uint8, mode='r+', shape=(rows,))
+                self._mapped_file = (stat.st_ino, rows)
+            return self._matrix, self._deleted
+
+    def add(self, vectors: np.ndarray) -> List[int]:
+        """벡터를 추가하고 부여된 행 번호를 반환합니다."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"벡터 차원이 맞지 않습니다: {vectors.shape}")
+        with self.locked():
+            first = len(self)
+            with open(self.vectors_path, 'ab') as file:
+                file.write(vectors.tobytes())
+            with open(self.deleted_path, 'ab') as file:
+                file.write(bytes(len(vectors)))
+        return list(range(first, first + len(vectors)))
+
+    def remove(self, rows: List[int]):
+        """행을 삭제된 것으로 표시합니다."""
+        with self.locked():
+            _, deleted = self._views()
+            if deleted is None or not rows:
+                return
+            deleted[np.asarray(rows, dtype=np.int64)] = 1
+            deleted.flush()
+
+    def write_compacted(self, rows: List[int],
+                        throttle: Optional[Callable[[int], None]] = None) -> Tuple[Path, Path]:
+        """rows의 벡터만 순서대로 임시 파일에 옮겨 쓰고 (벡터, 삭제 표시) 임시 경로를 반환합니다.
+
+        locked() 안에서 호출합니다. throttle을 지정하면 블록을 쓸 때마다 쓴 바이트 수로 호출합니다.
+        """
+        matrix, _ = self._views()
+        vectors_tmp = self.vectors_path.with_name(f".{self.vectors_path.name}.compact")
+        deleted_tmp = self.deleted_path.with_name(f".{self.deleted_path.name}.compact")
+        selected = np.asarray(rows, dtype=np.int64)
+        with open(vectors_tmp, 'wb') as file:
+            for start in range(0, len(selected), self.block_rows):
+                block = np.ascontiguousarray(matrix[selected[start:start + self.block_rows]])
+                file.write(block.tobytes())
+                if throttle is not None:
+                    throttle(block.nbytes * 2)
+            file.flush()
+            os.fsync(file.fileno())
+        with open(deleted_tmp, 'wb') as file:
+            file.write(bytes(len(selected)))
+        return vectors_tmp, deleted_tmp
+
+    def install_compacted(self, vectors_tmp: Path, deleted_tmp: Path):
+        """write_compacted로 쓴 파일로 교체합니다. locked()와 swapping() 안에서 호출합니다."""
+        with self._lock:
+            os.replace(deleted_tmp, self.deleted_path)
+            os.replace(vectors_tmp, self.vectors_path)
+            self._matrix = self._deleted = None
+            self._mapped_file = None
+
+    def unreferenced_rows(self, live_rows: List[int]) -> List[int]:
+        """삭제 표시가 없지만 live_rows에도 없는 행 번호를 반환합니다."""
+        _, deleted = self._views()
+        if deleted is None:
+            return []
+        orphan = deleted == 0
+        live = np.asarray(live_rows, dtype=np.int64)
+        orphan[live[live < len(orphan)]] = False
+        return np.flatnonzero(orphan).tolist()
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """질의 벡터마다 내적이 가장 큰 k개의 (행 번호, 점수)를 반환합니다."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        matrix, deleted = self._views()
+        if matrix is None or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+        # 행렬을 블록 단위로 읽어 메모리 사용량을 제한합니다
+        for start in range(0, matrix.shape[0], self.block_rows):
+            block = matrix[start:start + self.block_rows]
+            scores = queries @ block.T
+            removed = deleted[start:start + len(block)].astype(bool)
+            if removed.any():
+                scores[:, removed] = -np.inf
+
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        order = np.argsort(-best_scores, axis=1)
+        for query_index in range(len(queries)):
+            hits = []
+            for position in order[query_index]:
+                score = float(best_scores[query_index, position])
+                if score == -np.inf:
+                    break
+                hits.append((int(best_rows[query_index, position]), score))
+            results.append(hits)
+        return results
+
+
+class RetrievalEngine:
+    """청크 분할, 임베딩, 벡터 검색을 묶어 질문에 맞는 문서 구간을 찾습니다."""
+
+    def __init__(self, index_dir: str, database: Database, embedder=None, chunker: Optional[Chunker] = None):
+        self.database = database
+        self.embedder = embedder or create_embedder()
+        self.chunker = chunker or Chunker()
+        self.index = VectorIndex(index_dir, self.embedder.dim)
+
+    def prepare(self, text: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """텍스트를 청크로 나누고 임베딩합니다. (작업 프로세스에서 실행 가능)"""
+        return prepare_chunks(text, self.chunker, self.embedder)
+
+    def add_chunks(self, vector_id: str, chunks: List[Dict[str, Any]], vectors: np.ndarray) -> int:
+        """청크와 벡터를 인덱스에 추가합니다. 이미 색인된 vector_id면 건너뜁니다.
+
+        다른 프로세스가 같은 문서를 동시에 색인하거나 고아 행을 정리하지 않도록 청크 저장까지 인덱스를 잠급니다.
+        """
+        with self.index.locked():
+            if not chunks or self.database.has_chunks(vector_id):
+                return 0
+            rows = self.index.add(vectors)
+            self.database.insert_chunks(vector_id, [
+                dict(chunk, vector_row=row) for chunk, row in zip(chunks, rows)
+            ])
+        return len(rows)
+
+    def locked(self):
+        """인덱스를 잠급니다. 청크를 지우고 그 벡터 행을 삭제 표시하는 사이에 압축으로 행 번호가 바뀌지 않도록 합니다."""
+        return self.index.locked()
+
+    def remove_vectors(self, rows: List[int]):
+        """삭제된 문서의 벡터 행을 검색에서 제외합니다."""
+        self.index.remove(rows)
+
+    def remove_orphan_vectors(self) -> int:
+        """청크가 없는 벡터 행(청크 저장 전에 중단된 색인 등)에 삭제 표시를 하고 그 수를 반환합니다."""
+        # 다른 프로세스가 색인을 추가하고 청크를 저장하는 사이의 행을 고아로 보지 않도록 인덱스를 잠급니다
+        with self.index.locked():
+            rows = self.index.unreferenced_rows(self.database.get_vector_rows())
+            self.index.remove(rows)
+        return len(rows)
+
+    def compact_vectors(self, min_deleted_ratio: float = COMPACT_MIN_DELETED_RATIO,
+                        throttle: Optional[Callable[[int], None]] = None) -> int:
+        """삭제된 행이 min_deleted_ratio 이상이면 청크가 있는 행만 새 파일로 옮기고 청크의 vector_row를 바꿉니다.
+
+        줄어든 행 수를 반환합니다. 파일을 다시 쓰는 동안 색인 추가는 기다리지만 검색은 교체하는 순간에만 기다립니다.
+        """
+        with self.index.locked():
+            total = len(self.index)
+            live = sorted(row for row in self.database.get_vector_rows() if row < total)
+            if total == 0 or total - len(live) < total * min_deleted_ratio:
+                return 0
+            vectors_tmp, deleted_tmp = self.index.write_compacted(live, throttle)
+            try:
+                with self.index.swapping():
+                    # 행 번호를 바꾼 뒤 파일을 교체합니다. 그 사이 검색은 swapping 잠금에서 기다립니다
+                    self.database.remap_vector_rows(live)
+                    self.index.install_compacted(vectors_tmp, deleted_tmp)
+            finally:
+                for path in (vectors_tmp, deleted_tmp):
+                    path.unlink(missing_ok=True)
+        return total - len(live)
+
+    def index_document(self, vector_id: str, text: str) -> int:
+        """문서 텍스트를 청크로 나누어 색인합니다."""
+        chunks, vectors = self.prepare(text)
+        return self.add_chunks(vector_id, chunks, vectors)
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """질문과 가장 관련 있는 청크를 반환합니다."""
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """여러 질문을 한 번에 검색합니다."""
+        if not queries:
+            return []
+        vectors = self.embedder.embed(queries)
+        # 행 번호로 청크를 찾을 때까지 압축으로 행 번호가 바뀌지 않도록 잠급니다
+        with self.index.reading():
+            # 삭제된 문서의 청크가 걸러질 수 있으므로 여유 있게 가져옵니다
+            hits = self.index.search(vectors, k * 2)
+            rows = sorted({row for query_hits in hits for row, _ in query_hits})
+            chunks = self.database.get_chunks(rows)
+
+        results = []
+        for query_hits in hits:
+            matched = []
+            for row, score in query_hits:
+                chunk = chunks.get(row)
+                if chunk is None:
+                    continue
+                matched.append(dict(chunk, score=score))
+                if len(matched) == k:
+                    break
+            results.append(matched)
+        return results
+
+
+def prepare_chunks(text: str, chunker: Chunker, embedder, batch_size: int = 256) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """텍스트를 청크로 나누고 배치 단위로 임베딩합니다."""
+    chunks = chunker.chunk(text)
+    if not chunks:
+        return [], np.empty((0, embedder.dim), dtype=np.float32)
+    vectors = np.concatenate([
+        embedder.embed([chunk["text"] for chunk in chunks[i:i + batch_size]])
+        for i in range(0, len(chunks), batch_size)
+    ])
+    return chunks, vectors
+
+
+def format_context(chunk: Dict[str, Any]) -> str:
+    """검색된 청크를 시스템 프롬프트용 문자열로 변환합니다."""
+    source = chunk.get("title") or chunk.get("original_filename") or chunk.get("doc_id")
+    return f"[{source}]\n{chunk['text']}"
+
+
+def backfill_vectors(retrieval: RetrievalEngine, batch_size: int = 500) -> Dict[str, int]:
+    """vector_id가 빈 문서의 처리된 텍스트를 색인하고 같은 내용의 레코드에 vector_id를 채웁니다."""
+    database = retrieval.database
+    stats = {"scanned": 0, "indexed": 0, "updated": 0, "failed": 0}
+    after = 0
+    while True:
+        documents = database.get_documents_without_vectors(after, batch_size)
+        if not documents:
+            break
+        for document in documents:
+            after = document["rowid"]
+            stats["scanned"] += 1
+            content_hash = document["content_hash"]
+            try:
+                if not database.has_chunks(content_hash):
+                    if retrieval.index_document(content_hash, read_processed_text(document["processed_file"])):
+                        stats["indexed"] += 1
+                stats["updated"] += database.set_vector_id(content_hash)
+            except (OSError, ValueError):
+                stats["failed"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-dir", type=Path, default=Path(__file__).resolve().parents[2],
+                        help="데이터 디렉토리(data/)가 있는 backend 경로")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    database = Database(str(args.base_dir / "data" / "db" / "documents.db"))
+    try:
+        stats = backfill_vectors(RetrievalEngine(str(args.base_dir / "data" / "index"), database), args.batch_size)
+        print(f"청크 색인: {stats['indexed']}개 내용, vector_id 갱신: {stats['updated']}/{stats['scanned']}개 문서, "
+              f"실패: {stats['failed']}개")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import secrets
+import time
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from .block_parser import blocks_to_text
+from .shared_state import MemoryStateBackend
+from .tokens import count_tokens
+
+
+class ChatSession:
+    """한 재연결 토큰에 해당하는 대화 기록입니다."""
+
+    __slots__ = ("token", "messages", "sizes", "size", "last_access")
+
+    def __init__(self, token: str, messages: Optional[List[Dict[str, Any]]] = None):
+        self.token = token
+        self.messages: List[Dict[str, Any]] = []
+        self.sizes: List[int] = []
+        self.size = 0
+        self.last_access = time.time()
+        for message in messages or []:
+            self.append(message)
+
+    def append(self, message: Dict[str, Any]):
+        size = len(json.dumps(message, ensure_ascii=False))
+        self.messages.append(message)
+        self.sizes.append(size)
+        self.size += size
+
+    def trim(self, max_messages: int):
+        """오래된 메시지부터 잘라 최대 개수를 맞춥니다."""
+        overflow = len(self.messages) - max_messages
+        if overflow > 0:
+            self.size -= sum(self.sizes[:overflow])
+            del self.messages[:overflow]
+            del self.sizes[:overflow]
+
+
+class SessionStore:
+    """채팅 세션을 LRU 순서로 메모리에 두며 유휴 시간과 메모리 한도에 따라 내보냅니다.
+
+    메시지는 추가할 때마다 상태 백엔드(shared_state)에도 기록하므로, 메모리에서 내보낸 세션이나
+    다른 작업 프로세스에서 만든 세션도 재연결 시 백엔드에서 되살립니다.
+    백엔드 호출은 디스크나 네트워크를 기다리므로 모두 await합니다 (백엔드가 이벤트 루프를 막지 않게 처리).
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600.0,
+                 max_bytes: int = 64 * 1024 * 1024, max_messages: int = 200, backend=None):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.backend = backend if backend is not None else MemoryStateBackend()
+
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._bytes = 0
+        # 같은 세션을 동시에 되살리거나 기록할 때 순서가 섞이지 않도록 세션마다 잠급니다 (쓰지 않으면 사라짐)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.counters = {"created": 0, "evicted": 0, "expired": 0, "restored": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> str:
+        """새 세션을 만들고 재연결 토큰을 반환합니다."""
+        token = secrets.token_urlsafe(32)
+        self._sessions[token] = ChatSession(token)
+        self.counters["created"] += 1
+        self._enforce_limits()
+        return token
+
+    async def get_history(self, token: str) -> Optional[List[Dict[str, Any]]]:
+        """재연결한 세션의 대화 기록을 반환합니다.
+
+        다른 작업 프로세스가 그 사이 기록을 이어 썼을 수 있으므로 공유 백엔드에서 다시 읽습니다.
+        """
+        session = await self._get(token, refresh=self.backend.shared)
+        return list(session.messages) if session is not None else None
+
+    async def append(self, token: str, *messages: Dict[str, Any]):
+        """세션에 메시지를 추가하고 백엔드에도 한 번에 기록합니다.
+
+        질문과 답변을 함께 넘기면 다른 요청의 메시지가 그 사이에 끼지 않습니다.
+        """
+        if not token or not messages:
+            return
+        async with self._lock(token):
+            session = await self._get(token)
+            if session is None:
+                # 첫 메시지 전에 메모리에서 내보낸 빈 세션은 백엔드에도 없으므로 다시 만듭니다
+                session = self._sessions[token] = ChatSession(token)
+            self._bytes -= session.size
+            for message in messages:
+                session.append(message)
+            session.trim(self.max_messages)
+            self._bytes += session.size
+            self._enforce_limits()
+            await self.backend.append(token, list(messages), self.max_messages)
+
+    async def history_for_llm(self, token: str, budget_tokens: int) -> List[Dict[str, str]]:
+        """토큰 예산 안에 들어가는 최근 대화 기록을 LLM 메시지 형식으로 반환합니다."""
+        session = await self._get(token)
+        if session is None or budget_tokens <= 0:
+            return []
+
+        history = []
+        used = 0
+        for message in reversed(session.messages):
+            content = message["content"]
+            if isinstance(content, list):
+                content = blocks_to_text(content)
+            tokens = count_tokens(content) + 4  # 역할 표시 등 메시지당 부가 토큰
+            if used + tokens > budget_tokens:
+                break
+            used += tokens
+            history.append({"role": message["role"], "content": content})
+        history.reverse()
+        return history
+
+    async def discard(self, token: str):
+        """세션을 메모리와 백엔드에서 모두 삭제합니다."""
+        async with self._lock(token):
+            session = self._sessions.pop(token, None)
+            if session is not None:
+                self._bytes -= session.size
+            await self.backend.delete(token)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, sessions=len(self._sessions), bytes=self._bytes)
+
+    def _lock(self, token: str) -> asyncio.Lock:
+        lock = self._locks.get(token)
+        if lock is None:
+            lock = self._locks[token] = asyncio.Lock()
+        return lock
+
+    async def _get(self, token: Optional[str], refresh: bool = False) -> Optional[ChatSession]:
+        if not token:
+            return None
+        self._expire_idle()
+        session = self._sessions.get(token)
+        if session is None or refresh:
+            restored = await self._restore(token)
+            session = self._sessions.get(token) if restored is None else restored
+            if restored is None and session is not None and session.messages:
+                # 메시지가 있는데 백엔드에 없으면 다른 곳에서 삭제되었거나 만료된 세션입니다
+                self._evict(token)
+                session = None
+            # 아직 메시지가 없는 세션은 백엔드에 없으므로 메모리의 세션을 씁니다
+            session = restored or session
+            if session is None:
+                return None
+        session.last_access = time.time()
+        self._sessions.move_to_end(token)
+        return session
+
+    def _expire_idle(self):
+        """유휴 시간이 지난 세션을 내보냅니다. LRU 순서이므로 앞쪽만 확인하면 됩니다."""
+        deadline = time.time() - self.idle_ttl
+        while self._sessions:
+            token, session = next(iter(self._sessions.items()))
+            if session.last_access >= deadline:
+                break
+            self._evict(token)
+            self.counters["expired"] += 1
+
+    def _enforce_limits(self):
+        # 가장 최근 세션 하나는 메모리 한도와 관계없이 유지합니다
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._evict(next(iter(self._sessions)))
+            self.counters["evicted"] += 1
+
+    def _evict(self, token: str):
+        # 메시지는 추가할 때 이미 백엔드에 기록했으므로 메모리에서만 내보냅니다
+        session = self._sessions.pop(token)
+        self._bytes -= session.size
+
+    async def _restore(self, token: str) -> Optional[ChatSession]:
+        messages = await self.backend.load(token)
+        if messages is None:
+            return None
+        previous = self._sessions.pop(token, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        session = ChatSession(token, messages)
+        self._sessions[token] = session
+        self._bytes += session.size
+        self.counters["restored"] += 1
+        self._enforce_limits()
+        return session
@@ -0,0 +1,298 @@
+"""여러 작업 프로세스나 노드가 함께 쓰는 채팅 세션 기록과 브로드캐스트 채널입니다.
+
+SessionStore는 연결된 세션을 메모리에 두고 메시지를 추가할 때마다 이 백엔드에도 기록합니다.
+다른 작업 프로세스로 재연결한 클라이언트는 백엔드에서 기록을 이어받습니다.
+모든 메서드는 코루틴이며 이벤트 루프를 막지 않습니다 (SQLite는 스레드에서 실행하고 Redis는 redis.asyncio를 씁니다).
+
+- sqlite:<경로>  같은 호스트의 작업 프로세스끼리 SQLite 파일 하나를 공유합니다 (기본값)
+- redis:<URL>   여러 노드가 Redis 서버 하나를 공유합니다 (redis 패키지 필요)
+- memory        프로세스 안에서만 유효합니다. 메모리에서 내보낸 세션은 사라집니다
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+# 기록된 세션을 보관하는 기간 (마지막 메시지 기준)
+DEFAULT_SESSION_TTL = 7 * 86400.0
+
+# SQLite 브로드캐스트 채널을 확인하는 간격과 지난 메시지를 보관하는 시간 (초)
+BROADCAST_POLL_INTERVAL = 0.2
+BROADCAST_RETENTION = 60.0
+
+# SQLite에서 보관 기간이 지난 세션을 지우는 최소 간격 (초)
+SESSION_SWEEP_INTERVAL = 600.0
+
+
+class MemoryStateBackend:
+    """한 프로세스 안에서만 유효한 상태 백엔드입니다. 세션 기록은 SessionStore의 메모리에만 있습니다."""
+
+    shared = False
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def load(self, token: str) -> Optional[List[Dict[str, Any]]]:
+        return None
+
+    async def append(self, token: str, messages: List[Dict[str, Any]], max_messages: int):
+        pass
+
+    async def delete(self, token: str):
+        pass
+
+    async def publish(self, channel: str, payload: str):
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(payload)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def aclose(self):
+        pass
+
+
+class SQLiteStateBackend:
+    """SQLite 파일 하나를 같은 호스트의 작업 프로세스가 함께 쓰는 상태 백엔드입니다.
+
+    메시지는 한 행씩 추가하므로 기록 전체를 다시 쓰지 않습니다. 브로드캐스트는 메시지 표에 쓰고
+    구독자가 짧은 간격으로 새 행을 읽습니다. 잠금 대기(busy_timeout)가 이벤트 루프를 막지 않도록
+    쿼리는 모두 스레드에서 실행합니다.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_SESSION_TTL,
+        poll_interval: float = BROADCAST_POLL_INTERVAL,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 트랜잭션은 직접 시작합니다 (다른 프로세스와 경쟁할 때 읽기 후 쓰기 잠금 승격 실패를 피함)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS session_messages (
+                    token TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (token, seq)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            # 이전 버전이 세션 전체를 JSON 하나로 내보내던 표를 옮깁니다
+            legacy = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_sessions'"
+            ).fetchone()
+            if legacy:
+                conn.execute('''
+                    INSERT OR IGNORE INTO session_messages (token, seq, message, created_at)
+                    SELECT chat_sessions.token, CAST(item.key AS INTEGER), item.value, chat_sessions.updated_at
+                    FROM chat_sessions, json_each(chat_sessions.history) AS item
+                ''')
+                conn.execute("DROP TABLE chat_sessions")
+            self._sweep_expired(conn, time.time())
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _sweep_expired(self, conn: sqlite3.Connection, now: float):
+        """보관 기간이 지난 세션을 지웁니다. sweep_interval마다 한 번만 실행합니다 (트랜잭션 안에서 호출)."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        conn.execute('''
+            DELETE FROM session_messages WHERE token IN (
+                SELECT token FROM session_messages GROUP BY token HAVING MAX(created_at) < ?
+            )
+        ''', (now - self.ttl,))
+
+    @staticmethod
+    async def _run(function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def load(self, token: str) -> Optional[List[Dict[str, Any]]]:
+        """세션의 메시지를 순서대로 반환합니다. 없거나 보관 기간이 지났으면 None을 반환합니다."""
+
+        def read():
+            with self._lock:
+                return self._conn.execute(
+                    'SELECT message, created_at FROM session_messages WHERE token = ? ORDER BY seq', (token,)
+                ).fetchall()
+
+        rows = await self._run(read)
+        if not rows or max(row[1] for row in rows) < time.time() - self.ttl:
+            return None
+        return [json.loads(row[0]) for row in rows]
+
+    async def append(self, token: str, messages: List[Dict[str, Any]], max_messages: int):
+        """메시지를 한 트랜잭션으로 추가하고 최근 max_messages개만 남깁니다."""
+        now = time.time()
+        rows = [json.dumps(message, ensure_ascii=False) for message in messages]
+
+        def write():
+            with self._transaction() as conn:
+                first = conn.execute(
+                    'SELECT COALESCE(MAX(seq) + 1, 0) FROM session_messages WHERE token = ?', (token,)
+                ).fetchone()[0]
+                conn.executemany(
+                    'INSERT INTO session_messages (token, seq, message, created_at) VALUES (?, ?, ?, ?)',
+                    [(token, first + i, message, now) for i, message in enumerate(rows)]
+                )
+                last = first + len(rows) - 1
+                conn.execute('DELETE FROM session_messages WHERE token = ? AND seq <= ?', (token, last - max_messages))
+                # Redis의 키 만료처럼 오래 쓰지 않은 세션이 표에 쌓이지 않게 합니다
+                self._sweep_expired(conn, now)
+
+        await self._run(write)
+
+    async def delete(self, token: str):
+        def write():
+            with self._transaction() as conn:
+                conn.execute('DELETE FROM session_messages WHERE token = ?', (token,))
+
+        await self._run(write)
+
+    async def publish(self, channel: str, payload: str):
+        now = time.time()
+
+        def write():
+            with self._transaction() as conn:
+                conn.execute(
+                    'INSERT INTO broadcasts (channel, payload, created_at) VALUES (?, ?, ?)', (channel, payload, now)
+                )
+                conn.execute('DELETE FROM broadcasts WHERE created_at < ?', (now - BROADCAST_RETENTION,))
+
+        await self._run(write)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """구독을 시작한 뒤에 발행된 메시지를 차례로 내보냅니다."""
+
+        def read(after: int):
+            with self._lock:
+                return self._conn.execute(
+                    'SELECT id, payload FROM broadcasts WHERE id > ? AND channel = ? ORDER BY id', (after, channel)
+                ).fetchall()
+
+        def last_id() -> int:
+            with self._lock:
+                return self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM broadcasts').fetchone()[0]
+
+        after = await self._run(last_id)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for message_id, payload in await self._run(read, after):
+                after = message_id
+                yield payload
+
+    async def aclose(self):
+        def close():
+            with self._lock:
+                self._conn.close()
+
+        await self._run(close)
+
+
+class RedisStateBackend:
+    """Redis 서버를 여러 노드가 함께 쓰는 상태 백엔드입니다.
+
+    세션 기록은 토큰별 리스트에, 브로드캐스트는 Redis pub/sub 채널에 둡니다. 모든 명령은 redis.asyncio
+    클라이언트 하나로 보냅니다.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, ttl: float = DEFAULT_SESSION_TTL, prefix: str = "festa"):
+        from redis import asyncio as redis_asyncio
+
+        self.url = url
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._client = redis_asyncio.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, token: str) -> str:
+        return f"{self.prefix}:session:{token}"
+
+    async def load(self, token: str) -> Optional[List[Dict[str, Any]]]:
+        messages = await self._client.lrange(self._key(token), 0, -1)
+        return [json.loads(message) for message in messages] if messages else None
+
+    async def append(self, token: str, messages: List[Dict[str, Any]], max_messages: int):
+        key = self._key(token)
+        # MULTI/EXEC 트랜잭션이므로 다른 요청의 메시지가 사이에 끼지 않습니다
+        async with self._client.pipeline() as pipeline:
+            pipeline.rpush(key, *(json.dumps(message, ensure_ascii=False) for message in messages))
+            pipeline.ltrim(key, -max_messages, -1)
+            pipeline.expire(key, self.ttl)
+            await pipeline.execute()
+
+    async def delete(self, token: str):
+        await self._client.delete(self._key(token))
+
+    async def publish(self, channel: str, payload: str):
+        await self._client.publish(f"{self.prefix}:{channel}", payload)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(f"{self.prefix}:{channel}")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.reset()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def create_state_backend(spec: Optional[str] = None, default_path: Optional[str] = None):
+    """설정 문자열로 상태 백엔드를 생성합니다. 예: "sqlite:data/db/sessions.db", "redis:redis://host:6379/0", "memory"."""
+    spec = spec or os.getenv("FESTA_STATE_BACKEND") or (f"sqlite:{default_path}" if default_path else "memory")
+    kind, _, arg = spec.partition(":")
+    ttl = float(os.getenv("FESTA_SESSION_TTL", str(DEFAULT_SESSION_TTL)))
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(arg or default_path, ttl=ttl)
+    if kind == "redis":
+        return RedisStateBackend(arg or "redis://localhost:6379/0", ttl=ttl)
+    raise ValueError(f"지원하지 않는 상태 백엔드입니다: {spec}")
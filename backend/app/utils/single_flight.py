@@ -0,0 +1,107 @@
+"""같은 키로 동시에 들어온 요청이 업스트림 호출 하나를 함께 쓰도록 묶습니다 (single-flight).
+
+먼저 들어온 요청이 별도 작업으로 호출을 시작하고, 호출이 끝나기 전에 같은 키로 들어온 요청은 그 호출에
+합류합니다. 합류한 요청은 그때까지 받은 조각을 처음부터 받은 뒤 이후 조각을 이어 받습니다.
+요청 하나가 취소되면 그 요청만 빠지며, 기다리는 요청이 모두 빠졌을 때만 업스트림 호출을 취소합니다.
+"""
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Flight:
+    """진행 중인 업스트림 호출 하나와 지금까지 받은 조각입니다."""
+
+    __slots__ = ("key", "chunks", "done", "error", "waiters", "changed", "task")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        # 기다리는 요청을 모두 깨우고 다음 조각을 위한 이벤트로 바꿉니다
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """키가 같은 동시 요청을 업스트림 호출 하나로 묶고 결과 조각을 모든 요청에 나눠 줍니다."""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.counters = {"flights": 0, "coalesced": 0, "detached": 0, "abandoned": 0}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]],
+                     on_join: Optional[Callable[[bool], None]] = None) -> AsyncIterator[str]:
+        """키에 해당하는 호출의 조각을 차례로 반환합니다.
+
+        진행 중인 호출이 없을 때만 factory()로 새 호출을 시작합니다. on_join은 호출을 새로 시작했으면 True,
+        진행 중인 호출에 합류했으면 False를 받습니다.
+        """
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight(key)
+            flight.task = asyncio.create_task(self._run(flight, factory))
+            self._flights[key] = flight
+            self.counters["flights"] += 1
+        else:
+            self.counters["coalesced"] += 1
+            logger.info("llm.coalesced", key=key[:12], waiters=flight.waiters + 1, chunks=len(flight.chunks))
+        flight.waiters += 1
+        if on_join is not None:
+            on_join(leader)
+
+        index = 0
+        try:
+            while True:
+                while index < len(flight.chunks):
+                    index += 1
+                    yield flight.chunks[index - 1]
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.waiters -= 1
+            if not flight.done:
+                self.counters["detached"] += 1
+                if flight.waiters == 0:
+                    # 결과를 기다리는 요청이 없으면 업스트림 호출도 멈춥니다
+                    self.counters["abandoned"] += 1
+                    self._forget(flight)
+                    flight.task.cancel()
+
+    async def _run(self, flight: _Flight, factory: Callable[[], AsyncIterator[str]]):
+        try:
+            async for chunk in factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(flight)
+            flight.notify()
+
+    def _forget(self, flight: _Flight):
+        # 끝난 호출은 바로 지워서 이후 요청은 새로 호출하거나 응답 캐시에서 받습니다
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters, in_flight=len(self._flights))
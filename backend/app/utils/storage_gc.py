@@ -0,0 +1,325 @@
+"""삭제된 문서의 산출물과 고아 파일을 정리하고 데이터베이스 공간을 돌려줍니다.
+
+StorageCollector.delete_document는 문서 레코드, 전문 검색 색인, 청크, 벡터와 함께 다른 문서가 쓰지 않는
+원본 파일, 처리된 텍스트, PDF 페이지 캐시를 바로 지웁니다. 주기적으로 실행되는 collect는 어떤 문서도
+참조하지 않는 파일과 행(중단된 업로드, 이전 버전에서 삭제된 문서의 산출물 등)을 찾아 지우고,
+삭제된 행이 많이 쌓인 벡터 인덱스를 다시 쓰고, incremental vacuum으로 빈 페이지를 파일 시스템에 돌려줍니다.
+포그라운드 요청의 지연 시간에 영향을 덜 주도록 collect의 디스크 I/O는 초당 바이트 수로 제한합니다.
+
+수동으로 실행하려면 (backend 디렉토리에서):
+    python -m app.utils.storage_gc
+    python -m app.utils.storage_gc --vacuum   # 기존 데이터베이스를 한 번 전체 VACUUM하고 incremental 모드로 전환
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .database import Database
+from .document_processor import DocumentProcessor
+from .retrieval import RetrievalEngine
+from .metrics import REGISTRY
+from .log import get_logger
+
+# 이 시간(초)보다 최근에 수정된 파일은 수집 중일 수 있으므로 고아로 보지 않습니다
+DEFAULT_MIN_AGE = 3600.0
+
+# collect의 기본 디스크 I/O 한도 (초당 바이트)
+DEFAULT_IO_RATE = 8 * 1024 * 1024
+
+# incremental vacuum 한 번에 돌려주는 페이지 수
+VACUUM_STEP_PAGES = 256
+
+# 업로드 중인 임시 파일(.upload-*.part, .archive-*.part 등)은 일괄 수집이 오래 걸릴 수 있으므로 더 오래 남깁니다
+TEMP_FILE_MIN_AGE = 86400.0
+
+# 고아로 지울 수 있는 이름: 내용 해시 이름의 원본과 처리된 텍스트, 페이지 캐시 디렉토리, 작업 중 임시 파일.
+# 사용자가 직접 넣었거나 이전 버전이 다른 이름으로 저장한 파일은 건드리지 않습니다
+COLLECTABLE_NAME_PATTERN = re.compile(r'^(?:processed_)?[0-9a-f]{64}(?:\.|$)|^\..+\.(?:part|tmp)$')
+
+# 파일 하나를 확인(stat)하거나 지울 때 I/O로 치는 바이트 수
+FILE_IO_COST = 4096
+
+# 청크 행 하나를 지울 때 I/O로 치는 바이트 수 (청크 본문 크기 정도)
+CHUNK_IO_COST = 1024
+
+GC_RECLAIMED_BYTES = REGISTRY.counter("festa_storage_reclaimed_bytes_total", "정리 작업으로 돌려준 디스크 공간 (바이트)",
+                                      ["kind"])
+GC_LATENCY = REGISTRY.histogram("festa_storage_gc_seconds", "저장소 정리 작업 한 번의 소요 시간 (초)")
+
+logger = get_logger(__name__)
+
+
+class CollectionInProgress(Exception):
+    """저장소 정리 작업이 이미 실행 중일 때 발생합니다."""
+
+
+class IORateLimiter:
+    """사용한 I/O 바이트 수가 초당 한도를 넘으면 호출한 스레드를 재웁니다. (한도가 0 이하이면 제한하지 않음)"""
+
+    def __init__(self, bytes_per_second: float, stop: Optional[threading.Event] = None):
+        self.rate = bytes_per_second
+        # 최대 1초 분량까지 몰아서 쓸 수 있습니다
+        self._allowance = float(bytes_per_second)
+        self._last = time.monotonic()
+        self._stop = stop or threading.Event()
+
+    def consume(self, nbytes: int):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate) - nbytes
+        self._last = now
+        if self._allowance < 0:
+            # 중단 요청이 오면 바로 깨어납니다
+            self._stop.wait(-self._allowance / self.rate)
+            self._allowance = 0.0
+            self._last = time.monotonic()
+
+
+def _path_size(path: Path) -> int:
+    """파일 또는 디렉토리 전체의 크기를 반환합니다."""
+    if path.is_dir():
+        return sum(entry.stat().st_size for entry in path.rglob('*') if entry.is_file())
+    return path.stat().st_size
+
+
+class StorageCollector:
+    """문서 삭제 시 산출물을 함께 지우고, 고아 파일과 행을 주기적으로 정리합니다."""
+
+    def __init__(self, document_processor: DocumentProcessor, database: Database,
+                 retrieval: Optional[RetrievalEngine] = None, min_age: float = DEFAULT_MIN_AGE,
+                 io_rate: float = DEFAULT_IO_RATE, vacuum_step_pages: int = VACUUM_STEP_PAGES):
+        self.document_processor = document_processor
+        self.database = database
+        self.retrieval = retrieval
+        self.papers_dir = document_processor.papers_dir
+        self.processed_dir = document_processor.processed_dir
+        self.page_cache_dir = document_processor.page_cache_dir
+        self.min_age = min_age
+        self.io_rate = io_rate
+        self.vacuum_step_pages = vacuum_step_pages
+
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _is_managed(self, path: Path) -> bool:
+        """FESTA가 만든 산출물 디렉토리 안의 경로인지 확인합니다. (그 밖의 파일은 지우지 않습니다)"""
+        parent = path.resolve().parent
+        return parent in (self.papers_dir.resolve(), self.processed_dir.resolve(), self.page_cache_dir.resolve())
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        """파일이나 디렉토리를 지우고 돌려준 바이트 수를 반환합니다."""
+        try:
+            size = _path_size(path)
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def _vectors_locked(self):
+        # 청크를 지운 뒤 그 행에 삭제 표시를 할 때까지 벡터 인덱스 압축으로 행 번호가 바뀌지 않도록 잠급니다
+        return self.retrieval.locked() if self.retrieval is not None else nullcontext()
+
+    def delete_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """문서와 다른 문서가 쓰지 않는 모든 산출물을 지우고 정리 결과를 반환합니다. 문서가 없으면 None입니다."""
+        document = self.database.get_document(doc_id, fields=['content_hash'])
+        if document is None:
+            return None
+        content_hash = document.get('content_hash')
+        # 같은 내용을 수집 중인 작업은 레코드를 삽입할 때까지 내용 해시의 공유 잠금을 잡고 있습니다.
+        # 그 작업이 끝난 뒤에 참조를 다시 세고 지워야 새로 올린 문서의 파일을 지우지 않습니다
+        with self.document_processor.acquire_content_lock(content_hash) if content_hash else nullcontext():
+            with self._vectors_locked():
+                removed = self.database.remove_document(doc_id)
+                if removed is None:
+                    return None
+                if self.retrieval is not None and removed["vector_rows"]:
+                    self.retrieval.remove_vectors(removed["vector_rows"])
+            paths = [Path(path) for path in removed["files"]]
+            if removed["content_hash"]:
+                paths.append(self.page_cache_dir / removed["content_hash"])
+
+            files_removed = bytes_reclaimed = 0
+            for path in paths:
+                if self._is_managed(path) and path.exists():
+                    bytes_reclaimed += self._remove(path)
+                    files_removed += 1
+        GC_RECLAIMED_BYTES.inc(bytes_reclaimed, kind="files")
+
+        report = {
+            "doc_id": doc_id,
+            "files_removed": files_removed,
+            "vectors_removed": len(removed["vector_rows"]),
+            "bytes_reclaimed": bytes_reclaimed,
+        }
+        logger.info("storage.document_deleted", **report)
+        return report
+
+    def _collect_files(self, directory: Path, referenced: set, cutoff: float, limiter: IORateLimiter,
+                       report: Dict[str, Any], recent: Optional[set] = None):
+        """디렉토리에서 FESTA가 만든 이름 가운데 참조되지 않고 cutoff 이전에 수정된 항목을 지웁니다.
+
+        recent가 주어지면 최근에 수정되어 남긴 항목의 이름(확장자 제외)을 모읍니다.
+        """
+        try:
+            entries: Iterable[os.DirEntry] = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        temp_cutoff = min(cutoff, time.time() - TEMP_FILE_MIN_AGE)
+        for entry in entries:
+            if self._stop.is_set():
+                return
+            limiter.consume(FILE_IO_COST)
+            if entry.name in referenced or not COLLECTABLE_NAME_PATTERN.match(entry.name):
+                continue
+            try:
+                modified = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if modified > (temp_cutoff if entry.name.startswith('.') else cutoff):
+                if recent is not None:
+                    recent.add(entry.name.split('.', 1)[0])
+                continue
+            size = self._remove(Path(entry.path))
+            limiter.consume(FILE_IO_COST)
+            report["files_removed"] += 1
+            report["file_bytes_reclaimed"] += size
+
+    def _vacuum(self, limiter: IORateLimiter, report: Dict[str, Any]):
+        """incremental vacuum으로 빈 페이지를 조금씩 돌려줍니다."""
+        stats = self.database.storage_stats()
+        report["vacuum"] = "incremental" if stats["auto_vacuum"] == 2 else "unavailable"
+        if stats["auto_vacuum"] == 2:
+            free_pages = stats["freelist_count"]
+            while free_pages > 0 and not self._stop.is_set():
+                # 옮기는 페이지를 읽고 쓰므로 두 배로 계산합니다
+                limiter.consume(min(free_pages, self.vacuum_step_pages) * stats["page_size"] * 2)
+                remaining = self.database.incremental_vacuum(self.vacuum_step_pages)
+                if remaining >= free_pages:
+                    break
+                free_pages = remaining
+            self.database.checkpoint()
+        elif stats["freelist_count"]:
+            logger.warning("storage.vacuum_unavailable", free_bytes=stats["freelist_count"] * stats["page_size"],
+                           hint="python -m app.utils.storage_gc --vacuum")
+
+        after = self.database.storage_stats()
+        report["db_bytes_reclaimed"] = max(0, stats["page_count"] - after["page_count"]) * stats["page_size"]
+        report["db_free_bytes"] = after["freelist_count"] * after["page_size"]
+
+    def collect(self) -> Dict[str, Any]:
+        """고아 파일, 청크, 전문 검색 색인 행, 벡터를 정리하고 데이터베이스 빈 공간을 돌려줍니다."""
+        if not self._lock.acquire(blocking=False):
+            raise CollectionInProgress("저장소 정리 작업이 이미 실행 중입니다.")
+        try:
+            start = time.perf_counter()
+            limiter = IORateLimiter(self.io_rate, self._stop)
+            report = {
+                "files_removed": 0, "file_bytes_reclaimed": 0, "chunks_removed": 0, "fts_rows_removed": 0,
+                "vectors_removed": 0, "vectors_compacted": 0, "db_bytes_reclaimed": 0, "db_free_bytes": 0, "vacuum": None,
+            }
+            cutoff = time.time() - self.min_age
+            referenced = self.database.get_referenced_artifacts()
+
+            # 최근 저장된 원본의 내용 해시는 청크가 먼저 저장되고 문서는 아직 삽입되지 않았을 수 있습니다
+            recent_hashes = set()
+            self._collect_files(self.papers_dir, referenced["files"], cutoff, limiter, report, recent_hashes)
+            self._collect_files(self.processed_dir, referenced["files"], cutoff, limiter, report)
+            self._collect_files(self.page_cache_dir, referenced["content_hashes"], cutoff, limiter, report)
+
+            if not self._stop.is_set():
+                with self._vectors_locked():
+                    rows = self.database.delete_orphan_rows(
+                        recent_hashes, throttle=lambda count: limiter.consume(count * CHUNK_IO_COST)
+                    )
+                    report["chunks_removed"] = rows["chunks"]
+                    report["fts_rows_removed"] = rows["fts_rows"]
+                    if self.retrieval is not None:
+                        self.retrieval.remove_vectors(rows["vector_rows"])
+                        report["vectors_removed"] = len(rows["vector_rows"]) + self.retrieval.remove_orphan_vectors()
+
+            if not self._stop.is_set() and self.retrieval is not None:
+                report["vectors_compacted"] = self.retrieval.compact_vectors(throttle=limiter.consume)
+
+            if not self._stop.is_set():
+                self._vacuum(limiter, report)
+
+            report["bytes_reclaimed"] = report["file_bytes_reclaimed"] + report["db_bytes_reclaimed"]
+            report["elapsed"] = time.perf_counter() - start
+            GC_RECLAIMED_BYTES.inc(report["file_bytes_reclaimed"], kind="files")
+            GC_RECLAIMED_BYTES.inc(report["db_bytes_reclaimed"], kind="database")
+            GC_LATENCY.observe(report["elapsed"])
+            logger.info("storage.gc_completed", **report)
+            self.last_report = dict(report, finished_at=time.time())
+            return report
+        finally:
+            self._lock.release()
+
+    async def run_periodically(self, interval: float):
+        """interval초마다 collect를 스레드에서 실행합니다. 취소될 때까지 반복합니다."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.collect)
+            except CollectionInProgress:
+                continue
+            except Exception as e:
+                logger.exception("storage.gc_failed", error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._lock.locked(),
+            "last_report": self.last_report,
+            "database": self.database.storage_stats(),
+        }
+
+    def stop(self):
+        """실행 중인 collect가 다음 단계로 넘어가지 않고 끝나도록 합니다."""
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-dir", type=Path, default=Path(__file__).resolve().parents[2])
+    parser.add_argument("--min-age", type=float, default=DEFAULT_MIN_AGE,
+                        help="이 시간(초)보다 최근에 수정된 파일은 지우지 않습니다")
+    parser.add_argument("--io-rate", type=float, default=0, help="초당 디스크 I/O 한도 (바이트, 0이면 제한 없음)")
+    parser.add_argument("--vacuum", action="store_true", help="정리 후 데이터베이스 전체를 VACUUM합니다")
+    args = parser.parse_args()
+
+    document_processor = DocumentProcessor(str(args.base_dir))
+    database = Database(str(args.base_dir / "data" / "db" / "documents.db"))
+    retrieval = RetrievalEngine(str(args.base_dir / "data" / "index"), database)
+    collector = StorageCollector(document_processor, database, retrieval, min_age=args.min_age, io_rate=args.io_rate)
+    try:
+        report = collector.collect()
+        if args.vacuum:
+            before = database.storage_stats()
+            database.vacuum()
+            after = database.storage_stats()
+            vacuumed = max(0, before["page_count"] - after["page_count"]) * before["page_size"]
+            report["db_bytes_reclaimed"] += vacuumed
+            report["bytes_reclaimed"] += vacuumed
+        print(f"파일 {report['files_removed']}개, 청크 {report['chunks_removed']}개, "
+              f"벡터 {report['vectors_removed']}개 정리, 벡터 인덱스 {report['vectors_compacted']}행 압축")
+        print(f"회수한 공간: {report['bytes_reclaimed']:,} 바이트 "
+              f"(파일 {report['file_bytes_reclaimed']:,}, 데이터베이스 {report['db_bytes_reclaimed']:,})")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""처리된 본문 텍스트를 압축해 저장하고 원하는 구간만 풀어 읽는 저장소.
+
+문서 하나가 파일 하나(processed_<저장 파일 이름>.txtz)이며 구조는 다음과 같습니다.
+
+    MAGIC | 구간 0 | 구간 1 | ... | 색인 | 색인 위치(8바이트) | 색인 길이(4바이트) | MAGIC
+
+본문은 SEGMENT_CHARS 글자씩 잘라 구간마다 따로 zlib으로 압축합니다. 색인(zlib 압축 JSON)에는 구간마다
+(시작 글자 위치, 파일 안 위치, 압축 길이)와 페이지 시작 위치, 절 제목('#' 줄) 위치를 둡니다.
+파일은 mmap으로 열어 요청한 글자 구간에 걸친 압축 구간만 풀기 때문에 읽는 비용은 문서 전체가 아니라 구간 길이에 비례합니다.
+이전 버전이 쓴 일반 텍스트 파일(processed_*.txt)도 같은 방법으로 읽을 수 있습니다.
+
+기존 텍스트 파일 변환 (backend 디렉토리에서):
+    python -m app.utils.text_store
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+MAGIC = b"FESTATX1"
+FOOTER = struct.Struct("<QI8s")
+PROCESSED_SUFFIX = ".txtz"
+LEGACY_SUFFIX = ".txt"
+
+# 구간 하나의 글자 수. 작을수록 짧은 구간을 빨리 읽지만 압축률이 떨어집니다
+SEGMENT_CHARS = 16 * 1024
+COMPRESSION_LEVEL = 6
+
+# 열어 둔 파일 수 (색인을 다시 읽지 않도록 유지)
+OPEN_FILES = 64
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t]*$', re.MULTILINE)
+
+PathLike = Union[str, Path]
+
+
+def processed_path(processed_dir: PathLike, saved_filename: str) -> Path:
+    """저장된 원본 파일 이름에 해당하는 처리된 텍스트 경로를 반환합니다."""
+    return Path(processed_dir) / f"processed_{saved_filename}{PROCESSED_SUFFIX}"
+
+
+def find_processed(processed_dir: PathLike, saved_filename: str) -> Optional[Path]:
+    """이미 처리된 텍스트가 있으면 그 경로를 반환합니다. 이전 버전의 텍스트 파일도 찾습니다."""
+    for path in (processed_path(processed_dir, saved_filename),
+                 Path(processed_dir) / f"processed_{saved_filename}{LEGACY_SUFFIX}"):
+        if path.exists():
+            return path
+    return None
+
+
+def find_sections(text: str) -> List[Dict[str, Any]]:
+    """절 제목('#' 줄)의 위치, 수준, 제목을 반환합니다."""
+    return [
+        {"start": match.start(), "level": len(match.group(1)), "title": match.group(2)}
+        for match in HEADING_PATTERN.finditer(text)
+    ]
+
+
+def write_processed_text(path: PathLike, text: str, pages: Optional[List[int]] = None) -> int:
+    """텍스트를 구간별로 압축해 저장하고 파일 크기를 반환합니다.
+
+    pages는 페이지마다 시작 글자 위치입니다. 페이지가 없는 형식은 생략합니다.
+    """
+    path = Path(path)
+    segments = []
+    # 중간에 실패해도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체합니다
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC)
+        offset = len(MAGIC)
+        for start in range(0, len(text), SEGMENT_CHARS):
+            data = zlib.compress(text[start:start + SEGMENT_CHARS].encode('utf-8'), COMPRESSION_LEVEL)
+            file.write(data)
+            segments.append((start, offset, len(data)))
+            offset += len(data)
+        index = zlib.compress(json.dumps({
+            "length": len(text),
+            "segments": segments,
+            "pages": pages or [0],
+            "sections": find_sections(text),
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+        file.write(index)
+        file.write(FOOTER.pack(offset, len(index), MAGIC))
+        size = offset + len(index) + FOOTER.size
+    os.replace(tmp_path, path)
+    return size
+
+
+class ProcessedText:
+    """처리된 텍스트 파일 하나를 mmap으로 열어 글자 구간, 페이지, 절 단위로 읽습니다."""
+
+    def __init__(self, path: PathLike):
+        self.path = str(path)
+        self._map: Optional[mmap.mmap] = None
+        self._text: Optional[str] = None
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                # 이전 버전의 일반 텍스트 파일은 전체를 읽어 둡니다
+                file.seek(0)
+                self._text = file.read().decode('utf-8')
+                self.length = len(self._text)
+                self.pages = [0]
+                self.sections = find_sections(self._text)
+                self._starts: List[int] = []
+                self._segments: List[Tuple[int, int, int]] = []
+                return
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            index_offset, index_length, magic = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+            if magic != MAGIC:
+                raise ValueError("끝 표시가 없습니다")
+            index = json.loads(zlib.decompress(self._map[index_offset:index_offset + index_length]))
+        except (ValueError, struct.error, zlib.error) as e:
+            # 쓰다가 중단된 파일 등
+            self.close()
+            raise ValueError(f"처리된 텍스트 파일이 손상되었습니다: {self.path} ({e})")
+        self.length: int = index["length"]
+        self.pages: List[int] = index["pages"]
+        self.sections: List[Dict[str, Any]] = index["sections"]
+        self._segments = [tuple(segment) for segment in index["segments"]]
+        self._starts = [segment[0] for segment in self._segments]
+
+    @property
+    def compressed(self) -> bool:
+        return self._map is not None
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> str:
+        """[start, end) 글자 구간을 반환합니다. 구간에 걸친 압축 구간만 풉니다."""
+        start = max(0, start)
+        end = self.length if end is None else min(end, self.length)
+        if start >= end:
+            return ""
+        if self._text is not None:
+            return self._text[start:end]
+
+        first = bisect_right(self._starts, start) - 1
+        last = bisect_right(self._starts, end - 1) - 1
+        text = "".join(self._segment(i) for i in range(first, last + 1))
+        base = self._starts[first]
+        return text[start - base:end - base]
+
+    def _segment(self, i: int) -> str:
+        _, offset, length = self._segments[i]
+        return zlib.decompress(self._map[offset:offset + length]).decode('utf-8')
+
+    def page_span(self, page: int) -> Tuple[int, int]:
+        """페이지(0부터)의 [시작, 끝) 글자 위치를 반환합니다."""
+        if not 0 <= page < len(self.pages):
+            raise IndexError(f"페이지 번호가 범위를 벗어났습니다: {page}")
+        end = self.pages[page + 1] if page + 1 < len(self.pages) else self.length
+        return self.pages[page], end
+
+    def section_span(self, section: int) -> Tuple[int, int]:
+        """절(0부터)의 [시작, 끝) 글자 위치를 반환합니다. 절은 같거나 높은 수준의 다음 제목 앞에서 끝납니다."""
+        if not 0 <= section < len(self.sections):
+            raise IndexError(f"절 번호가 범위를 벗어났습니다: {section}")
+        level = self.sections[section]["level"]
+        end = next((following["start"] for following in self.sections[section + 1:]
+                    if following["level"] <= level), self.length)
+        return self.sections[section]["start"], end
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> "ProcessedText":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_open_files: "OrderedDict[Tuple[str, int, int], ProcessedText]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def open_processed_text(path: PathLike) -> ProcessedText:
+    """처리된 텍스트 파일을 엽니다. 최근에 연 파일은 색인을 다시 읽지 않고 재사용합니다.
+
+    파일을 교체하면 수정 시간과 크기가 바뀌므로 새로 엽니다. 닫지 않고 반환하므로 호출한 쪽에서 close()하지 않습니다.
+    """
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _open_lock:
+        processed = _open_files.get(key)
+        if processed is not None:
+            _open_files.move_to_end(key)
+            return processed
+    processed = ProcessedText(path)
+    with _open_lock:
+        _open_files[key] = processed
+        # 내보낸 파일은 다른 스레드가 읽고 있을 수 있으므로 닫지 않고 참조가 사라질 때 닫히게 둡니다
+        while len(_open_files) > OPEN_FILES:
+            _open_files.popitem(last=False)
+    return processed
+
+
+def read_processed_text(path: PathLike) -> str:
+    """처리된 텍스트 전체를 반환합니다."""
+    with ProcessedText(path) as processed:
+        return processed.read()
+
+
+def compact_processed_files(database, processed_dir: PathLike) -> Dict[str, int]:
+    """일반 텍스트로 저장된 처리된 파일을 압축 형식으로 바꾸고 문서 레코드의 경로를 갱신합니다.
+
+    레코드가 참조하지 않는 텍스트 파일은 저장소 정리 작업(storage_gc)이 지웁니다.
+    """
+    stats = {"files": 0, "missing": 0, "bytes_before": 0, "bytes_after": 0}
+    for stored in database.get_processed_files():
+        if not stored.endswith(LEGACY_SUFFIX):
+            continue
+        # 데이터 디렉토리를 옮겼으면 같은 이름의 파일을 processed_dir에서 찾습니다
+        legacy = Path(stored) if Path(stored).exists() else Path(processed_dir) / Path(stored).name
+        if not legacy.exists():
+            stats["missing"] += 1
+            continue
+        text = legacy.read_text(encoding='utf-8')
+        target = legacy.with_suffix(PROCESSED_SUFFIX)
+        stats["bytes_after"] += write_processed_text(target, text)
+        stats["bytes_before"] += legacy.stat().st_size
+        # 같은 내용의 문서는 한 파일을 함께 참조하므로 경로가 같은 레코드를 모두 바꿉니다
+        database.replace_processed_file(stored, str(target))
+        legacy.unlink()
+        stats["files"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-dir", type=Path, default=Path(__file__).resolve().parents[2],
+                        help="데이터 디렉토리(data/)가 있는 backend 경로")
+    args = parser.parse_args()
+
+    # database가 이 모듈을 가져오므로 순환 import를 피해 여기서 가져옵니다
+    from .database import Database
+
+    database = Database(str(args.base_dir / "data" / "db" / "documents.db"))
+    try:
+        stats = compact_processed_files(database, args.base_dir / "data" / "processed")
+    finally:
+        database.close()
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    print(f"변환 {stats['files']}개 파일 (없는 파일 {stats['missing']}개): {stats['bytes_before'] / 1024 / 1024:.1f} MB -> "
+          f"{stats['bytes_after'] / 1024 / 1024:.1f} MB ({saved / 1024 / 1024:.1f} MB 절약)")
+
+
+if __name__ == "__main__":
+    main()
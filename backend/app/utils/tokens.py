@@ -0,0 +1,41 @@
+import os
+import re
+from functools import lru_cache
+from typing import Callable
+
+# 영문/숫자 단어 패턴 (대략 4글자당 1토큰)
+ASCII_WORD_PATTERN = re.compile(r'[A-Za-z0-9_]+')
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수를 추정합니다.
+
+    영문/숫자 단어는 4글자당 1토큰, 그 밖의 글자(한글, 기호 등)는 글자당 1토큰으로 셉니다.
+    공백은 세지 않습니다.
+    """
+    if not text:
+        return 0
+    words = ASCII_WORD_PATTERN.findall(text)
+    word_chars = sum(map(len, words))
+    word_tokens = sum((len(word) + 3) // 4 for word in words)
+    other_chars = len(text) - word_chars - text.count(' ') - text.count('\n')
+    return word_tokens + max(other_chars, 0)
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(spec: str = "") -> Callable[[str], int]:
+    """토큰 계산 함수를 반환합니다. 예: "estimate"(기본값), "tiktoken:cl100k_base"."""
+    spec = spec or os.getenv("FESTA_TOKENIZER", "estimate")
+    kind, _, arg = spec.partition(":")
+    if kind == "estimate":
+        return estimate_tokens
+    if kind == "tiktoken":
+        import tiktoken
+        encoding = tiktoken.get_encoding(arg or "cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    raise ValueError(f"지원하지 않는 토크나이저입니다: {spec}")
+
+
+def count_tokens(text: str) -> int:
+    """설정된 토크나이저로 토큰 수를 셉니다."""
+    return get_token_counter()(text)
@@ -0,0 +1,107 @@
+"""응답 블록 파서 마이크로벤치마크: 기존 줄 단위 re.split 방식 vs 증분 파서.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_block_parser --megabytes 4
+"""
+import argparse
+import random
+import re
+import time
+
+from app.utils.block_parser import BlockParser, parse_blocks
+from benchmarks.fixtures import make_sentence
+
+
+def make_answer(size: int, seed: int = 0) -> str:
+    """텍스트, 코드, 인라인/디스플레이 수식이 섞인 긴 응답을 생성합니다."""
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.6:
+            part = make_sentence(rng, 20) + f" with $x_{rng.randint(0, 9)}^2$ inline.\n"
+        elif kind < 0.8:
+            part = "```python\n" + "\n".join(f"value_{i} = {i} * 2" for i in range(10)) + "\n```\n"
+        else:
+            part = "$$\n\\sum_{i=0}^{n} a_i\n= b\n$$\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def legacy_parse(response: str):
+    """main.py에 인라인으로 있던 기존 변환 로직입니다."""
+    blocks = []
+    current_block = {"type": "text", "content": ""}
+    lines = response.split("\n")
+    in_code_block = False
+    code_content = []
+    code_lang = ""
+    for line in lines:
+        if line.startswith("```"):
+            if in_code_block:
+                if current_block["content"]:
+                    blocks.append(current_block)
+                    current_block = {"type": "text", "content": ""}
+                blocks.append({"type": "code", "language": code_lang, "content": "\n".join(code_content)})
+                in_code_block = False
+                code_content = []
+            else:
+                if current_block["content"]:
+                    blocks.append(current_block)
+                    current_block = {"type": "text", "content": ""}
+                in_code_block = True
+                code_lang = line[3:].strip()
+        elif in_code_block:
+            code_content.append(line)
+        else:
+            math_parts = re.split(r'(\$\$[\s\S]*?\$\$|\$[^\$\n]+\$)', line)
+            for part in math_parts:
+                if part.startswith("$$"):
+                    if current_block["content"]:
+                        blocks.append(current_block)
+                        current_block = {"type": "text", "content": ""}
+                    blocks.append({"type": "math", "display": True, "content": part[2:-2].strip()})
+                elif part.startswith("$"):
+                    if current_block["content"]:
+                        blocks.append(current_block)
+                        current_block = {"type": "text", "content": ""}
+                    blocks.append({"type": "math", "display": False, "content": part[1:-1].strip()})
+                elif part:
+                    current_block["content"] += part + " "
+    if current_block["content"]:
+        blocks.append(current_block)
+    return blocks
+
+
+def timed(name: str, func, size: int):
+    start = time.perf_counter()
+    blocks = func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<26} {elapsed * 1000:9.1f}ms  {size / elapsed / 1e6:7.1f} MB/s  blocks={len(blocks)}")
+    return blocks
+
+
+def streamed(answer: str, chunk_size: int):
+    parser = BlockParser()
+    blocks = []
+    for i in range(0, len(answer), chunk_size):
+        blocks.extend(parser.feed(answer[i:i + chunk_size]))
+    return blocks + parser.close()
+
+
+def run(megabytes: float, chunk_size: int):
+    answer = make_answer(int(megabytes * 1024 * 1024))
+    size = len(answer)
+    timed("legacy (re.split per line)", lambda: legacy_parse(answer), size)
+    full = timed("incremental, full text", lambda: parse_blocks(answer), size)
+    stream = timed(f"incremental, {chunk_size}-char feed", lambda: streamed(answer, chunk_size), size)
+    assert full == stream, "스트리밍 결과가 전체 파싱 결과와 다릅니다"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    args = parser.parse_args()
+    run(args.megabytes, args.chunk_size)
@@ -0,0 +1,75 @@
+"""일괄 수집 처리량 벤치마크: 문서별 삽입 vs 배치 삽입, 그리고 PDF/HTML/TeX 혼합 말뭉치 전체 수집.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_bulk_ingestion --files 1000 --workers 4
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.bulk_ingestion import BulkIngestor, format_report, iter_source_files
+from app.utils.database import Database
+from app.utils.document_processor import DocumentProcessor
+from app.utils.retrieval import RetrievalEngine
+from benchmarks.bench_database import make_document
+from benchmarks.fixtures import make_html, make_latex, make_pdf
+
+
+def make_corpus(root: Path, files: int, seed: int = 0):
+    """PDF, HTML, TeX 파일을 같은 비율로 생성합니다."""
+    for i in range(files):
+        kind = i % 3
+        if kind == 0:
+            make_pdf(root / f"paper_{i}.pdf", pages=4, lines_per_page=30, seed=seed + i)
+        elif kind == 1:
+            make_html(root / f"paper_{i}.html", paragraphs=20, seed=seed + i)
+        else:
+            make_latex(root / f"paper_{i}.tex", paragraphs=20, seed=seed + i)
+
+
+def bench_inserts(tmp: Path, rows: int, batch_size: int):
+    single = Database(str(tmp / "single.db"))
+    start = time.perf_counter()
+    for i in range(rows):
+        single.insert_document(make_document(i))
+    elapsed = time.perf_counter() - start
+    print(f"{'insert_document (문서별)':<28} {rows / elapsed:>10,.0f} rows/s  ({elapsed:.3f}s)")
+
+    batched = Database(str(tmp / "batched.db"))
+    start = time.perf_counter()
+    for i in range(0, rows, batch_size):
+        batched.insert_documents([make_document(j) for j in range(i, min(i + batch_size, rows))])
+    elapsed = time.perf_counter() - start
+    print(f"{f'insert_documents ({batch_size}개씩)':<28} {rows / elapsed:>10,.0f} rows/s  ({elapsed:.3f}s)")
+
+
+def run(files: int, workers: int, rows: int, batch_size: int, index: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        bench_inserts(tmp, rows, batch_size)
+
+        corpus = tmp / "corpus"
+        corpus.mkdir()
+        start = time.perf_counter()
+        make_corpus(corpus, files)
+        print(f"\n말뭉치 생성: {files}개 파일 ({time.perf_counter() - start:.1f}s)")
+
+        base_dir = tmp / "backend"
+        database = Database(str(base_dir / "data" / "db" / "documents.db"))
+        retrieval = RetrievalEngine(str(base_dir / "data" / "index"), database) if index else None
+        ingestor = BulkIngestor(DocumentProcessor(str(base_dir)), database, retrieval,
+                                max_workers=workers, batch_size=batch_size)
+        print(format_report(ingestor.ingest(iter_source_files(corpus))))
+        database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=5000, help="삽입 비교에 사용할 레코드 수")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--no-index", action="store_true")
+    args = parser.parse_args()
+    run(args.files, args.workers, args.rows, args.batch_size, not args.no_index)
@@ -0,0 +1,74 @@
+"""같은 질문이 한꺼번에 몰릴 때 요청 묶기(single-flight) 사용 여부 비교.
+
+강의 중 "3장에 대해 물어보세요" 같은 상황을 흉내 내어 클라이언트 여러 개가 같은 질문을 동시에 스트리밍으로
+보냅니다. 응답 캐시는 끄고 측정하므로 차이는 진행 중인 호출에 합류한 효과만 나타냅니다.
+스텁 서버는 동시 처리 한도를 넘는 요청에 429를 반환합니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_coalescing --clients 50 --questions 3 --capacity 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from benchmarks.stub_llm_server import StubServer, create_app
+
+
+async def burst(llm, clients: int, questions: int):
+    """클라이언트마다 질문 하나를 골라 동시에 스트리밍으로 받고 (첫 조각 지연, 전체 지연, 실패 여부)를 반환합니다."""
+
+    async def ask(index: int):
+        start = time.perf_counter()
+        first, parts = None, []
+        async for delta in llm.stream_response(f"{index % questions + 1}장에 대해 설명해 주세요"):
+            if first is None:
+                first = time.perf_counter() - start
+            parts.append(delta)
+        return first * 1000, (time.perf_counter() - start) * 1000, "".join(parts).startswith("죄송합니다")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(ask(index) for index in range(clients)))
+    return time.perf_counter() - start, results
+
+
+def run(port: int, clients: int, questions: int, capacity: int, token_delay: float):
+    app = create_app(token_delay=token_delay, capacity=capacity)
+    with StubServer(app, port=port) as stub:
+        os.environ["DEEPSEEK_API_BASE"] = stub.api_base
+        os.environ.setdefault("DEEPSEEK_API_KEY", "stub-key")
+        # 클라이언트 쪽 제한을 공급자 한도보다 크게 두어 429가 나도록 합니다
+        os.environ.setdefault("FESTA_LLM_MAX_CONCURRENCY", str(capacity * 4))
+        os.environ.setdefault("FESTA_LLM_MAX_RETRIES", "3")
+        from app.utils.llm import DeepSeekAPI
+
+        for name in ("separate", "coalesced"):
+            app.state.requests = app.state.rate_limited = 0
+
+            async def measure():
+                llm = DeepSeekAPI()
+                if name == "separate":
+                    llm.flights = None
+                try:
+                    return await burst(llm, clients, questions)
+                finally:
+                    await llm.aclose()
+
+            elapsed, results = asyncio.run(measure())
+            first, total, failed = (np.array(column) for column in zip(*results))
+            print(f"{name:<10} first token p50={np.percentile(first, 50):7.1f}ms p95={np.percentile(first, 95):7.1f}ms  "
+                  f"total p95={np.percentile(total, 95):7.1f}ms  errors={failed.mean():6.1%}  "
+                  f"upstream calls={app.state.requests:<4} 429s={app.state.rate_limited:<4} wall={elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=3, help="서로 다른 질문 수")
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    args = parser.parse_args()
+    run(args.port, args.clients, args.questions, args.capacity, args.token_delay)
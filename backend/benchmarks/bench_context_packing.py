@@ -0,0 +1,70 @@
+"""검색 문맥 패킹 전후의 프롬프트 토큰 수와 패킹 시간 벤치마크.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_context_packing --docs 50 --budget 6000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.context_packer import pack_context
+from app.utils.database import Database
+from app.utils.retrieval import RetrievalEngine, format_context
+from app.utils.tokens import count_tokens
+from benchmarks.fixtures import make_sentence
+
+
+def run(docs: int, paragraphs: int, queries: int, k: int, budget: int):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "documents.db"))
+        engine = RetrievalEngine(str(Path(tmp) / "index"), database)
+
+        texts = []
+        for i in range(docs):
+            text = "\n\n".join(
+                " ".join(make_sentence(rng) for _ in range(6)) + f" topic{rng.randrange(docs)}"
+                for _ in range(paragraphs)
+            )
+            texts.append(text)
+            vector_id = f"doc{i}"
+            database.insert_document({
+                "title": f"Paper {i}", "original_filename": f"paper{i}.txt", "saved_filename": f"paper{i}.txt",
+                "file_path": f"/tmp/paper{i}.txt", "file_type": "txt", "upload_date": datetime.now().isoformat(),
+                "file_size": len(text), "text_length": len(text), "vector_id": vector_id,
+                "created_at": datetime.now(), "updated_at": datetime.now()
+            })
+            engine.index_document(vector_id, text)
+
+        raw_tokens, packed_tokens, pack_ms, selected = [], [], [], []
+        for _ in range(queries):
+            query = make_sentence(rng, 6) + f" topic{rng.randrange(docs)}"
+            retrieved = engine.search(query, k)
+            raw_tokens.append(sum(count_tokens(format_context(chunk)) for chunk in retrieved))
+
+            start = time.perf_counter()
+            packed, report = pack_context(retrieved, budget)
+            pack_ms.append((time.perf_counter() - start) * 1000)
+            packed_tokens.append(report["tokens"])
+            selected.append(report["selected"])
+
+        print(f"후보 {k}개 전체: 평균 {np.mean(raw_tokens):,.0f} tokens (최대 {max(raw_tokens):,})")
+        print(f"패킹 후 (예산 {budget:,}): 평균 {np.mean(packed_tokens):,.0f} tokens "
+              f"(최대 {max(packed_tokens):,}), 평균 청크 {np.mean(selected):.1f}개")
+        print(f"패킹 시간: p50={np.percentile(pack_ms, 50):.2f}ms  p95={np.percentile(pack_ms, 95):.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=6000)
+    args = parser.parse_args()
+    run(args.docs, args.paragraphs, args.queries, args.k, args.budget)
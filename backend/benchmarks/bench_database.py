@@ -0,0 +1,86 @@
+"""문서 조회 처리량 벤치마크: 호출마다 연결 vs 연결 풀.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_database --docs 2000 --lookups 20000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.utils.database import Database, AsyncDatabase
+
+
+def make_document(i: int) -> dict:
+    return {
+        "original_filename": f"paper_{i}.pdf",
+        "saved_filename": f"paper_{i}.pdf",
+        "file_path": f"/tmp/paper_{i}.pdf",
+        "file_type": "pdf",
+        "upload_date": datetime.now().isoformat(),
+        "file_size": 1024 + i,
+        "title": f"Synthetic paper {i}",
+        "authors": [f"Author {i}", "Coauthor"],
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+    }
+
+
+def per_call_connect_lookup(db_path: Path, doc_id: str):
+    """개선 전 방식: 조회마다 새 연결을 엽니다."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM documents WHERE id = ?', (doc_id,))
+        return cursor.fetchone()
+
+
+def report(name: str, count: int, elapsed: float):
+    print(f"{name:<28} {count / elapsed:>12,.0f} lookups/s  ({elapsed:.3f}s)")
+
+
+async def run_async(async_db: AsyncDatabase, ids, concurrency: int):
+    queue = list(ids)
+
+    async def worker():
+        while queue:
+            await async_db.get_document(queue.pop())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def run(docs: int, lookups: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        database = Database(str(db_path))
+        doc_ids = [database.insert_document(make_document(i)) for i in range(docs)]
+        rng = random.Random(0)
+        ids = [rng.choice(doc_ids) for _ in range(lookups)]
+
+        start = time.perf_counter()
+        for doc_id in ids:
+            per_call_connect_lookup(db_path, doc_id)
+        report("per-call connect", lookups, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for doc_id in ids:
+            database.get_document(doc_id)
+        report("pooled connection", lookups, time.perf_counter() - start)
+
+        async_db = AsyncDatabase(database)
+        start = time.perf_counter()
+        asyncio.run(run_async(async_db, ids, concurrency))
+        report(f"async facade (x{concurrency})", lookups, time.perf_counter() - start)
+        async_db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run(args.docs, args.lookups, args.concurrency)
@@ -0,0 +1,114 @@
+"""HTML/Markdown 텍스트 추출 벤치마크: 기존 BeautifulSoup(html.parser) 방식 vs 스트리밍 추출기.
+
+처리량(MB/s)과 추출 중 늘어난 최대 RSS를 잽니다. 최대 RSS는 되돌릴 수 없으므로 방식과 입력마다
+새 Python 프로세스에서 측정합니다. 최대 RSS는 Linux의 /proc/self/status(VmHWM)에서 읽습니다.
+기존 방식은 bs4와 markdown이 설치되어 있어야 합니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_html_extraction --paragraphs 20000
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.markup import html_file_to_text, markdown_file_to_text
+from benchmarks.fixtures import make_ar5iv_html, make_markdown
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def legacy_html(path: Path) -> str:
+    """document_processor에 있던 기존 HTML 추출 방식입니다."""
+    from bs4 import BeautifulSoup
+
+    with open(path, 'r', encoding='utf-8') as file:
+        return BeautifulSoup(file, 'html.parser').get_text()
+
+
+def legacy_markdown(path: Path) -> str:
+    """document_processor에 있던 기존 Markdown 추출 방식입니다 (HTML로 변환한 뒤 다시 파싱)."""
+    import markdown
+    from bs4 import BeautifulSoup
+
+    with open(path, 'r', encoding='utf-8') as file:
+        return BeautifulSoup(markdown.markdown(file.read()), 'html.parser').get_text()
+
+
+def peak_rss_kb() -> int:
+    """지금까지의 최대 RSS(KB)를 반환합니다.
+
+    getrusage의 ru_maxrss는 fork한 부모 프로세스의 값을 물려받을 수 있으므로 VmHWM을 읽습니다.
+    """
+    with open("/proc/self/status") as status:
+        return int(re.search(r"VmHWM:\s+(\d+)", status.read()).group(1))
+
+
+METHODS = {
+    "html": {"legacy": legacy_html, "streaming": html_file_to_text},
+    "md": {"legacy": legacy_markdown, "streaming": markdown_file_to_text},
+}
+
+
+def measure(kind: str, method: str, path: Path, repeat: int):
+    """현재 프로세스에서 한 방식을 측정해 JSON 한 줄로 출력합니다. (하위 프로세스용)"""
+    extract = METHODS[kind][method]
+    # 라이브러리를 가져오는 비용은 RSS 기준선에 넣습니다
+    if method == "legacy":
+        import bs4  # noqa: F401
+        import markdown  # noqa: F401
+    before = peak_rss_kb()
+    start = time.perf_counter()
+    text = extract(path)
+    first = time.perf_counter() - start
+    peak = peak_rss_kb()
+    times = [first]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        extract(path)
+        times.append(time.perf_counter() - start)
+    print(json.dumps({"seconds": min(times), "peak_kb": peak - before, "chars": len(text)}))
+
+
+def run_measure(kind: str, method: str, path: Path, repeat: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_html_extraction", "--measure", kind, method, str(path),
+         "--repeat", str(repeat)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--measure", nargs=3, metavar=("KIND", "METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        kind, method, path = args.measure
+        measure(kind, method, Path(path), args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [
+            ("html", make_ar5iv_html(Path(tmp) / "ar5iv.html", args.paragraphs)),
+            ("md", make_markdown(Path(tmp) / "paper.md", args.paragraphs)),
+        ]
+        inputs += [("html", path) for path in sorted((BACKEND_DIR / "data" / "papers").glob("*.html"))]
+        for kind, path in inputs:
+            size = path.stat().st_size
+            print(f"{path.name} ({size / 1024 / 1024:.1f} MB)")
+            for method in ("legacy", "streaming"):
+                result = run_measure(kind, method, path, args.repeat)
+                print(f"  {method:<10} {result['seconds'] * 1000:8.1f}ms  {size / result['seconds'] / 1e6:6.1f} MB/s  "
+                      f"peak +{result['peak_kb'] / 1024:6.1f} MB  chars={result['chars']}")
+
+
+if __name__ == "__main__":
+    main()
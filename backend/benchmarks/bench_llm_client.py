@@ -0,0 +1,87 @@
+"""동시 부하에서 LLM 클라이언트 비교: 요청마다 새 클라이언트 vs 공유 풀 + 제한 + 재시도.
+
+스텁 서버는 동시 처리 한도를 넘는 요청에 429를 반환하여 공급자 호출 제한을 흉내 냅니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_llm_client --requests 200 --concurrency 50 --capacity 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.stub_llm_server import StubServer, create_app
+
+
+async def naive_call(url: str) -> bool:
+    """개선 전 방식: 호출마다 새 클라이언트, 재시도와 동시 호출 제한 없음."""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json={"model": "deepseek-chat", "messages": []}, timeout=30.0)
+        return response.status_code == 200
+
+
+async def pooled_call(llm) -> bool:
+    response = await llm.generate_response("질문")
+    return not response.startswith("죄송합니다")
+
+
+async def load(call, requests: int, concurrency: int):
+    latencies, failures = [], 0
+    queue = list(range(requests))
+
+    async def worker():
+        nonlocal failures
+        while queue:
+            queue.pop()
+            start = time.perf_counter()
+            ok = await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, failures
+
+
+def report(name: str, elapsed: float, latencies, failures: int, upstream: int):
+    print(f"{name:<10} p50={np.percentile(latencies, 50):7.1f}ms  p95={np.percentile(latencies, 95):7.1f}ms  "
+          f"errors={failures / len(latencies):6.1%}  upstream calls={upstream:<5} wall={elapsed:.2f}s")
+
+
+def run(port: int, requests: int, concurrency: int, capacity: int, token_delay: float):
+    app = create_app(token_delay=token_delay, capacity=capacity)
+    with StubServer(app, port=port) as stub:
+        os.environ["DEEPSEEK_API_BASE"] = stub.api_base
+        os.environ.setdefault("DEEPSEEK_API_KEY", "stub-key")
+        os.environ.setdefault("FESTA_LLM_MAX_CONCURRENCY", str(capacity))
+        from app.utils.llm import DeepSeekAPI
+
+        url = f"{stub.api_base}/chat/completions"
+        result = asyncio.run(load(lambda: naive_call(url), requests, concurrency))
+        report("naive", *result, app.state.requests)
+
+        app.state.requests = 0
+
+        async def pooled():
+            llm = DeepSeekAPI()
+            try:
+                return await load(lambda: pooled_call(llm), requests, concurrency)
+            finally:
+                await llm.aclose()
+
+        result = asyncio.run(pooled())
+        report("pooled", *result, app.state.requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    args = parser.parse_args()
+    run(args.port, args.requests, args.concurrency, args.capacity, args.token_delay)
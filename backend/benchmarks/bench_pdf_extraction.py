@@ -0,0 +1,46 @@
+"""PDF 페이지 병렬 추출 벤치마크.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_pdf_extraction --pages 400
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.document_processor import DocumentProcessor
+from benchmarks.fixtures import make_pdf
+
+
+def run(pages: int, max_workers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(Path(tmp) / "synthetic.pdf", pages)
+        print(f"합성 PDF: {pages} 페이지, {pdf_path.stat().st_size / 1024:.0f} KB")
+
+        workers = 1
+        baseline = None
+        while workers <= max_workers:
+            base_dir = Path(tmp) / f"run_{workers}"
+            processor = DocumentProcessor(str(base_dir), pdf_workers=workers, use_page_cache=True)
+
+            start = time.perf_counter()
+            text = processor.extract_text(pdf_path)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            processor.extract_text(pdf_path)
+            warm = time.perf_counter() - start
+
+            baseline = baseline or cold
+            print(f"workers={workers:<3} cold={cold:7.3f}s  speedup={baseline / cold:5.2f}x  "
+                  f"cached={warm:7.3f}s  chars={len(text)}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.pages, args.max_workers)
@@ -0,0 +1,59 @@
+"""검색 인덱스 구축 시간과 질의 지연 시간 벤치마크.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_retrieval --chunks 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.utils.retrieval import HashingEmbedder, VectorIndex
+from benchmarks.fixtures import make_sentence
+
+
+def run(chunks: int, dim: int, queries: int, k: int):
+    rng = random.Random(0)
+    texts = [" ".join(make_sentence(rng) for _ in range(10)) + f" topic{i}" for i in range(chunks)]
+    embedder = HashingEmbedder(dim)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, dim)
+
+        start = time.perf_counter()
+        for i in range(0, chunks, 1024):
+            index.add(embedder.embed(texts[i:i + 1024]))
+        build = time.perf_counter() - start
+        print(f"인덱스 구축: {chunks:,}개 청크, {build:.2f}s ({chunks / build:,.0f} chunks/s)")
+
+        query_texts = [texts[rng.randrange(chunks)] for _ in range(queries)]
+        query_vectors = embedder.embed(query_texts)
+
+        latencies = []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            index.search(vector, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"단일 질의: p50={np.percentile(latencies, 50):.2f}ms  p95={np.percentile(latencies, 95):.2f}ms")
+
+        start = time.perf_counter()
+        results = index.search(query_vectors, k)
+        batch = (time.perf_counter() - start) * 1000
+        print(f"배치 질의 ({queries}개): {batch:.2f}ms ({batch / queries:.2f}ms/query)")
+
+        recall = np.mean([
+            any(texts[row] == text for row, _ in hits) for text, hits in zip(query_texts, results)
+        ])
+        print(f"자기 자신 재현율@{k}: {recall:.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.chunks, args.dim, args.queries, args.k)
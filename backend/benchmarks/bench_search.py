@@ -0,0 +1,68 @@
+"""문서 검색 지연 시간 벤치마크: LIKE 스캔 vs FTS5(BM25).
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_search --docs 20000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.utils.database import Database
+from benchmarks.fixtures import WORDS, make_sentence
+
+
+def populate(database: Database, processed_dir: Path, docs: int):
+    rng = random.Random(0)
+    for i in range(docs):
+        processed_file = processed_dir / f"processed_{i}.txt"
+        # 흔한 단어와 드문 주제어를 섞어 실제 말뭉치와 비슷한 분포를 만듭니다
+        topics = " ".join(f"topic{rng.randint(0, docs)}" for _ in range(5))
+        processed_file.write_text(" ".join(make_sentence(rng) for _ in range(40)) + " " + topics, encoding="utf-8")
+        database.insert_document({
+            "original_filename": f"paper_{i}.pdf",
+            "saved_filename": f"paper_{i}.pdf",
+            "file_path": f"/tmp/paper_{i}.pdf",
+            "file_type": "pdf",
+            "upload_date": datetime.now().isoformat(),
+            "file_size": 1024,
+            "processed_file": str(processed_file),
+            "title": make_sentence(rng, 8),
+            "abstract": make_sentence(rng, 40),
+            "keywords": rng.sample(WORDS, 3),
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        })
+
+
+def time_queries(search, queries, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            search(query, 10)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1000
+
+
+def run(docs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        start = time.perf_counter()
+        populate(database, Path(tmp), docs)
+        print(f"{docs}개 문서 삽입: {time.perf_counter() - start:.2f}s")
+
+        queries = ["attention", "retrieval latency", "topic42", "topic7 gradient", f"topic{docs // 2}"]
+        print(f"{'query':<24} {'LIKE ms':>10} {'FTS5 ms':>10} {'FTS5 hits':>10}")
+        for query in queries:
+            like_ms = time_queries(database._search_documents_like, [query])
+            fts_ms = time_queries(database.search_documents, [query])
+            hits = len(database.search_documents(query, docs))
+            print(f"{query:<24} {like_ms:10.2f} {fts_ms:10.2f} {hits:10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.docs)
@@ -0,0 +1,113 @@
+"""애플리케이션 시작 비용 측정: app.main import 시간과 프로세스 시작부터 첫 요청 응답까지 걸리는 시간.
+
+매번 새 Python 프로세스에서 측정합니다. 비교용으로 지연 로딩하는 추출 라이브러리와 httpx, uvicorn을
+미리 가져온 뒤 app.main을 가져오는 경우(이전처럼 모두 즉시 가져올 때의 비용)도 측정합니다.
+첫 요청은 빈 data 디렉토리를 가진 backend 사본에서 uvicorn을 띄워 GET /documents가 응답할 때까지 잽니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import List
+
+from app.utils.document_processor import EXTRACTOR_MODULES
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+{preload}
+import app.main
+print(time.perf_counter() - start)
+"""
+
+
+def _env(root: Path) -> dict:
+    env = dict(os.environ, PYTHONPATH=str(root), FESTA_GC_INTERVAL="0", FESTA_LOG_LEVEL="WARNING")
+    env.setdefault("DEEPSEEK_API_KEY", "bench-key")
+    return env
+
+
+def measure_import(root: Path, preload: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(preload=preload)],
+        cwd=root, env=_env(root), capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(root: Path, warmup: bool, timeout: float = 30.0) -> float:
+    """uvicorn 프로세스를 띄운 시각부터 GET /documents가 200으로 응답할 때까지의 시간(초)을 반환합니다."""
+    port = _free_port()
+    env = dict(_env(root), FESTA_WARMUP="1" if warmup else "0")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/documents?limit=1", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("서버가 제시간에 응답하지 않았습니다.")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def make_root(tmp: Path) -> Path:
+    """데이터 없이 코드만 있는 backend 사본을 만듭니다."""
+    root = tmp / "backend"
+    for name in ("app", "static", "templates"):
+        shutil.copytree(BACKEND_DIR / name, root / name, ignore=shutil.ignore_patterns("__pycache__"))
+    return root
+
+
+def summarize(name: str, samples: List[float]):
+    print(f"{name:<38} median={statistics.median(samples) * 1000:7.1f}ms  min={min(samples) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    eager = "import " + ", ".join(EXTRACTOR_MODULES + ("httpx", "uvicorn"))
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_root(Path(tmp))
+        # 첫 실행은 .pyc 생성 비용이 섞이므로 버립니다
+        measure_import(root, "")
+
+        summarize("import app.main", [measure_import(root, "") for _ in range(args.runs)])
+        summarize("import app.main (eager back-ends)", [measure_import(root, eager) for _ in range(args.runs)])
+        for warmup in (False, True):
+            samples = []
+            for _ in range(args.runs):
+                shutil.rmtree(root / "data", ignore_errors=True)
+                samples.append(measure_first_request(root, warmup))
+            summarize(f"first request (warm-up {'on' if warmup else 'off'})", samples)
+
+
+if __name__ == "__main__":
+    main()
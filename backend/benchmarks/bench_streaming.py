@@ -0,0 +1,47 @@
+"""첫 토큰까지의 시간(TTFT) 벤치마크: 일반 응답 vs SSE 스트리밍.
+
+로컬 스텁 서버를 띄워 측정하므로 네트워크나 API 키가 필요하지 않습니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_streaming --token-delay 0.02
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.stub_llm_server import StubServer, create_app
+
+
+async def measure(llm, rounds: int):
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await llm.generate_response("질문")
+        total = time.perf_counter() - start
+        print(f"non-stream  TTFT={total * 1000:8.1f}ms  total={total * 1000:8.1f}ms")
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        first = None
+        async for _delta in llm.stream_response("질문"):
+            if first is None:
+                first = time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"stream      TTFT={first * 1000:8.1f}ms  total={total * 1000:8.1f}ms")
+
+
+def run(port: int, token_delay: float, rounds: int):
+    with StubServer(create_app(token_delay=token_delay), port=port) as stub:
+        os.environ["DEEPSEEK_API_BASE"] = stub.api_base
+        os.environ.setdefault("DEEPSEEK_API_KEY", "stub-key")
+        from app.utils.llm import DeepSeekAPI
+        asyncio.run(measure(DeepSeekAPI(), rounds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    run(args.port, args.token_delay, args.rounds)
@@ -0,0 +1,83 @@
+"""처리된 본문 저장 방식 비교: 일반 텍스트 파일 vs 구간별 압축 저장소(text_store).
+
+디스크 크기, 저장 시간, 전체 읽기 시간과 인용 길이(기본 800자) 구간을 무작위로 읽는 시간을 잽니다.
+일반 텍스트는 구간 하나를 읽을 때도 파일 전체를 읽습니다. 압축 저장소는 열어 둔 파일(open_processed_text)에서
+읽는 경우와 매번 새로 여는 경우를 모두 잽니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.bench_text_store --paragraphs 200,2000,20000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.markup import markdown_file_to_text
+from app.utils.text_store import ProcessedText, open_processed_text, read_processed_text, write_processed_text
+from benchmarks.fixtures import make_markdown
+
+
+def best_of(repeat: int, function) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(paragraphs: int, span: int, lookups: int, repeat: int, tmp: Path):
+    text = markdown_file_to_text(make_markdown(tmp / f"paper-{paragraphs}.md", paragraphs))
+    plain = tmp / f"processed-{paragraphs}.txt"
+    store = tmp / f"processed-{paragraphs}.txtz"
+
+    plain_write = best_of(repeat, lambda: plain.write_text(text, encoding='utf-8'))
+    store_write = best_of(repeat, lambda: write_processed_text(store, text))
+    plain_read = best_of(repeat, lambda: plain.read_text(encoding='utf-8'))
+    store_read = best_of(repeat, lambda: read_processed_text(store))
+    assert read_processed_text(store) == text
+
+    rng = random.Random(0)
+    starts = [rng.randrange(max(1, len(text) - span)) for _ in range(lookups)]
+
+    def plain_spans():
+        for start in starts:
+            plain.read_text(encoding='utf-8')[start:start + span]
+
+    def store_spans_cached():
+        for start in starts:
+            open_processed_text(store).read(start, start + span)
+
+    def store_spans_opened():
+        for start in starts:
+            with ProcessedText(store) as processed:
+                processed.read(start, start + span)
+
+    per_lookup = {
+        name: best_of(repeat, function) / lookups * 1e6
+        for name, function in (("plain", plain_spans), ("cached", store_spans_cached), ("opened", store_spans_opened))
+    }
+    plain_size, store_size = plain.stat().st_size, store.stat().st_size
+    print(f"{len(text) / 1024:9.0f} KB text  disk {plain_size / 1024:8.0f} KB -> {store_size / 1024:7.0f} KB "
+          f"({store_size / plain_size:5.1%})  write {plain_write * 1000:6.1f} -> {store_write * 1000:6.1f}ms  "
+          f"full read {plain_read * 1000:6.1f} -> {store_read * 1000:6.1f}ms")
+    print(f"{'':14} {span}-char span: plain {per_lookup['plain']:8.1f}us  store (open) {per_lookup['cached']:6.1f}us  "
+          f"store (reopen) {per_lookup['opened']:6.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", default="200,2000,20000", help="쉼표로 구분한 문서 크기(문단 수) 목록")
+    parser.add_argument("--span", type=int, default=800)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for paragraphs in (int(value) for value in args.paragraphs.split(",")):
+            run(paragraphs, args.span, args.lookups, args.repeat, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""벤치마크용 합성 문서 생성기."""
+import random
+from pathlib import Path
+
+WORDS = (
+    "transformer attention retrieval augmented generation language model "
+    "embedding vector index latency throughput benchmark corpus dataset "
+    "evaluation gradient optimization convergence theorem proof lemma "
+    "experiment baseline ablation accuracy precision recall citation"
+).split()
+
+
+def make_sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_pdf(path: Path, pages: int, lines_per_page: int = 40, seed: int = 0) -> Path:
+    """텍스트가 들어 있는 합성 PDF를 생성합니다."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # 페이지 트리는 페이지 객체 번호가 정해진 뒤 채웁니다
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1}"] + [make_sentence(rng) for _ in range(lines_per_page)]
+        stream = ["BT /F1 10 Tf 12 TL 40 800 Td"]
+        for line in lines:
+            stream.append(f"({line}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1")
+
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    path.write_bytes(bytes(out))
+    return path
+
+
+def make_html(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """제목, 문단, 스크립트/스타일이 섞인 합성 HTML 문서를 생성합니다."""
+    rng = random.Random(seed)
+    body = "".join(
+        (f"<h2>{make_sentence(rng, 4)}</h2>" if i % 10 == 0 else "") + f"<p>{make_sentence(rng, 40)}</p>"
+        for i in range(paragraphs)
+    )
+    path.write_text(
+        "<html><head><title>Synthetic paper</title><style>p { margin: 0 }</style>"
+        "<script>var x = 1;</script></head>"
+        f"<body><nav>Home | About</nav><h1>Synthetic paper</h1>{body}</body></html>",
+        encoding="utf-8"
+    )
+    return path
+
+
+def make_ar5iv_html(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """ar5iv처럼 중첩된 div/span, MathML 수식, 내비게이션, 긴 스타일 시트가 있는 합성 논문 HTML을 생성합니다."""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Synthetic paper</title>",
+        "<style>" + "".join(f".ltx_c{i} {{ margin: {i}px; }}\n" for i in range(2000)) + "</style>",
+        "<script>" + "var x = 1;\n" * 2000 + "</script></head><body>",
+        "<nav class=\"ltx_page_navbar\">" + "".join(f"<a href=\"#S{i}\">Section {i}</a>" for i in range(50)) + "</nav>",
+        "<div class=\"ltx_page_main\"><article class=\"ltx_document\"><h1 class=\"ltx_title\">Synthetic paper</h1>",
+    ]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"<section id=\"S{i}\" class=\"ltx_section\"><h2 class=\"ltx_title\">"
+                         f"<span class=\"ltx_tag\">{i // 10 + 1} </span>{make_sentence(rng, 4)}</h2>")
+        math = (f"<math alttext=\"x_{{{i}}}^2\" display=\"inline\"><semantics><msubsup><mi>x</mi><mn>{i}</mn>"
+                f"<mn>2</mn></msubsup><annotation encoding=\"application/x-tex\">x_{{{i}}}^2</annotation>"
+                "</semantics></math>")
+        parts.append(f"<div class=\"ltx_para\"><p class=\"ltx_p\">{make_sentence(rng, 20)} {math} "
+                     f"<span class=\"ltx_text ltx_font_italic\">{make_sentence(rng, 20)}</span>.</p></div>")
+        if i % 10 == 9:
+            parts.append("</section>")
+    parts.append("</article></div><footer class=\"ltx_page_footer\">Generated by LaTeXML</footer></body></html>")
+    path.write_text("".join(parts), encoding="utf-8")
+    return path
+
+
+def make_markdown(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """제목과 문단, 목록이 섞인 합성 Markdown 문서를 생성합니다."""
+    rng = random.Random(seed)
+    parts = ["# Synthetic paper"]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"## {make_sentence(rng, 4)}")
+        parts.append(make_sentence(rng, 40) if i % 5 else f"- {make_sentence(rng, 10)}\n- *{make_sentence(rng, 5)}*")
+    path.write_text("\n\n".join(parts), encoding="utf-8")
+    return path
+
+
+def make_latex(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """섹션, 수식, 인용이 섞인 합성 LaTeX 문서를 생성합니다."""
+    rng = random.Random(seed)
+    parts = [
+        "\\documentclass{article}", "\\title{Synthetic paper}", "\\author{A. Author}",
+        "\\begin{document}", "\\maketitle",
+        f"\\begin{{abstract}}{make_sentence(rng, 30)}\\end{{abstract}}"
+    ]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"\\section{{{make_sentence(rng, 3)}}}")
+        parts.append(f"{make_sentence(rng, 40)} $x_{{{i}}}^2$ \\cite{{ref{i}}}.")
+    parts.append("\\end{document}")
+    path.write_text("\n\n".join(parts), encoding="utf-8")
+    return path
+
+
+def make_text(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """일반 텍스트 문서를 생성합니다."""
+    rng = random.Random(seed)
+    path.write_text("\n\n".join(make_sentence(rng, 40) for _ in range(paragraphs)), encoding="utf-8")
+    return path
@@ -0,0 +1,142 @@
+"""DeepSeek(OpenAI 호환) chat completions API를 흉내 내는 로컬 스텁 서버.
+
+오프라인 테스트와 벤치마크용으로, 일반 응답과 SSE 스트리밍 응답을 모두 지원합니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.stub_llm_server --port 8001 --token-delay 0.02
+    DEEPSEEK_API_BASE=http://127.0.0.1:8001/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANSWER = (
+    "스텁 서버의 응답입니다. 질문을 잘 받았습니다.\n"
+    "수식 예시: $E = mc^2$\n"
+    "```python\nprint('hello')\n```\n"
+    "이상입니다."
+)
+
+
+def create_app(token_delay: float = 0.02, first_token_delay: float = 0.0, answer: str = DEFAULT_ANSWER,
+               capacity: int = 0, retry_after: float = 0.1) -> FastAPI:
+    """스텁 API 애플리케이션을 생성합니다.
+
+    capacity가 0보다 크면 동시에 처리 중인 요청이 그 수를 넘을 때 429를 반환해
+    공급자의 호출 제한을 흉내 냅니다.
+    """
+    app = FastAPI(title="DeepSeek stub")
+    app.state.requests = 0
+    app.state.rate_limited = 0
+    app.state.in_flight = 0
+
+    def tokenize(text: str):
+        # 공백을 포함한 작은 조각으로 나누어 토큰처럼 보냅니다
+        tokens, current = [], ""
+        for char in text:
+            current += char
+            if char in " \n":
+                tokens.append(current)
+                current = ""
+        if current:
+            tokens.append(current)
+        return tokens
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        app.state.requests += 1
+        if capacity and app.state.in_flight >= capacity:
+            app.state.rate_limited += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)}
+            )
+        payload = await request.json()
+        model = payload.get("model", "deepseek-chat")
+        tokens = tokenize(answer)
+        created = int(time.time())
+
+        if not payload.get("stream"):
+            app.state.in_flight += 1
+            try:
+                await asyncio.sleep(first_token_delay + token_delay * len(tokens))
+            finally:
+                app.state.in_flight -= 1
+            return JSONResponse({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}]
+            })
+
+        # 동시에 몰린 요청이 모두 한도 검사를 통과하지 않도록 응답 본문을 보내기 전에 처리 중으로 셉니다
+        app.state.in_flight += 1
+
+        async def events():
+            try:
+                async for event in token_events():
+                    yield event
+            finally:
+                app.state.in_flight -= 1
+
+        async def token_events():
+            await asyncio.sleep(first_token_delay)
+            for token in tokens:
+                await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class StubServer:
+    """테스트와 벤치마크에서 스텁 서버를 백그라운드 스레드로 실행합니다."""
+
+    def __init__(self, app: FastAPI, port: int = 8001):
+        self.app = app
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=0, help="동시 처리 한도 (초과 시 429, 0이면 무제한)")
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    args = parser.parse_args()
+    app = create_app(args.token_delay, args.first_token_delay, capacity=args.capacity, retry_after=args.retry_after)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,238 @@
+"""추출, 메타데이터, 저장, 검색, 응답 파싱 핫 패스의 마이크로벤치마크 모음.
+
+합성 문서를 여러 크기로 생성해 각 경로의 연산당 시간을 측정하고 JSON으로 저장합니다.
+기준 결과(baseline)를 지정하면 비교하여 허용 범위보다 느려진 항목이 있을 때 종료 코드 1로 끝납니다.
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.suite --sizes small,medium --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --sizes small,medium --baseline benchmarks/baseline.json --output results.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app.utils.block_parser import parse_blocks
+from app.utils.database import Database
+from app.utils.document_processor import DocumentProcessor
+from app.utils.metadata import extract_metadata
+from benchmarks.bench_block_parser import make_answer
+from benchmarks.bench_database import make_document
+from benchmarks.bench_search import populate
+from benchmarks.fixtures import WORDS, make_html, make_latex, make_markdown, make_pdf, make_text
+
+# 크기별 설정: 말뭉치 문서 수, 추출 문서 크기(문단 수/PDF 쪽수), 응답 크기(바이트)
+SIZES = {
+    "small": {"docs": 100, "paragraphs": 50, "pages": 5, "answer": 10_000},
+    "medium": {"docs": 1000, "paragraphs": 500, "pages": 50, "answer": 100_000},
+    "large": {"docs": 10000, "paragraphs": 5000, "pages": 200, "answer": 1_000_000},
+}
+
+# 기본 허용 범위: 기준보다 25% 넘게 느려지면 회귀로 판단합니다
+DEFAULT_TOLERANCE = 0.25
+
+
+def measure(func: Callable[[], Any], repeat: int, ops: int = 1, min_time: float = 0.05) -> Dict[str, float]:
+    """func의 연산당 시간(초)을 측정합니다.
+
+    timeit처럼 표본 하나가 min_time 이상 걸리도록 반복 횟수를 정한 뒤 repeat개의 표본을 모읍니다.
+    잡음의 영향을 덜 받는 최솟값을 비교에 사용하고, 중앙값은 참고용으로 함께 기록합니다.
+    """
+    def sample(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    number = 1
+    while True:
+        elapsed = sample(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    samples = [elapsed / number / ops] + [sample(number) / number / ops for _ in range(repeat - 1)]
+    return {"min": min(samples), "median": statistics.median(samples), "repeat": repeat, "number": number}
+
+
+def calibrate() -> float:
+    """기계 속도를 가늠하기 위한 고정된 순수 파이썬 작업 시간입니다. 기계 간 비교 보정에 씁니다."""
+    def work():
+        total = 0
+        for i in range(200_000):
+            total += i * i % 7
+        return total
+    return measure(work, repeat=5)["min"]
+
+
+def bench_extractors(tmp: Path, size: Dict[str, int], repeat: int) -> Dict[str, Dict[str, float]]:
+    processor = DocumentProcessor(str(tmp / "extract"), pdf_workers=1, use_page_cache=False)
+    paragraphs = size["paragraphs"]
+    fixtures = {
+        "pdf": make_pdf(tmp / "paper.pdf", pages=size["pages"]),
+        "html": make_html(tmp / "paper.html", paragraphs),
+        "md": make_markdown(tmp / "paper.md", paragraphs),
+        "tex": make_latex(tmp / "paper.tex", paragraphs),
+        "txt": make_text(tmp / "paper.txt", paragraphs),
+    }
+    results = {}
+    for file_type, path in fixtures.items():
+        results[f"extract.{file_type}"] = measure(lambda path=path: processor.extract_text(path), repeat)
+        text = processor.extract_text(path)
+        results[f"metadata.{file_type}"] = measure(lambda path=path, text=text: extract_metadata(path, text), repeat)
+    return results
+
+
+def bench_database(tmp: Path, size: Dict[str, int], repeat: int) -> Dict[str, Dict[str, float]]:
+    docs = size["docs"]
+    results = {}
+    counter = iter(range(10 ** 9))
+
+    def insert_single():
+        database = Database(str(tmp / f"insert_{next(counter)}.db"))
+        for i in range(docs):
+            database.insert_document(make_document(i))
+        database.close()
+
+    def insert_batched():
+        database = Database(str(tmp / f"insert_{next(counter)}.db"))
+        for i in range(0, docs, 200):
+            database.insert_documents([make_document(j) for j in range(i, min(i + 200, docs))])
+        database.close()
+
+    results["db.insert_document"] = measure(insert_single, repeat, ops=docs)
+    results["db.insert_documents"] = measure(insert_batched, repeat, ops=docs)
+
+    processed_dir = tmp / "processed"
+    processed_dir.mkdir(exist_ok=True)
+    database = Database(str(tmp / "corpus.db"))
+    populate(database, processed_dir, docs)
+    with database._connect() as conn:
+        doc_ids = [row[0] for row in conn.execute('SELECT id FROM documents')]
+
+    rng = random.Random(0)
+    lookups = [rng.choice(doc_ids) for _ in range(1000)]
+    results["db.get_document"] = measure(
+        lambda: [database.get_document(doc_id) for doc_id in lookups], repeat, ops=len(lookups)
+    )
+
+    queries = [" ".join(rng.sample(WORDS, 2)) for _ in range(25)] + [f"topic{rng.randrange(docs)}" for _ in range(25)]
+    results["db.search_documents"] = measure(
+        lambda: [database.search_documents(query, 10) for query in queries], repeat, ops=len(queries)
+    )
+
+    def list_all_pages():
+        cursor, pages = None, 0
+        while True:
+            page = database.list_documents(limit=50, cursor=cursor)
+            pages += 1
+            cursor = page["next_cursor"]
+            if not cursor:
+                return pages
+
+    pages = list_all_pages()
+    results["db.list_documents"] = measure(list_all_pages, repeat, ops=pages)
+    database.close()
+    return results
+
+
+def bench_block_parser(size: Dict[str, int], repeat: int) -> Dict[str, Dict[str, float]]:
+    answer = make_answer(size["answer"])
+    return {"block_parser.parse_blocks": measure(lambda: parse_blocks(answer), repeat)}
+
+
+def run_suite(sizes: List[str], repeat: int) -> Dict[str, Any]:
+    # 실행 중 기계 속도가 달라질 수 있으므로 보정 작업은 앞뒤로 한 번씩 측정해 평균을 냅니다
+    calibration = calibrate()
+    results = {}
+    for size_name in sizes:
+        size = SIZES[size_name]
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            for group in (
+                bench_extractors(tmp, size, repeat),
+                bench_database(tmp, size, repeat),
+                bench_block_parser(size, repeat),
+            ):
+                for name, result in group.items():
+                    key = f"{name}[{size_name}]"
+                    results[key] = result
+                    print(f"{key:<40} {result['min'] * 1e6:>12,.1f} us/op")
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "calibration": (calibration + calibrate()) / 2,
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, normalize: bool) -> List[str]:
+    """기준 결과와 비교해 표를 출력하고 회귀한 항목 이름 목록을 반환합니다."""
+    scale = 1.0
+    if normalize and baseline["meta"].get("calibration"):
+        scale = current["meta"]["calibration"] / baseline["meta"]["calibration"]
+        print(f"\n기계 속도 보정 계수: {scale:.2f}")
+
+    regressions = []
+    print(f"\n{'항목':<40} {'기준 us/op':>12} {'현재 us/op':>12} {'변화':>8}")
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<40} {'-':>12} {result['min'] * 1e6:>12,.1f} {'new':>8}")
+            continue
+        expected = base["min"] * scale
+        change = result["min"] / expected - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40} {expected * 1e6:>12,.1f} {result['min'] * 1e6:>12,.1f} {change:>+8.1%}{flag}")
+    for key in baseline["results"].keys() - current["results"].keys():
+        print(f"{key:<40} (이번 실행에서 측정하지 않음)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium", help=f"쉼표로 구분한 크기 ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", type=Path, help="비교할 기준 결과 JSON 파일")
+    parser.add_argument("--save-baseline", type=Path, help="이번 결과를 기준 결과로 저장")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="허용하는 속도 저하 비율")
+    parser.add_argument("--normalize", action="store_true", help="보정 작업 시간으로 기계 간 속도 차이를 보정")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"알 수 없는 크기: {', '.join(unknown)}")
+
+    current = run_suite(sizes, args.repeat)
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"결과 저장: {path}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.tolerance, args.normalize)
+        if regressions:
+            print(f"\n성능 회귀 {len(regressions)}건 (허용 범위 {args.tolerance:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
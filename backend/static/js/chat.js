@@ -68,8 +68,14 @@ function connectWebSocket() {
         const data = JSON.parse(event.data);
         
         switch (data.type) {
+            case 'delta':
+                hideTypingIndicator();
+                appendDelta(data.content);
+                break;
+                
             case 'message':
                 hideTypingIndicator();
+                removeStreamingMessage();
                 appendMessage('assistant', data.content, data.model);
                 if (data.sources && data.sources.length > 0) {
                     appendSources(data.sources);
@@ -80,10 +86,17 @@ function connectWebSocket() {
                 
             case 'error':
                 hideTypingIndicator();
+                removeStreamingMessage();
                 appendMessage('system', data.content);
                 isWaitingResponse = false;
                 break;
                 
+            case 'cancelled':
+                hideTypingIndicator();
+                removeStreamingMessage();
+                isWaitingResponse = false;
+                break;
+                
             case 'reconnect_token':
                 reconnectToken = data.token;
                 localStorage.setItem('reconnectToken', reconnectToken);
@@ -352,6 +365,35 @@ function appendMessage(role, content, model = null) {
     });
 }
 
+// 스트리밍 중인 응답 표시 (완료되면 구조화된 메시지로 교체)
+function appendDelta(text) {
+    const chatMessages = document.getElementById('chat-messages');
+    let contentDiv = document.querySelector('#streaming-message .message-content');
+    
+    if (!contentDiv) {
+        const messageDiv = document.createElement('div');
+        messageDiv.id = 'streaming-message';
+        messageDiv.className = 'message assistant-message';
+        contentDiv = document.createElement('div');
+        contentDiv.className = 'message-content markdown-content';
+        contentDiv.style.whiteSpace = 'pre-wrap';
+        messageDiv.appendChild(contentDiv);
+        chatMessages.appendChild(messageDiv);
+    }
+    
+    contentDiv.appendChild(document.createTextNode(text));
+    requestAnimationFrame(() => {
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    });
+}
+
+function removeStreamingMessage() {
+    const streamingMessage = document.getElementById('streaming-message');
+    if (streamingMessage) {
+        streamingMessage.remove();
+    }
+}
+
 // 참조 문서 표시
 function appendSources(sources) {
     if (!sources || sources.length === 0) return;
@@ -591,6 +633,9 @@ document.addEventListener('DOMContentLoaded', () => {
     messageInput.addEventListener('keydown', (e) => {
         if (e.key === 'Enter' && !e.shiftKey && !isWaitingResponse) {
             sendMessageHandler(e);
+        } else if (e.key === 'Escape' && isWaitingResponse && ws && ws.readyState === WebSocket.OPEN) {
+            // 답변 생성을 중단합니다
+            ws.send(JSON.stringify({ type: 'cancel' }));
         }
     });
     
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from app.utils.block_parser import BlockParser, parse_blocks
+
+ANSWER = """논문의 핵심 아이디어는 다음과 같습니다. 손실은 $L = -\\log p$ 로 정의합니다.
+
+$$
+\\mathrm{Attention}(Q, K, V) =
+\\mathrm{softmax}\\left(\\frac{QK^T}{\\sqrt{d_k}}\\right) V
+$$
+
+구현 예시입니다:
+```python
+def attention(q, k, v):
+    return softmax(q @ k.T) @ v
+```
+한 줄 수식 $$E = mc^2$$ 뒤에 이어지는 설명입니다."""
+
+UNTERMINATED = """설명입니다.
+```bash
+pip install festa
+python -m app.utils.bulk_ingestion papers.zip"""
+
+
+def feed_in_chunks(text: str, sizes):
+    """sizes 길이만큼 잘라 넣은 증분 파싱 결과를 반환합니다."""
+    parser = BlockParser()
+    blocks, position = [], 0
+    for size in sizes:
+        blocks.extend(parser.feed(text[position:position + size]))
+        position += size
+    blocks.extend(parser.feed(text[position:]))
+    return blocks + parser.close()
+
+
+def random_sizes(text: str, seed: int):
+    rng = random.Random(seed)
+    sizes, total = [], 0
+    while total < len(text):
+        size = rng.randint(1, 12)
+        sizes.append(size)
+        total += size
+    return sizes
+
+
+def test_parse_blocks_splits_text_code_and_math():
+    assert parse_blocks(ANSWER) == [
+        {"type": "text", "content": "논문의 핵심 아이디어는 다음과 같습니다. 손실은 "},
+        {"type": "math", "display": False, "content": "L = -\\log p"},
+        {"type": "text", "content": " 로 정의합니다."},
+        {"type": "math", "display": True,
+         "content": "\\mathrm{Attention}(Q, K, V) =\n\\mathrm{softmax}\\left(\\frac{QK^T}{\\sqrt{d_k}}\\right) V"},
+        {"type": "text", "content": "구현 예시입니다:"},
+        {"type": "code", "language": "python", "content": "def attention(q, k, v):\n    return softmax(q @ k.T) @ v"},
+        {"type": "text", "content": "한 줄 수식 "},
+        {"type": "math", "display": True, "content": "E = mc^2"},
+        {"type": "text", "content": " 뒤에 이어지는 설명입니다."},
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_fixed_chunk_sizes_match_whole_parse(size):
+    assert feed_in_chunks(ANSWER, [size] * (len(ANSWER) // size)) == parse_blocks(ANSWER)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunk_sizes_match_whole_parse(seed):
+    assert feed_in_chunks(ANSWER, random_sizes(ANSWER, seed)) == parse_blocks(ANSWER)
+
+
+def test_display_math_spanning_chunks():
+    text = "앞\n$$\na +\nb\n$$\n뒤"
+    split = text.index("b")
+    expected = [
+        {"type": "text", "content": "앞"},
+        {"type": "math", "display": True, "content": "a +\nb"},
+        {"type": "text", "content": "뒤"},
+    ]
+
+    assert parse_blocks(text) == expected
+    # $$ 구분자 자체가 두 조각으로 나뉘는 경우도 포함합니다
+    assert feed_in_chunks(text, [2, 1, split - 3, 3]) == expected
+
+
+def test_feed_returns_blocks_only_after_they_complete():
+    parser = BlockParser()
+
+    assert parser.feed("```py") == []
+    assert parser.feed("thon\nx = 1\n") == []
+    assert parser.feed("``") == []
+    assert parser.feed("`\n") == [{"type": "code", "language": "python", "content": "x = 1"}]
+    assert parser.feed("끝") == []
+    assert parser.close() == [{"type": "text", "content": "끝"}]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_unterminated_code_fence_is_emitted_on_close(seed):
+    expected = [
+        {"type": "text", "content": "설명입니다."},
+        {"type": "code", "language": "bash",
+         "content": "pip install festa\npython -m app.utils.bulk_ingestion papers.zip"},
+    ]
+
+    assert parse_blocks(UNTERMINATED) == expected
+    assert feed_in_chunks(UNTERMINATED, random_sizes(UNTERMINATED, seed)) == expected
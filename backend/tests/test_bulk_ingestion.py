@@ -0,0 +1,79 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.utils.bulk_ingestion import BulkIngestor
+from app.utils.database import Database
+from app.utils.document_processor import DocumentProcessor
+
+
+class ResultExecutor:
+    """작업 프로세스 대신 미리 정한 (저장 정보, 처리 결과)를 차례로 돌려주는 실행기입니다."""
+
+    def __init__(self, results, on_submit=None):
+        self.results = iter(results)
+        self.on_submit = on_submit
+        self.submitted = 0
+
+    def submit(self, function, *args):
+        if self.on_submit is not None:
+            self.on_submit(self.submitted)
+        self.submitted += 1
+        future = Future()
+        future.set_result(next(self.results))
+        return future
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return DocumentProcessor(str(tmp_path))
+
+
+@pytest.fixture
+def database(processor):
+    database = Database(str(processor.db_dir / "documents.db"))
+    yield database
+    database.close()
+
+
+def stored_copy(processor, digest: str, name: str):
+    file_path = processor.papers_dir / f"{digest}.md"
+    return {
+        "original_filename": name,
+        "saved_filename": file_path.name,
+        "file_path": file_path,
+        "file_type": ".md",
+        "file_size": 4,
+        "content_hash": digest,
+    }, {"processed_file": str(processor.processed_dir / f"processed_{digest}.md.txtz"), "text_length": 4}
+
+
+def test_failed_copy_does_not_skip_later_copies_with_same_content(tmp_path, processor, database):
+    digest = f"{7:064x}"
+    # 첫 번째 결과를 수집할 때는 저장된 파일이 없어 실패하고, 두 번째 결과 전에 파일이 다시 저장됩니다
+    def restore_file(index: int):
+        if index == 1:
+            (processor.papers_dir / f"{digest}.md").write_bytes(b"data")
+
+    executor = ResultExecutor(
+        [stored_copy(processor, digest, "first.md"), stored_copy(processor, digest, "second.md")], restore_file
+    )
+    ingestor = BulkIngestor(processor, database, executor=executor, max_in_flight=1)
+
+    stats = ingestor.ingest([(tmp_path / "first.md", "first.md"), (tmp_path / "second.md", "second.md")])
+
+    assert stats["failed"] == 1
+    assert stats["skipped"] == 0
+    assert stats["completed"] == 1
+    assert database.find_by_content_hash(digest) is not None
+
+
+def test_second_copy_in_the_same_run_is_skipped(tmp_path, processor, database):
+    digest = f"{8:064x}"
+    (processor.papers_dir / f"{digest}.md").write_bytes(b"data")
+    executor = ResultExecutor([stored_copy(processor, digest, "first.md"), stored_copy(processor, digest, "second.md")])
+    ingestor = BulkIngestor(processor, database, executor=executor, max_in_flight=1)
+
+    stats = ingestor.ingest([(tmp_path / "first.md", "first.md"), (tmp_path / "second.md", "second.md")])
+
+    assert stats["completed"] == 1 and stats["skipped"] == 1 and stats["failed"] == 0
@@ -0,0 +1,91 @@
+import pytest
+
+from app.utils.context_packer import SPAN_SEPARATOR, _trim_overlap, pack_context
+from app.utils.retrieval import format_context
+from app.utils.tokens import count_tokens
+
+# 단어마다 번호가 달라 겹친 구간이 두 번 들어갔는지 확인할 수 있는 본문
+DOCUMENT = " ".join(f"w{n:03d}" for n in range(200))
+
+
+def chunk(start: int, end: int, score: float, doc_id: str = "doc-a", text: str = DOCUMENT):
+    return {"doc_id": doc_id, "vector_id": doc_id, "title": doc_id, "start": start, "end": end,
+            "text": text[start:end].strip(), "score": score}
+
+
+def words(text: str):
+    return [word for word in text.split() if word != "…"]
+
+
+def test_packs_within_budget_in_score_order():
+    chunks = [chunk(0, 100, 0.9), chunk(500, 600, 0.5, doc_id="doc-b"), chunk(200, 300, 0.7)]
+    budget = count_tokens(format_context(chunks[0])) + 5
+
+    packed, report = pack_context(chunks, budget)
+
+    assert [item["doc_id"] for item in packed] == ["doc-a"]
+    assert packed[0]["text"] == chunks[0]["text"]
+    assert report["selected"] == 1 and report["over_budget"] == 2
+    assert report["tokens"] == sum(count_tokens(format_context(item)) for item in packed) <= budget
+
+
+def test_zero_budget_selects_nothing():
+    packed, report = pack_context([chunk(0, 100, 0.9)], 0)
+
+    assert packed == [] and report["selected"] == 0 and report["tokens"] == 0
+
+
+def test_merges_spans_per_document_in_text_order():
+    chunks = [
+        chunk(400, 500, 0.9, doc_id="doc-b"),
+        chunk(200, 300, 0.8),
+        chunk(0, 100, 0.7),
+        chunk(300, 400, 0.6),
+    ]
+
+    packed, report = pack_context(chunks, 10000)
+
+    # 문서 순서는 가장 높은 점수 순, 문서 안에서는 원문 순서입니다
+    assert [item["doc_id"] for item in packed] == ["doc-b", "doc-a"]
+    doc_a = packed[1]
+    assert doc_a["start"] == 0 and doc_a["end"] == 400 and doc_a["score"] == 0.8
+    assert doc_a["text"] == SPAN_SEPARATOR.join([DOCUMENT[0:100].strip(), " ".join(
+        [DOCUMENT[200:300].strip(), DOCUMENT[300:400].strip()])])
+    assert report["selected"] == 4 and report["duplicates"] == 0
+
+
+def test_trims_overlap_at_either_end():
+    spans = [(0, 100)]
+    trimmed = _trim_overlap(chunk(60, 200, 0.5), spans)
+    assert trimmed["start"] == 100 and trimmed["end"] == 200
+    assert trimmed["text"] == DOCUMENT[100:200].strip()
+
+    trimmed = _trim_overlap(chunk(300, 450, 0.5), [(400, 500)])
+    assert trimmed["start"] == 300 and trimmed["end"] == 400
+    assert trimmed["text"] == DOCUMENT[300:400].strip()
+
+
+def test_mostly_overlapping_chunk_is_a_duplicate():
+    assert _trim_overlap(chunk(0, 100, 0.5), [(20, 100)]) is None
+
+    packed, report = pack_context([chunk(0, 100, 0.9), chunk(10, 100, 0.8)], 10000)
+    assert report["duplicates"] == 1 and len(packed) == 1
+
+
+@pytest.mark.parametrize("inner, kept", [((120, 160), (160, 300)), ((200, 260), (100, 200))])
+def test_span_inside_chunk_keeps_longer_side_only(inner, kept):
+    trimmed = _trim_overlap(chunk(100, 300, 0.5), [inner])
+
+    assert (trimmed["start"], trimmed["end"]) == kept
+    assert trimmed["text"] == DOCUMENT[kept[0]:kept[1]].strip()
+
+
+def test_packed_text_never_repeats_words():
+    # 높은 점수의 짧은 청크가 낮은 점수의 긴 청크 한가운데에 있는 경우
+    chunks = [chunk(200, 260, 0.9), chunk(100, 400, 0.8), chunk(380, 500, 0.7)]
+
+    packed, report = pack_context(chunks, 10000)
+
+    packed_words = words(packed[0]["text"])
+    assert len(packed_words) == len(set(packed_words))
+    assert report["duplicates"] == 0
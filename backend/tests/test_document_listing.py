@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.database import AsyncDatabase, Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "documents.db"))
+    yield database
+    database.close()
+
+
+def insert_documents(database, count: int, upload_dates):
+    doc_ids = []
+    for n in range(count):
+        doc_ids.append(database.insert_document({
+            "original_filename": f"paper-{n}.pdf",
+            "saved_filename": f"{n:064x}.pdf",
+            "file_path": f"/papers/{n:064x}.pdf",
+            "file_type": "pdf",
+            "upload_date": upload_dates[n % len(upload_dates)],
+            "file_size": 4,
+            "content_hash": f"{n:064x}",
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00",
+        }))
+    return doc_ids
+
+
+def list_all(database, limit: int, **filters):
+    seen, cursor = [], None
+    while True:
+        page = database.list_documents(limit=limit, cursor=cursor, fields=["id"], **filters)
+        assert len(page["documents"]) <= limit
+        seen.extend(document["id"] for document in page["documents"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 50])
+def test_pages_through_shared_upload_dates_without_gaps(database, limit):
+    # 같은 upload_date를 가진 문서가 페이지 경계에 걸치도록 날짜 두 개만 씁니다
+    doc_ids = insert_documents(database, 20, ["2024-05-01T09:00:00", "2024-05-02T09:00:00"])
+
+    seen = list_all(database, limit)
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == set(doc_ids)
+    expected = sorted(
+        ((document["upload_date"], document["id"]) for document in map(database.get_document, doc_ids)),
+        reverse=True
+    )
+    assert seen == [doc_id for _, doc_id in expected]
+
+
+def test_filters_apply_across_pages(database):
+    insert_documents(database, 10, ["2024-04-30T23:59:59", "2024-05-15T00:00:00"])
+
+    seen = list_all(database, 2, uploaded_from="2024-05", uploaded_to="2024-05")
+
+    assert len(seen) == 5
+    assert all(database.get_document(doc_id)["upload_date"].startswith("2024-05") for doc_id in seen)
+
+
+# base64가 아닌 값, JSON이 아닌 값("not json"), 문자열이 아닌 값([1, 2]), 길이가 다른 목록(["a"]), UTF-8이 아닌 바이트
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", "WzEsIDJd", "WyJhIl0", "_-8"])
+def test_malformed_cursor_raises_value_error(database, cursor):
+    with pytest.raises(ValueError, match="cursor"):
+        database.list_documents(cursor=cursor)
+
+
+def test_malformed_cursor_returns_400(database, monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    async_database = AsyncDatabase(database, max_workers=1)
+    monkeypatch.setattr(main, "services", SimpleNamespace(async_database=async_database))
+    # lifespan을 실행하지 않도록 with 블록 없이 요청합니다
+    client = TestClient(main.app, raise_server_exceptions=False)
+    try:
+        response = client.get("/documents", params={"cursor": "WzEsIDJd"})
+        assert response.status_code == 400
+        assert "cursor" in response.json()["detail"]
+
+        insert_documents(database, 2, ["2024-05-01T09:00:00"])
+        first = client.get("/documents", params={"limit": 1}).json()
+        second = client.get("/documents", params={"limit": 1, "cursor": first["next_cursor"]}).json()
+        assert first["documents"][0]["id"] != second["documents"][0]["id"]
+        assert second["next_cursor"] is None
+    finally:
+        async_database._executor.shutdown(wait=True)
@@ -0,0 +1,32 @@
+import pytest
+
+from app.utils.document_processor import DocumentProcessor
+
+
+@pytest.mark.parametrize("setting, pdf_workers, expected", [
+    (None, 1, False),
+    (None, 4, True),
+    ("0", 4, False),
+    ("1", 1, True),
+])
+def test_page_cache_defaults_to_on_for_parallel_extraction(tmp_path, monkeypatch, setting, pdf_workers, expected):
+    if setting is None:
+        monkeypatch.delenv("FESTA_PDF_PAGE_CACHE", raising=False)
+    else:
+        monkeypatch.setenv("FESTA_PDF_PAGE_CACHE", setting)
+
+    assert DocumentProcessor(str(tmp_path), pdf_workers=pdf_workers).use_page_cache is expected
+
+
+def test_page_cache_round_trip(tmp_path):
+    processor = DocumentProcessor(str(tmp_path), pdf_workers=2)
+    paper = processor.papers_dir / f"{1:064x}.pdf"
+    paper.write_bytes(b"%PDF-1.4")
+    file_hash = processor.content_hash(paper)
+
+    processor._write_cached_page(file_hash, 3, "세 번째 페이지")
+
+    assert processor._read_cached_page(file_hash, 3) == "세 번째 페이지"
+    assert processor._read_cached_page(file_hash, 4) is None
+    processor.discard_page_cache(paper)
+    assert not (processor.page_cache_dir / file_hash).exists()
@@ -0,0 +1,88 @@
+import pytest
+
+from app.utils.database import Database
+from app.utils.text_store import write_processed_text
+
+BODY = "We study transformer attention heads and their pruning on long documents."
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "documents.db"))
+    if not database.fts_enabled:
+        database.close()
+        pytest.skip("SQLite FTS5를 사용할 수 없습니다")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def processed_file(tmp_path):
+    path = tmp_path / f"processed_{1:064x}.pdf.txtz"
+    write_processed_text(path, BODY)
+    return str(path)
+
+
+def upload(database, processed_file, original_filename: str, with_artifacts: bool = True) -> str:
+    """같은 내용(같은 해시)의 업로드를 넣습니다. 두 번째부터는 processed_file 없이 넣어 기존 산출물을 공유합니다."""
+    digest = f"{1:064x}"
+    document = {
+        "original_filename": original_filename,
+        "saved_filename": f"{digest}.pdf",
+        "file_path": f"/papers/{digest}.pdf",
+        "file_type": ".pdf",
+        "upload_date": "2024-01-01T00:00:00",
+        "file_size": len(BODY),
+        "content_hash": digest,
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+    }
+    if with_artifacts:
+        document["processed_file"] = processed_file
+    return database.insert_document(document)
+
+
+def body_rows(database) -> int:
+    with database._connect() as conn:
+        return conn.execute('SELECT COUNT(*) FROM fts_rows WHERE body_file IS NOT NULL').fetchone()[0]
+
+
+def test_shared_body_is_indexed_once(database, processed_file):
+    first = upload(database, processed_file, "first.pdf")
+    second = upload(database, processed_file, "second.pdf", with_artifacts=False)
+
+    results = database.search_documents("pruning")
+
+    assert body_rows(database) == 1
+    assert [result["id"] for result in results] == [first]
+    assert database.get_document(second)["processed_file"] == processed_file
+
+
+@pytest.mark.parametrize("delete_holder", [True, False])
+def test_survivor_stays_searchable_after_sharing_document_is_deleted(database, processed_file, delete_holder):
+    holder = upload(database, processed_file, "first.pdf")
+    sharer = upload(database, processed_file, "second.pdf", with_artifacts=False)
+    deleted, survivor = (holder, sharer) if delete_holder else (sharer, holder)
+
+    assert database.delete_document(deleted)
+
+    results = database.search_documents("pruning")
+    assert [result["id"] for result in results] == [survivor]
+    assert "<mark>pruning</mark>" in results[0]["snippet"]
+    assert body_rows(database) == 1
+
+    assert database.delete_document(survivor)
+    assert database.search_documents("pruning") == []
+    with database._connect() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM fts_rows').fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM documents_fts').fetchone()[0] == 0
+
+
+def test_metadata_update_keeps_body_index(database, processed_file):
+    doc_id = upload(database, processed_file, "first.pdf")
+
+    assert database.update_document(doc_id, {"title": "Sparse Heads", "keywords": ["attention", "sparsity"]})
+
+    assert [result["id"] for result in database.search_documents("sparsity")] == [doc_id]
+    assert [result["id"] for result in database.search_documents("Sparse Heads")] == [doc_id]
+    assert [result["id"] for result in database.search_documents("pruning")] == [doc_id]
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from app.utils.llm import DeepSeekAPI, LLMClientClosed
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setenv("DEEPSEEK_API_BASE", "http://llm.test/v1")
+    monkeypatch.setenv("FESTA_LLM_COALESCE", "0")
+    llm = DeepSeekAPI()
+    llm.backoff_base = llm.backoff_max = 0.05
+    return llm
+
+
+def use_transport(llm, handler):
+    """공유 클라이언트 대신 handler로 응답하는 클라이언트를 씁니다. (동시 호출 제한은 첫 호출 때 생성)"""
+    llm._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_close_during_backoff_fails_cleanly(llm):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def scenario():
+        use_transport(llm, handler)
+        request = asyncio.create_task(llm.generate_response("질문"))
+        # 첫 시도가 503을 받고 재시도를 기다리는 동안 닫습니다
+        while not calls:
+            await asyncio.sleep(0.001)
+        await llm.aclose()
+        answer = await request
+
+        assert "LLM 클라이언트가 닫혔습니다" in answer
+        assert len(calls) == 1
+        assert llm.stats["in_flight"] == 0 and llm.stats["queued"] == 0
+        # 진행 중이던 호출이 돌려준 슬롯이 그대로 남아 있습니다
+        assert llm._limiter._value == llm.max_concurrency
+
+        with pytest.raises(LLMClientClosed):
+            async with llm._request({}, timeout=httpx.Timeout(1.0)):
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_close_while_waiting_for_a_slot(llm):
+    llm.max_concurrency = 1
+    release = None
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={"choices": [{"message": {"content": "답변"}}]})
+
+        use_transport(llm, handler)
+        first = asyncio.create_task(llm.generate_response("첫 질문"))
+        second = asyncio.create_task(llm.generate_response("둘째 질문"))
+        while llm.stats["queued"] == 0:
+            await asyncio.sleep(0.001)
+
+        closing = asyncio.create_task(llm.aclose())
+        await asyncio.sleep(0)
+        release.set()
+        answers = await asyncio.gather(first, second)
+        await closing
+
+        assert "LLM 클라이언트가 닫혔습니다" in answers[1]
+        assert llm.stats["in_flight"] == 0 and llm.stats["queued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_is_honored_beyond_backoff_max(llm):
+    llm.backoff_max = 8.0
+
+    assert llm._backoff_delay(0, "30") == 30.0
+    assert llm._backoff_delay(0, "-5") == 0.0
+    assert llm._backoff_delay(0, "100000") == llm.retry_after_max
+    http_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=45), usegmt=True)
+    assert 40.0 < llm._backoff_delay(0, http_date) <= 45.0
+    # 헤더가 없거나 읽을 수 없으면 backoff_max까지의 지수 백오프를 씁니다
+    assert all(0.0 <= llm._backoff_delay(10, value) <= 8.0 for value in (None, "soon"))
+
+
+def test_request_waits_for_large_retry_after(llm, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    responses = iter([httpx.Response(429, headers={"Retry-After": "30"}),
+                      httpx.Response(200, json={"choices": [{"message": {"content": "답변"}}]})])
+
+    async def scenario():
+        use_transport(llm, lambda request: next(responses))
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        answer = await llm.generate_response("질문")
+        await llm.aclose()
+        return answer
+
+    assert asyncio.run(scenario()) == "답변"
+    assert delays == [30.0]
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from app.utils.markup import HTMLTextExtractor, html_file_to_text, markdown_file_to_text, markdown_lines_to_text
+
+HTML = """<!DOCTYPE html><html><head><title>Ignored</title><style>p{color:red}</style></head>
+<body><nav><a href="/">Home</a></nav>
+<h1>Attention &amp; Memory</h1>
+<p>Transformers use <em>self-attention</em>, defined as
+<math alttext="\\mathrm{softmax}(QK^T)V" display="inline"><mi>x</mi></math> per head.</p>
+<script>var hidden = "<p>not text</p>";</script>
+<h2>Results</h2>
+<p>Block: <math alttext="E = mc^2" display="block"><mi>E</mi></math></p>
+<math><mi>y</mi></math>
+<table><tr><td>BLEU</td><td>28.4</td></tr></table>
+<pre>def f(x):
+    return x</pre>
+<footer>Copyright</footer>
+</body></html>"""
+
+HTML_TEXT = (
+    "# Attention & Memory\n\n"
+    "Transformers use self-attention, defined as $\\mathrm{softmax}(QK^T)V$ per head.\n\n"
+    "## Results\n\n"
+    "Block: $$E = mc^2$$\n\n"
+    "y\n\n"
+    "BLEU 28.4\n\n"
+    "def f(x):\n    return x\n"
+)
+
+MARKDOWN = """---
+title: Front
+---
+Title Line
+==========
+
+## Method *details*
+
+Some **bold** text with a [link](http://x) and `code`.
+
+- item one
+> quoted
+
+```python
+x = 1  # **not bold**
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+[ref]: http://example.com
+"""
+
+
+def extract(chunks) -> str:
+    extractor = HTMLTextExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    extractor.close()
+    return extractor.text()
+
+
+def split_randomly(text: str, seed: int):
+    rng = random.Random(seed)
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 20)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def test_html_skips_non_content_and_converts_headings_and_math():
+    assert extract([HTML]) == HTML_TEXT
+
+
+def test_html_nested_skipped_tags_and_unclosed_head():
+    html = "<html><head><title>t</title><body><svg><svg><text>a</text></svg>b</svg><p>본문</p></body>"
+
+    assert extract([html]) == "본문\n"
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_html_chunk_boundaries_do_not_change_text(seed):
+    # 태그, 속성, 문자 참조(&amp;) 한가운데에서 잘리는 경우를 포함합니다
+    assert extract(split_randomly(HTML, seed)) == HTML_TEXT
+
+
+@pytest.mark.parametrize("block_chars", [1, 7, 64])
+def test_html_file_read_in_small_blocks(tmp_path, block_chars):
+    path = tmp_path / "paper.html"
+    path.write_text(HTML, encoding="utf-8")
+
+    assert html_file_to_text(path, block_chars=block_chars) == HTML_TEXT
+
+
+def test_markdown_strips_syntax_and_keeps_headings():
+    assert "\n".join(markdown_lines_to_text(MARKDOWN.splitlines(True))) == (
+        "# Title Line\n\n"
+        "## Method details\n\n"
+        "Some bold text with a link and code.\n\n"
+        "item one\nquoted\n\n"
+        "x = 1  # **not bold**\n\n"
+        "a b\n1 2\n"
+    )
+
+
+def test_markdown_file(tmp_path):
+    path = tmp_path / "paper.md"
+    path.write_text("# 제목\n\n본문 **강조**\n", encoding="utf-8")
+
+    assert markdown_file_to_text(path) == "# 제목\n\n본문 강조\n"
+    path.write_text("---\ntitle: only front matter\n---\n", encoding="utf-8")
+    assert markdown_file_to_text(path) == ""
@@ -0,0 +1,31 @@
+from app.utils.metadata import _strip_latex_comments, extract_metadata
+
+
+def test_strip_latex_comments_keeps_escaped_percent():
+    source = "\\title{100\\% Recall} % 임시 제목\n% 전체 주석 줄\n\\author{A}\\\\% 줄바꿈 뒤 주석\nend"
+
+    assert _strip_latex_comments(source) == "\\title{100\\% Recall} \n\n\\author{A}\\\\\nend"
+
+
+def test_strip_latex_comments_handles_many_escaped_percents():
+    line = "\\%" * 5000 + " % comment"
+
+    assert _strip_latex_comments(line + "\nnext") == "\\%" * 5000 + " \nnext"
+
+
+def test_extract_metadata_from_tex_with_many_escaped_percents(tmp_path):
+    path = tmp_path / "paper.tex"
+    path.write_text(
+        "\\documentclass{article}\n"
+        "\\title{Scaling Laws % draft title\n for Retrieval}\n"
+        "\\author{Ada Lovelace \\and Alan Turing}\n"
+        + "\\% " * 2000 + "\n"
+        "\\begin{document}\\begin{abstract}We measure recall.\\end{abstract}\\end{document}\n",
+        encoding="utf-8",
+    )
+
+    metadata = extract_metadata(path, "")
+
+    assert metadata["title"] == "Scaling Laws for Retrieval"
+    assert metadata["authors"] == ["Ada Lovelace", "Alan Turing"]
+    assert metadata["abstract"] == "We measure recall."
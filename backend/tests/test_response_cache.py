@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "response_cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_memory_lookup_does_not_wait_for_disk_lock(cache):
+    cache.put("key", "deepseek-chat", "답변", ["doc-1"])
+    disk_busy, release = threading.Event(), threading.Event()
+
+    def slow_disk_write():
+        # SQLite 쓰기가 오래 걸리는 상황처럼 디스크 잠금을 잡고 있습니다
+        with cache._lock:
+            disk_busy.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=slow_disk_write)
+    writer.start()
+    try:
+        disk_busy.wait(5)
+        start = time.perf_counter()
+        assert cache.get_memory("key") == "답변"
+        assert cache.get_memory("missing") is None
+        assert time.perf_counter() - start < 1.0
+    finally:
+        release.set()
+        writer.join()
+
+
+def test_disk_hit_refills_memory_and_invalidation_clears_both(cache):
+    cache.put("key", "deepseek-chat", "답변", ["doc-1"])
+    cache._memory.clear()
+    cache._memory_bytes = 0
+
+    assert cache.get_memory("key") is None
+    assert cache.get("key") == "답변"
+    assert cache.get_memory("key") == "답변"
+
+    assert cache.invalidate_document("doc-1") == 1
+    assert cache.get("key") is None
+    stats = cache.stats()
+    assert stats["memory_entries"] == 0 and stats["memory_bytes"] == 0 and stats["disk_entries"] == 0
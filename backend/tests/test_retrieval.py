@@ -0,0 +1,61 @@
+import pytest
+
+from app.utils.database import Database
+from app.utils.retrieval import HashingEmbedder, RetrievalEngine, backfill_vectors
+from app.utils.text_store import write_processed_text
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "documents.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def retrieval(tmp_path, database):
+    return RetrievalEngine(str(tmp_path / "index"), database, embedder=HashingEmbedder(64))
+
+
+def insert_unindexed(database, tmp_path, digest: str, text: str, filename: str) -> str:
+    """검색 엔진이 생기기 전처럼 vector_id 없이 문서 레코드를 넣습니다."""
+    processed_file = tmp_path / f"processed_{digest}.md.txtz"
+    write_processed_text(processed_file, text)
+    return database.insert_document({
+        "original_filename": filename,
+        "saved_filename": f"{digest}.md",
+        "file_path": str(tmp_path / f"{digest}.md"),
+        "file_type": ".md",
+        "upload_date": "2024-01-01T00:00:00",
+        "file_size": len(text),
+        "processed_file": str(processed_file),
+        "content_hash": digest,
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+    })
+
+
+def test_backfill_indexes_documents_without_vector_id(tmp_path, database, retrieval):
+    digest = f"{1:064x}"
+    first = insert_unindexed(database, tmp_path, digest, "transformer attention heads", "first.md")
+    second = insert_unindexed(database, tmp_path, digest, "transformer attention heads", "second.md")
+
+    stats = backfill_vectors(retrieval, batch_size=1)
+
+    # 같은 내용의 두 번째 레코드는 첫 레코드를 색인할 때 함께 갱신됩니다
+    assert stats == {"scanned": 1, "indexed": 1, "updated": 2, "failed": 0}
+    assert database.get_document(first)["vector_id"] == digest
+    assert database.get_document(second)["vector_id"] == digest
+    assert retrieval.search("attention", k=1)[0]["vector_id"] == digest
+    assert backfill_vectors(retrieval)["scanned"] == 0
+
+
+def test_backfill_counts_missing_processed_text_as_failed(tmp_path, database, retrieval):
+    digest = f"{2:064x}"
+    doc_id = insert_unindexed(database, tmp_path, digest, "text", "paper.md")
+    (tmp_path / f"processed_{digest}.md.txtz").unlink()
+
+    stats = backfill_vectors(retrieval)
+
+    assert stats["failed"] == 1
+    assert database.get_document(doc_id)["vector_id"] is None
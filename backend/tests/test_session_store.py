@@ -0,0 +1,177 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.session_store import SessionStore
+from app.utils.shared_state import MemoryStateBackend, SQLiteStateBackend
+
+
+def message(role: str, content: str):
+    return {"role": role, "content": content}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "sessions.db"))
+
+
+def run(backend, scenario):
+    async def main():
+        try:
+            await scenario()
+        finally:
+            await backend.aclose()
+
+    asyncio.run(main())
+
+
+def test_evicts_least_recently_used_sessions_over_max_bytes(backend):
+    store = SessionStore(max_bytes=1100, backend=backend)
+
+    async def scenario():
+        tokens = [store.create() for _ in range(3)]
+        for token in tokens:
+            await store.append(token, message("user", "x" * 300))
+        # 첫 세션을 다시 사용해 LRU 순서를 바꾼 뒤 한도를 넘깁니다
+        await store.append(tokens[0], message("assistant", "y" * 10))
+        newest = store.create()
+        await store.append(newest, message("user", "z" * 300))
+
+        assert store.stats()["bytes"] <= store.max_bytes
+        assert store.counters["evicted"] == 1
+        assert tokens[1] not in store._sessions
+        assert all(token in store._sessions for token in (tokens[0], tokens[2], newest))
+
+    run(backend, scenario)
+
+
+def test_keeps_most_recent_session_even_when_over_max_bytes(backend):
+    store = SessionStore(max_bytes=10, backend=backend)
+
+    async def scenario():
+        token = store.create()
+        await store.append(token, message("user", "x" * 100))
+        assert await store.get_history(token) == [message("user", "x" * 100)]
+        assert len(store) == 1
+
+    run(backend, scenario)
+
+
+def test_evicts_over_max_sessions(backend):
+    store = SessionStore(max_sessions=2, backend=backend)
+
+    async def scenario():
+        tokens = [store.create() for _ in range(3)]
+        assert len(store) == 2
+        assert tokens[0] not in store._sessions
+        assert store.counters["evicted"] == 1
+
+    run(backend, scenario)
+
+
+def test_idle_sessions_expire(backend):
+    store = SessionStore(idle_ttl=60.0, backend=backend)
+
+    async def scenario():
+        idle, active = store.create(), store.create()
+        await store.append(idle, message("user", "old"))
+        await store.append(active, message("user", "new"))
+        store._sessions[idle].last_access = time.time() - 120.0
+
+        assert await store.history_for_llm(active, 100) == [message("user", "new")]
+        assert idle not in store._sessions
+        assert store.counters["expired"] == 1
+        assert store.stats()["bytes"] == store._sessions[active].size
+
+    run(backend, scenario)
+
+
+def test_evicted_history_is_restored_only_from_shared_backend(backend):
+    store = SessionStore(max_sessions=1, backend=backend)
+
+    async def scenario():
+        first = store.create()
+        await store.append(first, message("user", "질문"), message("assistant", "답변"))
+        store.create()
+        assert first not in store._sessions
+
+        history = await store.get_history(first)
+        if backend.shared:
+            assert history == [message("user", "질문"), message("assistant", "답변")]
+            assert store.counters["restored"] == 1
+            # 되살린 세션에 이어 쓴 메시지도 백엔드에 남습니다
+            await store.append(first, message("user", "다음 질문"))
+            assert [item["content"] for item in await backend.load(first)] == ["질문", "답변", "다음 질문"]
+        else:
+            # 메모리 백엔드는 내보낸 세션을 되살릴 수 없습니다
+            assert history is None
+
+    run(backend, scenario)
+
+
+def test_restore_in_another_store_sharing_the_backend(tmp_path):
+    backend = SQLiteStateBackend(str(tmp_path / "sessions.db"))
+    worker_a, worker_b = SessionStore(backend=backend), SessionStore(backend=backend)
+
+    async def scenario():
+        token = worker_a.create()
+        await worker_a.append(token, message("user", "안녕하세요"))
+        assert await worker_b.get_history(token) == [message("user", "안녕하세요")]
+
+        await worker_b.discard(token)
+        assert await worker_a.get_history(token) is None
+        assert len(worker_a) == 0
+
+    run(backend, scenario)
+
+
+def test_trims_to_max_messages_and_budgets_history(backend):
+    store = SessionStore(max_messages=3, backend=backend)
+
+    async def scenario():
+        token = store.create()
+        for n in range(5):
+            await store.append(token, message("user", f"message {n}"))
+
+        assert [item["content"] for item in await store.get_history(token)] == ["message 2", "message 3", "message 4"]
+        assert store.stats()["bytes"] == store._sessions[token].size
+        assert [item["content"] for item in await store.history_for_llm(token, 10)] == ["message 4"]
+        assert await store.history_for_llm(token, 0) == []
+
+    run(backend, scenario)
+
+
+def test_append_after_empty_session_is_evicted(backend):
+    store = SessionStore(max_sessions=2, backend=backend)
+
+    async def scenario():
+        first = store.create()
+        store.create()
+        store.create()
+        assert first not in store._sessions
+
+        await store.append(first, message("user", "질문"), message("assistant", "답변"))
+
+        assert await store.get_history(first) == [message("user", "질문"), message("assistant", "답변")]
+        assert await store.history_for_llm(first, 100) == [message("user", "질문"), message("assistant", "답변")]
+        assert store.stats()["bytes"] == sum(session.size for session in store._sessions.values())
+
+    run(backend, scenario)
+
+
+def test_append_after_empty_session_expires(backend):
+    store = SessionStore(idle_ttl=60.0, backend=backend)
+
+    async def scenario():
+        token = store.create()
+        store._sessions[token].last_access = time.time() - 120.0
+
+        await store.append(token, message("user", "한 시간 뒤 질문"))
+
+        assert await store.get_history(token) == [message("user", "한 시간 뒤 질문")]
+        assert store.counters["expired"] == 1
+
+    run(backend, scenario)
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.utils.shared_state import SQLiteStateBackend
+
+
+def count_rows(backend, token: str) -> int:
+    return backend._conn.execute('SELECT COUNT(*) FROM session_messages WHERE token = ?', (token,)).fetchone()[0]
+
+
+def test_append_sweeps_expired_sessions(tmp_path):
+    backend = SQLiteStateBackend(str(tmp_path / "sessions.db"), ttl=60.0, sweep_interval=0.0)
+
+    async def scenario():
+        await backend.append("old", [{"role": "user", "content": "hi"}], max_messages=10)
+        # 마지막 메시지가 보관 기간보다 오래된 세션을 만듭니다
+        backend._conn.execute('UPDATE session_messages SET created_at = ? WHERE token = ?', (time.time() - 120.0, "old"))
+        assert await backend.load("old") is None
+        assert count_rows(backend, "old") == 1
+
+        await backend.append("new", [{"role": "user", "content": "hello"}], max_messages=10)
+        assert count_rows(backend, "old") == 0
+        assert await backend.load("new") == [{"role": "user", "content": "hello"}]
+        await backend.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_sweep_runs_at_most_once_per_interval(tmp_path):
+    backend = SQLiteStateBackend(str(tmp_path / "sessions.db"), ttl=60.0, sweep_interval=3600.0)
+
+    async def scenario():
+        await backend.append("old", [{"role": "user", "content": "hi"}], max_messages=10)
+        backend._conn.execute('UPDATE session_messages SET created_at = ? WHERE token = ?', (time.time() - 120.0, "old"))
+
+        await backend.append("new", [{"role": "user", "content": "hello"}], max_messages=10)
+        assert count_rows(backend, "old") == 1
+
+        backend._next_sweep = 0.0
+        await backend.append("new", [{"role": "assistant", "content": "hi"}], max_messages=10)
+        assert count_rows(backend, "old") == 0
+        await backend.aclose()
+
+    asyncio.run(scenario())
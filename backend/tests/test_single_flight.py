@@ -0,0 +1,131 @@
+import asyncio
+
+from app.utils.single_flight import SingleFlight
+
+
+class Upstream:
+    """테스트가 조각을 하나씩 흘려보내는 업스트림 호출입니다."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.calls = 0
+        self.cancelled = False
+
+    async def stream(self):
+        self.calls += 1
+        try:
+            while True:
+                chunk = await self.queue.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def consume(flights: SingleFlight, upstream: Upstream, received: list, key: str = "question"):
+    async for chunk in flights.stream(key, upstream.stream):
+        received.append(chunk)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_late_joiner_replays_received_chunks():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        first, second = [], []
+        leader = asyncio.create_task(consume(flights, upstream, first))
+        for chunk in ("a", "b"):
+            upstream.queue.put_nowait(chunk)
+        await settle()
+        assert first == ["a", "b"]
+
+        joiner = asyncio.create_task(consume(flights, upstream, second))
+        await settle()
+        assert second == ["a", "b"]
+
+        upstream.queue.put_nowait("c")
+        upstream.queue.put_nowait(None)
+        await asyncio.gather(leader, joiner)
+
+        assert first == second == ["a", "b", "c"]
+        assert upstream.calls == 1
+        assert flights.stats() == {"flights": 1, "coalesced": 1, "detached": 0, "abandoned": 0, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_detaches_without_cancelling_upstream():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        first, second = [], []
+        leader = asyncio.create_task(consume(flights, upstream, first))
+        joiner = asyncio.create_task(consume(flights, upstream, second))
+        upstream.queue.put_nowait("a")
+        await settle()
+
+        leader.cancel()
+        await settle()
+        assert leader.cancelled()
+        assert not upstream.cancelled
+        assert len(flights) == 1
+
+        upstream.queue.put_nowait("b")
+        upstream.queue.put_nowait(None)
+        await joiner
+
+        assert first == ["a"]
+        assert second == ["a", "b"]
+        assert flights.counters["detached"] == 1
+        assert flights.counters["abandoned"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_upstream_is_cancelled_when_last_waiter_leaves():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        tasks = [asyncio.create_task(consume(flights, upstream, [])) for _ in range(2)]
+        await settle()
+
+        tasks[0].cancel()
+        await settle()
+        assert not upstream.cancelled
+
+        tasks[1].cancel()
+        await settle()
+        assert upstream.cancelled
+        assert len(flights) == 0
+        assert flights.counters["abandoned"] == 1
+
+        # 버려진 호출에 합류하지 않고 새로 호출합니다
+        retry, received = Upstream(), []
+        task = asyncio.create_task(consume(flights, retry, received))
+        retry.queue.put_nowait("new")
+        retry.queue.put_nowait(None)
+        await task
+        assert received == ["new"] and retry.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_upstream_error_reaches_every_waiter():
+    async def scenario():
+        flights, upstream = SingleFlight(), Upstream()
+        received = [[], []]
+        tasks = [asyncio.create_task(consume(flights, upstream, chunks)) for chunks in received]
+        upstream.queue.put_nowait("a")
+        upstream.queue.put_nowait(RuntimeError("upstream failed"))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert [str(result) for result in results] == ["upstream failed"] * 2
+        assert received == [["a"], ["a"]]
+        assert len(flights) == 0
+
+    asyncio.run(scenario())
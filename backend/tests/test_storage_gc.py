@@ -0,0 +1,141 @@
+import os
+import time
+
+import pytest
+
+from app.utils.database import Database
+from app.utils.document_processor import DocumentProcessor
+from app.utils.storage_gc import TEMP_FILE_MIN_AGE, StorageCollector
+
+MIN_AGE = 3600.0
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return DocumentProcessor(str(tmp_path))
+
+
+@pytest.fixture
+def database(tmp_path, processor):
+    database = Database(str(processor.db_dir / "documents.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def collector(processor, database):
+    return StorageCollector(processor, database, min_age=MIN_AGE, io_rate=0)
+
+
+def content_hash(n: int) -> str:
+    return f"{n:064x}"
+
+
+def write_file(path, age: float = 0.0, content: bytes = b"data"):
+    """파일을 쓰고 수정 시간을 age초 전으로 맞춥니다."""
+    path.write_bytes(content)
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+def insert_document(database, processor, digest: str, original_filename: str = "paper.md") -> str:
+    """내용 해시 이름으로 저장된 원본과 처리된 텍스트를 참조하는 문서 레코드를 넣습니다."""
+    file_path = processor.papers_dir / f"{digest}.md"
+    processed_file = processor.processed_dir / f"processed_{digest}.md.txtz"
+    return database.insert_document({
+        "original_filename": original_filename,
+        "saved_filename": file_path.name,
+        "file_path": str(file_path),
+        "file_type": ".md",
+        "upload_date": "2024-01-01T00:00:00",
+        "file_size": 4,
+        "processed_file": str(processed_file),
+        "vector_id": digest,
+        "content_hash": digest,
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+    })
+
+
+def test_collect_removes_only_old_orphan_files(collector, processor, database):
+    referenced = content_hash(1)
+    insert_document(database, processor, referenced)
+    kept = write_file(processor.papers_dir / f"{referenced}.md", age=2 * MIN_AGE)
+    old_orphan = write_file(processor.papers_dir / f"{content_hash(2)}.pdf", age=2 * MIN_AGE)
+    new_orphan = write_file(processor.papers_dir / f"{content_hash(3)}.pdf", age=MIN_AGE / 2)
+    old_processed = write_file(processor.processed_dir / f"processed_{content_hash(2)}.pdf.txtz", age=2 * MIN_AGE)
+    old_pages = processor.page_cache_dir / content_hash(2)
+    old_pages.mkdir()
+    write_file(old_pages / "00000.z")
+    os.utime(old_pages, (time.time() - 2 * MIN_AGE,) * 2)
+
+    report = collector.collect()
+
+    assert kept.exists()
+    assert new_orphan.exists()
+    assert not old_orphan.exists()
+    assert not old_processed.exists()
+    assert not old_pages.exists()
+    assert report["files_removed"] == 3
+
+
+def test_collect_keeps_temp_files_longer(collector, processor):
+    uploading = write_file(processor.papers_dir / ".upload-1234.part", age=2 * MIN_AGE)
+    abandoned = write_file(processor.papers_dir / ".upload-5678.part", age=TEMP_FILE_MIN_AGE + MIN_AGE)
+
+    collector.collect()
+
+    assert uploading.exists()
+    assert not abandoned.exists()
+
+
+def test_collect_ignores_files_not_named_by_content_hash(collector, processor):
+    user_file = write_file(processor.papers_dir / "9c19736e-5ce5-4cdc-aa09-d649e87e94de.html", age=TEMP_FILE_MIN_AGE * 2)
+    hidden = write_file(processor.papers_dir / ".gitkeep", age=TEMP_FILE_MIN_AGE * 2)
+
+    report = collector.collect()
+
+    assert user_file.exists()
+    assert hidden.exists()
+    assert report["files_removed"] == 0
+
+
+def test_collect_keeps_chunks_of_files_still_being_ingested(collector, processor, database):
+    ingesting, abandoned = content_hash(4), content_hash(5)
+    # 수집 중인 문서는 원본과 청크가 먼저 저장되고 레코드는 나중에 삽입됩니다
+    write_file(processor.papers_dir / f"{ingesting}.md", age=MIN_AGE / 2)
+    for n, digest in enumerate((ingesting, abandoned)):
+        database.insert_chunks(digest, [{"vector_row": n, "ordinal": 0, "start": 0, "end": 4, "text": "data"}])
+
+    report = collector.collect()
+
+    assert database.has_chunks(ingesting)
+    assert not database.has_chunks(abandoned)
+    assert report["chunks_removed"] == 1
+
+
+def test_delete_document_keeps_artifacts_shared_with_other_uploads(collector, processor, database):
+    digest = content_hash(6)
+    first = insert_document(database, processor, digest, "first.md")
+    second = insert_document(database, processor, digest, "second.md")
+    paper = write_file(processor.papers_dir / f"{digest}.md")
+    processed = write_file(processor.processed_dir / f"processed_{digest}.md.txtz")
+    pages = processor.page_cache_dir / digest
+    pages.mkdir()
+    write_file(pages / "00000.z")
+    database.insert_chunks(digest, [{"vector_row": 0, "ordinal": 0, "start": 0, "end": 4, "text": "data"}])
+
+    report = collector.delete_document(first)
+
+    assert report["files_removed"] == 0
+    assert paper.exists() and processed.exists() and pages.exists()
+    assert database.has_chunks(digest)
+    assert database.get_document(second) is not None
+
+    report = collector.delete_document(second)
+
+    assert report["files_removed"] == 3
+    assert not paper.exists() and not processed.exists() and not pages.exists()
+    assert not database.has_chunks(digest)
+    assert collector.delete_document(second) is None
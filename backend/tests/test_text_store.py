@@ -0,0 +1,140 @@
+import pytest
+
+from app.utils.database import Database
+from app.utils.text_store import (
+    FOOTER, MAGIC, SEGMENT_CHARS, ProcessedText, compact_processed_files, open_processed_text,
+    read_processed_text, write_processed_text,
+)
+
+
+def round_trip(tmp_path, text: str, **kwargs) -> ProcessedText:
+    path = tmp_path / "processed_paper.pdf.txtz"
+    write_processed_text(path, text, **kwargs)
+    return ProcessedText(path)
+
+
+def test_empty_text(tmp_path):
+    with round_trip(tmp_path, "") as processed:
+        assert processed.compressed
+        assert processed.length == 0
+        assert processed.read() == ""
+        assert processed.read(0, 10) == ""
+
+
+@pytest.mark.parametrize("length", [SEGMENT_CHARS - 1, SEGMENT_CHARS, SEGMENT_CHARS + 1, 2 * SEGMENT_CHARS])
+def test_text_on_segment_boundary(tmp_path, length):
+    text = "".join(chr(ord("a") + i % 26) for i in range(length))
+
+    with round_trip(tmp_path, text) as processed:
+        assert processed.read() == text
+        assert processed.read(SEGMENT_CHARS - 2, SEGMENT_CHARS + 2) == text[SEGMENT_CHARS - 2:SEGMENT_CHARS + 2]
+        assert processed.read(length - 1) == text[-1]
+
+
+def test_multibyte_characters_across_segment_boundary(tmp_path):
+    # 구간은 바이트가 아니라 글자 단위로 나누므로 여러 바이트 글자가 경계에서 깨지지 않아야 합니다
+    text = "가" * (SEGMENT_CHARS - 1) + "한글😀" + "나" * 100
+
+    with round_trip(tmp_path, text) as processed:
+        assert processed.length == len(text)
+        assert processed.read() == text
+        assert processed.read(SEGMENT_CHARS - 2, SEGMENT_CHARS + 3) == text[SEGMENT_CHARS - 2:SEGMENT_CHARS + 3]
+        assert processed.read(SEGMENT_CHARS, SEGMENT_CHARS + 1) == "글"
+
+
+def test_read_range_pages_and_sections(tmp_path):
+    text = "# 서론\n첫 페이지\n## 배경\n둘째 페이지\n# 결론\n끝"
+    pages = [0, text.index("둘째")]
+
+    with round_trip(tmp_path, text, pages=pages) as processed:
+        assert processed.read(2, 4) == text[2:4]
+        assert processed.read(-5, 4) == text[:4]
+        assert processed.read(len(text) - 1, len(text) + 10) == "끝"
+        assert processed.read(5, 5) == ""
+        assert processed.read(*processed.page_span(1)) == text[pages[1]:]
+        assert [section["title"] for section in processed.sections] == ["서론", "배경", "결론"]
+        assert processed.read(*processed.section_span(0)) == "# 서론\n첫 페이지\n## 배경\n둘째 페이지\n"
+        assert processed.read(*processed.section_span(1)) == "## 배경\n둘째 페이지\n"
+        with pytest.raises(IndexError):
+            processed.page_span(2)
+
+
+def test_legacy_text_file_is_read_directly(tmp_path):
+    path = tmp_path / "processed_paper.pdf.txt"
+    text = "# 제목\n예전 형식의 본문"
+    path.write_text(text, encoding="utf-8")
+
+    with ProcessedText(path) as processed:
+        assert not processed.compressed
+        assert processed.read() == text
+        assert processed.read(2, 4) == text[2:4]
+        assert processed.sections[0]["title"] == "제목"
+    assert read_processed_text(path) == text
+
+
+@pytest.mark.parametrize("damage", ["truncated", "footer_magic", "index"])
+def test_corrupt_file_raises_value_error(tmp_path, damage):
+    path = tmp_path / "processed_paper.pdf.txtz"
+    write_processed_text(path, "본문 " * 1000)
+    data = bytearray(path.read_bytes())
+    if damage == "truncated":
+        data = data[:len(data) // 2]
+    elif damage == "footer_magic":
+        data[-len(MAGIC):] = b"XXXXXXXX"
+    else:
+        index_offset, _, _ = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        data[index_offset:index_offset + 4] = b"\0\0\0\0"
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="손상"):
+        ProcessedText(path)
+
+
+def test_file_shorter_than_footer_raises_value_error(tmp_path):
+    path = tmp_path / "processed_paper.pdf.txtz"
+    path.write_bytes(MAGIC + b"\0")
+
+    with pytest.raises(ValueError, match="손상"):
+        ProcessedText(path)
+
+
+def test_open_processed_text_reopens_replaced_file(tmp_path):
+    path = tmp_path / "processed_paper.pdf.txtz"
+    write_processed_text(path, "첫 버전")
+    assert open_processed_text(path) is open_processed_text(path)
+
+    write_processed_text(path, "바뀐 두 번째 버전")
+    assert open_processed_text(path).read() == "바뀐 두 번째 버전"
+
+
+def test_compact_processed_files_converts_legacy_files(tmp_path):
+    database = Database(str(tmp_path / "documents.db"))
+    legacy = tmp_path / "processed_paper.pdf.txt"
+    text = "압축할 본문 " * 5000
+    legacy.write_text(text, encoding="utf-8")
+    doc_ids = [
+        database.insert_document({
+            "original_filename": name,
+            "saved_filename": "paper.pdf",
+            "file_path": str(tmp_path / "paper.pdf"),
+            "file_type": ".pdf",
+            "upload_date": "2024-01-01T00:00:00",
+            "file_size": 4,
+            "processed_file": str(legacy),
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00",
+        })
+        for name in ("first.pdf", "second.pdf")
+    ]
+    try:
+        stats = compact_processed_files(database, tmp_path)
+
+        target = tmp_path / "processed_paper.pdf.txtz"
+        assert stats["files"] == 1 and stats["missing"] == 0
+        assert stats["bytes_after"] < stats["bytes_before"]
+        assert not legacy.exists()
+        assert read_processed_text(target) == text
+        assert all(database.get_document(doc_id)["processed_file"] == str(target) for doc_id in doc_ids)
+        assert compact_processed_files(database, tmp_path)["files"] == 0
+    finally:
+        database.close()